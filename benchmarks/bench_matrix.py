@@ -0,0 +1,63 @@
+"""
+Benchmark: time and memory per frame of the Matrix rain effect.
+
+Renders Matrix over pre-rendered frames of a moving test pattern (4K by
+default) and reports the time per frame and the peak memory allocated
+while rendering one frame (numpy allocations, measured with tracemalloc).
+To compare two versions of the effect, run it from each checkout (e.g. a
+git worktree of the older commit) with the same arguments.
+
+Usage:
+    uv run benchmarks/bench_matrix.py [--size 3840x2160] [--frames 24] [--font-size 16]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import numpy as np
+from moviepy import VideoClip
+from custom_fx import Matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="3840x2160")
+    parser.add_argument("--frames", type=int, default=24)
+    parser.add_argument("--fps", type=float, default=24)
+    parser.add_argument("--font-size", type=int, default=16)
+    args = parser.parse_args()
+    w, h = (int(v) for v in args.size.split("x"))
+
+    yy, xx = np.mgrid[0:h, 0:w]
+    frames = [
+        np.dstack([(xx + i * 3) % 256, (yy + i * 2) % 256, (xx + yy) % 256]).astype(np.uint8)
+        for i in range(args.frames)
+    ]
+    del yy, xx
+    # The effect reads pre-rendered frames, so only the effect itself is measured
+    clip = VideoClip(lambda t: frames[min(len(frames) - 1, round(t * args.fps))], duration=args.frames / args.fps)
+    processed = Matrix(font_size=args.font_size).apply(clip)
+    processed.get_frame(0)
+
+    start = time.perf_counter()
+    for i in range(1, args.frames):
+        processed.get_frame(i / args.fps)
+    per_frame = (time.perf_counter() - start) / (args.frames - 1) * 1000
+
+    tracemalloc.start()
+    peak = 0
+    for i in range(1, min(args.frames, 6)):
+        tracemalloc.reset_peak()
+        processed.get_frame(i / args.fps)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    print(f"{w}x{h}, font size {args.font_size}: {per_frame:.1f} ms/frame, peak {peak / 1024**2:.1f} MiB allocated per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: serial write_videofile vs. parallel segment rendering.
+
+Renders an effect-heavy clip (Kaleidoscope + RotatingCube) once through
+MoviePy's single-threaded writer and once through render_segments with an
+increasing number of worker processes.
+
+Usage:
+    uv run benchmarks/bench_parallel_render.py [--duration 20] [--size 1280x720] [--workers 2 4 8 16]
+"""
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import numpy as np
+from moviepy import VideoClip
+from custom_fx import Kaleidoscope, RotatingCube
+from segment_render import render_segments
+
+
+def build_clip(duration, size):
+    w, h = size
+    yy, xx = np.mgrid[0:h, 0:w]
+
+    # Moving pattern so every frame differs and the encoder has real work to do
+    def frame_function(t):
+        r = (xx + t * 60) % 256
+        g = (yy + t * 35) % 256
+        b = (xx + yy) % 256
+        return np.dstack([r, g, b]).astype(np.uint8)
+
+    clip = VideoClip(frame_function, duration=duration).with_fps(24)
+    return clip.with_effects([Kaleidoscope(n_slices=8), RotatingCube()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8, 16])
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    clip = build_clip(args.duration, size)
+    print(f"{args.duration:.0f}s at {size[0]}x{size[1]}, {os.cpu_count()} CPUs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        clip.write_videofile(os.path.join(tmp, "serial.mp4"), preset="ultrafast", logger=None)
+        serial = time.perf_counter() - start
+        print(f"serial write_videofile : {serial:7.2f}s")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            # Workers build their own copy of the clip
+            clip_factory = functools.partial(build_clip, args.duration, size)
+            render_segments(clip, os.path.join(tmp, f"parallel_{workers}.mp4"), clip_factory, preset="ultrafast",
+                            segments=workers, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:3d} segment workers     : {elapsed:7.2f}s  ({serial / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: MoviePy's detect_scenes vs. scene_detect on a long file.
+
+Builds a test file of hard cuts between a few synthetic sources (encoded
+once, then concatenated without re-encoding up to the requested duration)
+and detects its scenes with MoviePy's full-resolution, frame-by-frame
+detect_scenes and with scene_detect decoding at reduced resolution straight
+from ffmpeg, with an increasing number of parallel decoders.
+
+Usage:
+    uv run benchmarks/bench_scene_detect.py [--duration 3600] [--size 1280x720] [--workers 1 2 4] [--skip-moviepy]
+"""
+import argparse
+import os
+import subprocess as sp
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from moviepy import VideoFileClip
+from moviepy.config import FFMPEG_BINARY
+from moviepy.video.tools.cuts import detect_scenes as moviepy_detect_scenes
+from scene_detect import detect_scenes
+
+SOURCES = [
+    ("testsrc2", 7),
+    ("smptebars", 5),
+    ("color=c=darkblue", 11),
+    ("rgbtestsrc", 4),
+    ("color=c=orange", 9),
+]
+
+
+def build_file(path, tmp, duration, size, fps=25):
+    """Returns the exact times of the cuts in the file."""
+    parts = []
+    for i, (source, seconds) in enumerate(SOURCES):
+        part = os.path.join(tmp, f"part{i}.mp4")
+        sp.run([
+            FFMPEG_BINARY, "-loglevel", "error", "-y", "-f", "lavfi",
+            "-i", f"{source}{':' if '=' in source else '='}s={size[0]}x{size[1]}:r={fps}:d={seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", part,
+        ], check=True)
+        parts.append((part, seconds))
+
+    listing, cuts, t, i = os.path.join(tmp, "parts.txt"), [], 0, 0
+    with open(listing, "w") as f:
+        while t < duration:
+            part, seconds = parts[i % len(parts)]
+            f.write(f"file '{part}'\n")
+            t += seconds
+            cuts.append(t)
+            i += 1
+    sp.run([FFMPEG_BINARY, "-loglevel", "error", "-y", "-f", "concat", "-safe", "0", "-i", listing,
+            "-c", "copy", path], check=True)
+    return cuts[:-1]
+
+
+def recall(found, expected, fps=25):
+    """Fraction of the expected cuts found within one frame."""
+    hits = sum(any(abs(f - e) <= 1.0 / fps for f in found) for e in expected)
+    return hits / len(expected) if expected else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3600)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--skip-moviepy", action="store_true")
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scenes.mp4")
+        expected = build_file(path, tmp, args.duration, size)
+        clip = VideoFileClip(path)
+        print(f"{clip.duration:.0f}s at {size[0]}x{size[1]}, {len(expected)} cuts, {os.cpu_count()} CPUs")
+
+        if not args.skip_moviepy:
+            start = time.perf_counter()
+            cuts, _ = moviepy_detect_scenes(clip, logger=None)
+            baseline = time.perf_counter() - start
+            found = [start for start, _ in cuts[1:]]
+            print(f"moviepy detect_scenes      : {baseline:8.2f}s  recall {recall(found, expected):.3f}")
+
+        for method in ("luminance", "histogram"):
+            for workers in args.workers:
+                start = time.perf_counter()
+                cuts, _ = detect_scenes(clip, source=path, method=method, workers=workers)
+                elapsed = time.perf_counter() - start
+                found = [start for start, _ in cuts[1:]]
+                speedup = "" if args.skip_moviepy else f"  ({baseline / elapsed:.1f}x)"
+                print(f"{method:9s} {workers:2d} decoders      : {elapsed:8.2f}s  recall {recall(found, expected):.3f}{speedup}")
+        clip.close()
+
+
+if __name__ == "__main__":
+    main()
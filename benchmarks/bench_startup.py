@@ -0,0 +1,77 @@
+"""
+Benchmark: cold start of the MCP server and of the API.
+
+Starts fresh interpreters and times, in each, importing fastmcp (the floor
+no server can go below), importing the server on top of it (its own
+imports plus tool registration), and the first list_clips call through an
+in-memory MCP client. A second set of interpreters imports the API (server,
+FastAPI and the chat backend). Reports the median over the runs, and which
+heavy modules were actually loaded by the end of each run.
+
+Usage:
+    uv run benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess as sp
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ["moviepy", "numpy", "cv2", "PIL", "numexpr", "litellm"]
+
+SERVER_RUN = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import fastmcp
+t1 = time.perf_counter()
+from src import server
+t2 = time.perf_counter()
+
+async def first_call():
+    async with fastmcp.Client(server.mcp) as client:
+        await client.call_tool("list_clips", {})
+
+asyncio.run(first_call())
+t3 = time.perf_counter()
+print(json.dumps({"timings": {"import fastmcp": t1 - t0, "import server": t2 - t1, "first list_clips": t3 - t2}, "modules": sorted(sys.modules)}))
+"""
+
+API_RUN = """
+import json, sys, time
+t0 = time.perf_counter()
+from src import api
+print(json.dumps({"timings": {"import api": time.perf_counter() - t0}, "modules": sorted(sys.modules)}))
+"""
+
+
+def run(code: str) -> tuple:
+    """Runs code in a fresh interpreter; returns its timings, its loaded modules and the wall time to exit."""
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, "src"), LITELLM_LOCAL_MODEL_COST_MAP="True")
+    start = time.perf_counter()
+    result = sp.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report["timings"], report["modules"], wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, code in (("server", SERVER_RUN), ("api", API_RUN)):
+        runs = [run(code) for _ in range(args.runs)]
+        print(f"{name} ({args.runs} runs, median):")
+        for phase in runs[0][0]:
+            print(f"  {phase:<20} {statistics.median(r[0][phase] for r in runs) * 1000:8.0f} ms")
+        print(f"  {'whole process':<20} {statistics.median(r[2] for r in runs) * 1000:8.0f} ms (interpreter start to exit)")
+        heavy = [module for module in HEAVY_MODULES if module in runs[0][1]]
+        print(f"  heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Bytes hashed at each end of a source by content_digest
+SAMPLE_BYTES = 1024**2
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def content_digest(path: str) -> str:
+    """
+    Hash of a file's size, mtime and first and last SAMPLE_BYTES: cheap even
+    for multi-gigabyte sources, and unchanged when the file is moved or
+    renamed. Memoised per (path, size, mtime).
+    """
+    stat = os.stat(path)
+    memo = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    with _digests_lock:
+        digest = _digests.get(memo)
+    if digest is None:
+        h = hashlib.sha256(f"{stat.st_size}|{stat.st_mtime_ns}|".encode())
+        with open(path, "rb") as f:
+            h.update(f.read(SAMPLE_BYTES))
+            if stat.st_size > 2 * SAMPLE_BYTES:
+                f.seek(-SAMPLE_BYTES, os.SEEK_END)
+            h.update(f.read(SAMPLE_BYTES))
+        digest = h.hexdigest()
+        with _digests_lock:
+            _digests[memo] = digest
+    return digest
+
+
+class AnalysisStore:
+    """
+    Persistent results of analyses (scene cuts, face tracks, periods, peak
+    volume, ...), keyed by a hash of the analysed subject (a source's content
+    digest or a clip graph fingerprint), the kind of analysis and its
+    parameters. Results are dicts: numpy arrays are saved as .npy files and
+    everything else as JSON in an SQLite index, in the same directory. Least
+    recently used entries are evicted once the store exceeds max_bytes.
+    max_bytes = 0 disables it.
+    """
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(subject: str, kind: str, params: dict) -> str:
+        payload = {"subject": subject, "kind": kind, "params": params}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held
+        if self._db is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Render worker processes share the index, hence the generous timeout
+            db = sqlite3.connect(self.directory / "index.sqlite", timeout=30, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, "
+                "arrays TEXT NOT NULL, bytes INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _array_path(self, key: str, name: str) -> Path:
+        return self.directory / f"{key}.{name}.npy"
+
+    def get(self, key: str):
+        """Returns the stored result for key, or None on a miss."""
+        if not self.enabled:
+            return None
+        import numpy as np
+
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT value, arrays FROM analyses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                try:
+                    result = json.loads(row[0])
+                    for name in json.loads(row[1]):
+                        result[name] = np.load(self._array_path(key, name))
+                except FileNotFoundError:
+                    # An array was removed behind our back: forget the entry
+                    self._delete(db, key, json.loads(row[1]))
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE analyses SET accessed = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            self.hits += 1
+            return result
+
+    def put(self, key: str, kind: str, result: dict):
+        """Stores result (a dict of JSON values and numpy arrays) and evicts old entries if over budget."""
+        if not self.enabled:
+            return
+        import numpy as np
+
+        value = {name: item for name, item in result.items() if not isinstance(item, np.ndarray)}
+        arrays = [name for name, item in result.items() if isinstance(item, np.ndarray)]
+        encoded = json.dumps(value)
+        with self._lock:
+            db = self._connect()
+            size = len(encoded)
+            for name in arrays:
+                path = self._array_path(key, name)
+                # Written under a temporary name so a concurrent get never reads a partial array
+                tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+                with open(tmp, "wb") as f:
+                    np.save(f, result[name])
+                os.replace(tmp, path)
+                size += path.stat().st_size
+            db.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, encoded, json.dumps(arrays), size, time.time()),
+            )
+            db.commit()
+            self._evict(db)
+
+    def get_or_compute(self, subject, kind: str, params: dict, compute) -> dict:
+        """
+        The stored result of analysis kind with params on subject, calling
+        compute() to make (and store) it on a miss. subject None (e.g. a clip
+        that cannot be fingerprinted) always computes.
+        """
+        if subject is None or not self.enabled:
+            return compute()
+        key = self.key(subject, kind, params)
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, kind, result)
+        return result
+
+    def _delete(self, db, key: str, arrays: list):
+        for name in arrays:
+            try:
+                os.unlink(self._array_path(key, name))
+            except FileNotFoundError:
+                pass
+        db.execute("DELETE FROM analyses WHERE key = ?", (key,))
+        db.commit()
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(bytes), 0) FROM analyses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, arrays, size in db.execute("SELECT key, arrays, bytes FROM analyses ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._delete(db, key, json.loads(arrays))
+            total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = 0, 0
+            if self.enabled:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM analyses"
+                ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "directory": str(self.directory),
+            }
@@ -1,18 +1,97 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-import litellm
 import json
 import ast
 import asyncio
+import hashlib
+import hmac
 import os
+import secrets
 import sys
+import tempfile
+import uuid
 from typing import List, Dict, Any, Optional
 
-from .server import mcp
+from .server import mcp, get_clip, detached_clip, clip_source_file, SESSIONS
+from .lazy import lazy_import
+from .config import (
+    PREVIEW_DIR, PREVIEW_CACHE_MAX_BYTES, PREVIEW_HEIGHT, PREVIEW_FPS, PREVIEW_SEGMENT_SECONDS,
+    THUMBNAIL_DIR, THUMBNAIL_CACHE_MAX_BYTES, THUMBNAIL_HEIGHT, THUMBNAIL_WORKERS,
+    SESSION_SECRET,
+)
+from .render_cache import RenderCache
+from .preview import build_playlist, encode_segment, preview_size, segment_bounds
+from .thumbnails import ThumbnailService, filmstrip_times
+
+# litellm takes seconds to import: it is loaded by the first chat request
+litellm = lazy_import("litellm")
 
 app = FastAPI()
 
+SESSION_COOKIE = "moviepy_session"
+# Signs session cookies; without SESSION_SECRET, sessions do not survive a restart
+_SESSION_KEY = (SESSION_SECRET or secrets.token_hex(32)).encode()
+
+
+def _sign_session(session_id: str) -> str:
+    return hmac.new(_SESSION_KEY, session_id.encode(), hashlib.sha256).hexdigest()
+
+
+def _session_from_cookie(value: Optional[str]) -> Optional[str]:
+    """The session ID of a cookie value the server issued, or None."""
+    session_id, _, signature = (value or "").partition(".")
+    if not signature or not hmac.compare_digest(signature, _sign_session(session_id)):
+        return None
+    # Reserved for calls made outside any client session
+    if session_id == SESSIONS.default.session_id:
+        return None
+    return session_id
+
+
+class SessionMiddleware:
+    """
+    Handles each request in the session (see sessions.py) of its session
+    cookie, so the clips of one web UI user are out of reach of the others.
+    Session IDs are issued by the server in a signed, HttpOnly cookie:
+    requests without a valid one are given a new session.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        session_id = _session_from_cookie(Request(scope).cookies.get(SESSION_COOKIE))
+        new = session_id is None
+        if new:
+            session_id = uuid.uuid4().hex
+
+        async def send_with_cookie(message):
+            if new and message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{SESSION_COOKIE}={session_id}.{_sign_session(session_id)}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            SESSIONS.get(session_id)
+        except RuntimeError as e:
+            response = Response(json.dumps({"detail": str(e)}), status_code=503, media_type="application/json")
+            await response(scope, receive, send)
+            return
+        with SESSIONS.bind(session_id):
+            await self.app(scope, receive, send_with_cookie)
+
+
+# Added first so that CORS wraps it and preflight requests get no session
+app.add_middleware(SessionMiddleware)
+
 ALLOWED_ORIGINS = os.environ.get("ALLOWED_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
 
 app.add_middleware(
@@ -23,6 +102,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+PREVIEW_CACHE = RenderCache(PREVIEW_DIR, PREVIEW_CACHE_MAX_BYTES)
+THUMBNAILS = ThumbnailService(RenderCache(THUMBNAIL_DIR, THUMBNAIL_CACHE_MAX_BYTES), max_workers=THUMBNAIL_WORKERS)
+MAX_FILMSTRIP_FRAMES = 60
+
 class ChatRequest(BaseModel):
     messages: List[Dict[str, Any]]
     api_keys: Dict[str, str]
@@ -119,23 +202,150 @@ async def chat(request: ChatRequest):
 
     return response_message
 
+def _format_duration(duration) -> str:
+    if duration is None:
+        return "Unknown"
+    minutes, seconds = divmod(int(duration), 60)
+    return f"{minutes}:{seconds:02d}"
+
 @app.get("/api/clips")
-async def get_clips():
+async def get_clips(request: Request):
     try:
         result = await mcp._tool_manager.call_tool("list_clips", {})
         text = result.content[0].text
         clips_dict = ast.literal_eval(text)
 
+        session_clips = SESSIONS.current().clips
         clips = []
         for cid, ctype in clips_dict.items():
+            clip = session_clips.get(cid)
+            # Clips that are not loaded are not built just to list them; their thumbnail builds them lazily
+            visual = clip is None or hasattr(clip, "size")
             clips.append({
                 "id": cid,
                 "name": f"Clip {cid[:8]}",
-                "duration": "Unknown",
-                "thumbnail": "/placeholder.svg",
+                "duration": _format_duration(clip.duration if clip is not None else None),
+                "thumbnail": str(request.url_for("clip_thumbnail", clip_id=cid)) if visual else None,
+                "filmstrip": str(request.url_for("clip_filmstrip", clip_id=cid)) if visual else None,
                 "type": ctype
             })
         return clips
     except Exception as e:
         print(e)
         return []
+
+def _filmstrip_response(request: Request, clip_id: str, frames: int, height: int):
+    if not 1 <= frames <= MAX_FILMSTRIP_FRAMES:
+        raise HTTPException(status_code=400, detail=f"frames must be between 1 and {MAX_FILMSTRIP_FRAMES}.")
+    if not 16 <= height <= 720:
+        raise HTTPException(status_code=400, detail="height must be between 16 and 720.")
+
+    key = None
+    graph = SESSIONS.current().graph
+    node = graph.nodes.get(clip_id)
+    fingerprint = graph.fingerprint(clip_id) if node is not None and not node.deleted else None
+    if fingerprint is not None:
+        key = THUMBNAILS.cache.key(fingerprint, "filmstrip", ".jpg", {"frames": frames, "height": height})
+        # Content-addressed: a matching ETag means the sprite is unchanged, without touching the clip
+        if request.headers.get("if-none-match") == f'"{key}"':
+            return Response(status_code=304, headers={"ETag": f'"{key}"'})
+
+    try:
+        clip = get_clip(clip_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not hasattr(clip, "size"):
+        raise HTTPException(status_code=400, detail="Only video and image clips have thumbnails.")
+
+    session_id = SESSIONS.current().session_id
+
+    def open_clip():
+        # Called on a thumbnail thread, outside of the request's session
+        with SESSIONS.bind(session_id):
+            return detached_clip(clip_id, preview=True)
+
+    try:
+        data = THUMBNAILS.filmstrip(
+            key,
+            filmstrip_times(clip.duration, frames),
+            height,
+            source=clip_source_file(clip_id),
+            open_clip=open_clip,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    etag = f'"{key or hashlib.sha256(data).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(data, media_type="image/jpeg", headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@app.get("/api/clips/{clip_id}/thumbnail.jpg")
+def clip_thumbnail(request: Request, clip_id: str, height: int = THUMBNAIL_HEIGHT):
+    """Poster frame from the middle of the clip."""
+    return _filmstrip_response(request, clip_id, 1, height)
+
+@app.get("/api/clips/{clip_id}/filmstrip.jpg")
+def clip_filmstrip(request: Request, clip_id: str, frames: int = 10, height: int = THUMBNAIL_HEIGHT):
+    """Sprite of evenly spaced frames side by side, each height pixels high."""
+    return _filmstrip_response(request, clip_id, frames, height)
+
+def _preview_clip(clip_id: str):
+    try:
+        clip = get_clip(clip_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if clip.duration is None or not hasattr(clip, "size"):
+        raise HTTPException(status_code=400, detail="Only video clips with a duration can be previewed.")
+    return clip
+
+def _preview_fps(clip) -> float:
+    return min(PREVIEW_FPS, getattr(clip, "fps", None) or PREVIEW_FPS)
+
+@app.get("/api/preview/{clip_id}/index.m3u8")
+def preview_playlist(clip_id: str):
+    """HLS playlist of a low-resolution preview; its segments are rendered on demand."""
+    clip = _preview_clip(clip_id)
+    fingerprint = SESSIONS.current().graph.fingerprint(clip_id)
+    version = fingerprint[:16] if fingerprint else "live"
+    playlist = build_playlist(clip.duration, PREVIEW_SEGMENT_SECONDS, lambda index: f"{index}.ts?v={version}")
+    return Response(playlist, media_type="application/vnd.apple.mpegurl", headers={"Cache-Control": "no-cache"})
+
+def _stream_segment(clip_id: str, start: float, end: float, key: Optional[str]):
+    """Encodes a preview segment, streaming it while it is produced, and caches it once complete."""
+    with detached_clip(clip_id, preview=True) as clip:
+        PREVIEW_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".", suffix=".ts", dir=PREVIEW_DIR)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in encode_segment(clip, start, end, _preview_fps(clip), preview_size(clip.size, PREVIEW_HEIGHT)):
+                    f.write(chunk)
+                    yield chunk
+            if key is not None:
+                PREVIEW_CACHE.store(key, tmp)
+        finally:
+            os.remove(tmp)
+
+@app.get("/api/preview/{clip_id}/{index}.ts")
+def preview_segment(clip_id: str, index: int):
+    """One MPEG-TS segment of a clip preview, served from the preview cache or rendered on the fly."""
+    clip = _preview_clip(clip_id)
+    try:
+        start, end = segment_bounds(clip.duration, PREVIEW_SEGMENT_SECONDS, index)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    key = None
+    fingerprint = SESSIONS.current().graph.fingerprint(clip_id)
+    if fingerprint is not None:
+        settings = {
+            "index": index,
+            "segment_seconds": PREVIEW_SEGMENT_SECONDS,
+            "height": PREVIEW_HEIGHT,
+            "fps": _preview_fps(clip),
+        }
+        key = PREVIEW_CACHE.key(fingerprint, "preview", ".ts", settings)
+        cached = PREVIEW_CACHE.lookup(key, ".ts")
+        if cached is not None:
+            return FileResponse(cached, media_type="video/mp2t")
+    return StreamingResponse(_stream_segment(clip_id, start, end, key), media_type="video/mp2t")
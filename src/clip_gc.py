@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+
+
+class ClipCollector:
+    """
+    Finds the loaded clips that can be unloaded. Roots are the clips named by
+    the user and the `recent` clips most recently returned by a tool or used
+    as an input; roots and every clip they are made from are reachable. The
+    other clips are intermediates: when collected they leave the registry
+    but keep their graph node, so their IDs stay valid and they are rebuilt
+    on next use. Clips that cannot be rebuilt are never collected.
+    """
+
+    def __init__(self, graph, recent: int = 20):
+        self.graph = graph
+        self.recent = recent
+        self.names = {}
+        self.collected = 0
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def touch(self, clip_id: str):
+        """Marks clip_id as just returned or used."""
+        with self._lock:
+            self._recent[clip_id] = None
+            self._recent.move_to_end(clip_id)
+            while len(self._recent) > self.recent:
+                self._recent.popitem(last=False)
+
+    def name(self, clip_id: str, name: str = None):
+        """Names clip_id, making it a root; no name unnames it."""
+        with self._lock:
+            if name:
+                self.names[clip_id] = name
+            else:
+                self.names.pop(clip_id, None)
+
+    def forget(self, clip_id: str):
+        """Drops a deleted clip from the roots."""
+        with self._lock:
+            self.names.pop(clip_id, None)
+            self._recent.pop(clip_id, None)
+
+    def roots(self) -> set:
+        with self._lock:
+            return set(self.names) | set(self._recent)
+
+    def reachable(self) -> set:
+        """The roots and the clips they are made from."""
+        reachable = set()
+        for root in self.roots():
+            if root in reachable:
+                continue
+            try:
+                reachable.update(self.graph.ancestors(root))
+            except ValueError:
+                reachable.add(root)
+        return reachable
+
+    def status(self, clips: dict) -> dict:
+        """'root', 'reachable' or 'intermediate' for every loaded clip."""
+        roots, reachable = self.roots(), self.reachable()
+        return {
+            cid: "root" if cid in roots else "reachable" if cid in reachable else "intermediate"
+            for cid in list(clips)
+        }
+
+    def collect(self, clips: dict, ancestors: bool = False) -> list[str]:
+        """
+        Removes the unreachable, rebuildable clips from clips. Returns their IDs.
+        With ancestors, also removes the intermediates roots are made from:
+        the roots still hold them, so this frees registry slots but no memory.
+        """
+        keep = self.roots() if ancestors else self.reachable()
+        collected = [
+            cid for cid in list(clips)
+            if cid not in keep and cid in self.graph.nodes and self.graph.is_rebuildable(cid)
+        ]
+        for cid in collected:
+            clips.pop(cid, None)
+        self.collected += len(collected)
+        return collected
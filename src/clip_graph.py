@@ -0,0 +1,386 @@
+import contextvars
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from contextlib import contextmanager
+
+# Parameter names through which tools receive the IDs of their input clips
+CLIP_ID_PARAMS = ("clip_id", "clip_ids", "clip_ids_rows", "audio_clip_id", "mask_clip_id", "other_clip_id")
+
+GRAPH_FORMAT_VERSION = 1
+
+# (operation name, bound parameters) of the tool call currently running
+_CURRENT_OPERATION = contextvars.ContextVar("clip_graph_operation", default=None)
+# BuildScope that get_clip/register_clip must use while a node is being replayed
+_CURRENT_BUILD = contextvars.ContextVar("clip_graph_build", default=None)
+
+
+def current_build():
+    """Returns the BuildScope replaying nodes in this context, or None."""
+    return _CURRENT_BUILD.get()
+
+
+def current_operation():
+    """Returns the name of the operation running or being replayed in this context, or None."""
+    build = _CURRENT_BUILD.get()
+    if build is not None and build._targets:
+        return build.graph.nodes[build._targets[-1]].op
+    current = _CURRENT_OPERATION.get()
+    return current[0] if current is not None else None
+
+
+def _clip_ids_in(value) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    ids = []
+    for item in value:
+        ids.extend(_clip_ids_in(item))
+    return ids
+
+
+def _inputs_of(params: dict) -> list[str]:
+    """IDs of the input clips named by a node's parameters."""
+    inputs = []
+    for name in CLIP_ID_PARAMS:
+        inputs.extend(_clip_ids_in(params.get(name)))
+    return inputs
+
+
+def _map_clip_ids(value, func):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return func(value)
+    return [_map_clip_ids(item, func) for item in value]
+
+
+def _file_identity(path: str):
+    """(path, size, mtime_ns) of a file, or of every entry of a directory."""
+    if os.path.isdir(path):
+        identity = []
+        for entry in sorted(os.scandir(path), key=lambda entry: entry.name):
+            if entry.is_file():
+                stat = entry.stat()
+                identity.append([entry.name, stat.st_size, stat.st_mtime_ns])
+        return identity
+    stat = os.stat(path)
+    return [os.path.realpath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _source_identities(params: dict) -> dict:
+    """Identities of the files referenced by string parameters (source files, fonts, ...)."""
+    identities = {}
+    for name, value in params.items():
+        if name in CLIP_ID_PARAMS:
+            continue
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            if isinstance(item, str) and item and os.path.exists(item):
+                identities[item] = _file_identity(item)
+    return identities
+
+
+class ClipNode:
+    """
+    Declarative description of one registered clip: the operation (tool name)
+    that produced it, the parameters it was called with and the IDs of its
+    input clips. Nodes with op None were registered outside of a recorded
+    operation and cannot be rebuilt.
+    """
+
+    def __init__(self, clip_id: str, op: str = None, params: dict = None, inputs: list = None):
+        self.clip_id = clip_id
+        self.op = op
+        self.params = params or {}
+        self.inputs = inputs or []
+        # Deleted nodes are kept while other nodes still depend on them
+        self.deleted = False
+
+    def to_dict(self) -> dict:
+        return {"op": self.op, "params": self.params, "inputs": self.inputs}
+
+    @classmethod
+    def from_dict(cls, clip_id: str, data: dict):
+        return cls(clip_id, data.get("op"), data.get("params"), data.get("inputs"))
+
+
+class BuildScope:
+    """
+    Materializes nodes of a ClipGraph into MoviePy clips by replaying their
+    operations. While a replay runs, get_clip/register_clip resolve through
+    this scope instead of the global registry.
+
+    preview marks builds for interactive use, where operations may substitute
+    cheaper stand-ins (e.g. proxy media); builds for final output leave it off.
+    """
+
+    def __init__(self, graph, resolve=None, preview: bool = False):
+        self.graph = graph
+        # Optional callable returning an already-resident clip (or None)
+        self.resolve = resolve
+        self.preview = preview
+        self.built = {}
+        self._targets = []
+
+    def get(self, clip_id: str):
+        if clip_id in self.built:
+            return self.built[clip_id]
+        clip = self.resolve(clip_id) if self.resolve is not None else None
+        if clip is None:
+            clip = self._replay(clip_id)
+        self.built[clip_id] = clip
+        return clip
+
+    def register(self, clip) -> str:
+        """Receives the clip produced by the operation being replayed."""
+        clip_id = self._targets[-1]
+        self.built[clip_id] = clip
+        return clip_id
+
+    def _replay(self, clip_id: str):
+        node = self.graph.nodes.get(clip_id)
+        if node is None:
+            raise ValueError(f"Clip with ID {clip_id} not found.")
+        if node.op is None:
+            raise ValueError(f"Clip {clip_id} cannot be rebuilt: it was not created by a recorded operation.")
+
+        func = self.graph.operations[node.op]
+        self._targets.append(clip_id)
+        token = _CURRENT_BUILD.set(self)
+        try:
+            func(**node.params)
+        finally:
+            _CURRENT_BUILD.reset(token)
+            self._targets.pop()
+        if clip_id not in self.built:
+            raise RuntimeError(f"Operation {node.op} did not register a clip while rebuilding {clip_id}.")
+        return self.built[clip_id]
+
+    def close(self):
+        """Closes every clip built (not resolved) by this scope."""
+        for clip_id, clip in self.built.items():
+            if self.resolve is not None and self.resolve(clip_id) is clip:
+                continue
+            try:
+                clip.close()
+            except Exception:
+                pass
+
+
+class ClipGraph:
+    """
+    DAG of ClipNodes mirroring the clip registry. Every clip-producing tool is
+    wrapped with ClipGraph.operation so that register_clip can record how the
+    clip was made; the graph can then be exported as JSON and rebuilt lazily.
+    Graphs given the operations of another graph share them (and its
+    operations registered later), with nodes of their own.
+    """
+
+    def __init__(self, operations: dict = None):
+        self.nodes = {}
+        self.operations = {} if operations is None else operations
+
+    def operation(self, func):
+        """Decorator recording calls of a clip-producing tool as graph operations."""
+        signature = inspect.signature(func)
+        self.operations[func.__name__] = func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            token = _CURRENT_OPERATION.set((func.__name__, dict(bound.arguments)))
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _CURRENT_OPERATION.reset(token)
+
+        return wrapper
+
+    def record(self, clip_id: str) -> ClipNode:
+        """Records the node for a newly registered clip from the running operation."""
+        current = _CURRENT_OPERATION.get()
+        node = ClipNode(clip_id)
+        if current is not None:
+            op, params = current
+            try:
+                # Round-trip to freeze the parameters and make sure they serialize
+                params = json.loads(json.dumps(params))
+            except (TypeError, ValueError):
+                pass
+            else:
+                node = ClipNode(clip_id, op, params, _inputs_of(params))
+        self.nodes[clip_id] = node
+        return node
+
+    def dependants(self, clip_id: str) -> list[str]:
+        return [cid for cid, node in self.nodes.items() if clip_id in node.inputs]
+
+    def remove(self, clip_id: str):
+        """
+        Removes a node. Nodes that other nodes still depend on are only marked
+        as deleted so that their descendants stay rebuildable; they are pruned
+        once nothing depends on them anymore.
+        """
+        node = self.nodes.get(clip_id)
+        if node is None:
+            return
+        if self.dependants(clip_id):
+            node.deleted = True
+            return
+        del self.nodes[clip_id]
+        for input_id in set(node.inputs):
+            parent = self.nodes.get(input_id)
+            if parent is not None and parent.deleted:
+                self.remove(input_id)
+
+    def ancestors(self, clip_id: str) -> list[str]:
+        """Returns the IDs clip_id depends on, itself included, inputs first."""
+        order, seen = [], set()
+
+        def visit(cid):
+            if cid in seen:
+                return
+            seen.add(cid)
+            node = self.nodes.get(cid)
+            if node is None:
+                raise ValueError(f"Clip with ID {cid} not found.")
+            for input_id in node.inputs:
+                visit(input_id)
+            order.append(cid)
+
+        visit(clip_id)
+        return order
+
+    def is_rebuildable(self, clip_id: str) -> bool:
+        try:
+            return all(self.nodes[cid].op is not None for cid in self.ancestors(clip_id))
+        except ValueError:
+            return False
+
+    def fingerprint(self, clip_id: str):
+        """
+        Stable content hash of the clip: operations, parameters and identities
+        (size, mtime) of the source files of the clip and its inputs, but not
+        clip IDs, so re-creating the same composition gives the same hash.
+        Returns None if the clip cannot be rebuilt.
+        """
+        if not self.is_rebuildable(clip_id):
+            return None
+        digests = {}
+
+        def visit(cid):
+            if cid not in digests:
+                node = self.nodes[cid]
+                params = {
+                    name: _map_clip_ids(value, visit) if name in CLIP_ID_PARAMS else value
+                    for name, value in node.params.items()
+                }
+                payload = {"op": node.op, "params": params, "sources": _source_identities(node.params)}
+                digests[cid] = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+            return digests[cid]
+
+        try:
+            return visit(clip_id)
+        except OSError:
+            return None
+
+    def to_dict(self, clip_id: str = None) -> dict:
+        """Serializes the whole graph, or only the subgraph needed to build clip_id."""
+        ids = self.ancestors(clip_id) if clip_id is not None else list(self.nodes)
+        return {
+            "version": GRAPH_FORMAT_VERSION,
+            "nodes": {cid: self.nodes[cid].to_dict() for cid in ids},
+        }
+
+    def to_json(self, clip_id: str = None) -> str:
+        return json.dumps(self.to_dict(clip_id))
+
+    def load(self, data) -> list[str]:
+        """
+        Adds the nodes of a serialized graph (dict or JSON string). Nodes are
+        not materialized; they are rebuilt on first use. Their inputs are
+        derived from their parameters (the serialized "inputs" are ignored),
+        and graphs with missing inputs or cycles are rejected before any node
+        is added.
+        """
+        if isinstance(data, str):
+            data = json.loads(data)
+        if data.get("version") != GRAPH_FORMAT_VERSION:
+            raise ValueError(f"Unsupported clip graph version: {data.get('version')}")
+
+        nodes = {}
+        for cid, nd in data.get("nodes", {}).items():
+            if not isinstance(nd, dict) or not isinstance(nd.get("params", {}), dict):
+                raise ValueError(f"Clip {cid} has a malformed definition.")
+            node = ClipNode.from_dict(cid, nd)
+            try:
+                node.inputs = _inputs_of(node.params)
+            except TypeError:
+                raise ValueError(f"Clip {cid} has malformed input clip IDs.")
+            nodes[cid] = node
+        for cid, node in nodes.items():
+            if node.op not in self.operations:
+                raise ValueError(f"Clip {cid} uses unknown operation '{node.op}'.")
+            for input_id in node.inputs:
+                if input_id not in nodes and input_id not in self.nodes:
+                    raise ValueError(f"Clip {cid} depends on missing clip {input_id}.")
+            existing = self.nodes.get(cid)
+            if existing is not None and existing.to_dict() != node.to_dict():
+                raise ValueError(f"Clip {cid} already exists with a different definition.")
+        self._check_acyclic(nodes)
+
+        for cid, node in nodes.items():
+            self.nodes.setdefault(cid, node)
+        return list(nodes)
+
+    def _check_acyclic(self, nodes: dict):
+        """Raises ValueError if nodes (being loaded) depend on themselves, directly or not."""
+        # Nodes already in the graph were checked when added, so a cycle goes through new nodes only
+        done, visiting = set(), set()
+
+        def visit(cid):
+            if cid in done:
+                return
+            if cid in visiting:
+                raise ValueError(f"Clip {cid} depends on itself.")
+            visiting.add(cid)
+            for input_id in nodes[cid].inputs:
+                if input_id in nodes:
+                    visit(input_id)
+            visiting.discard(cid)
+            done.add(cid)
+
+        for cid in nodes:
+            visit(cid)
+
+    def build(self, clip_id: str, resolve=None, preview: bool = False):
+        """Materializes clip_id, replaying whatever resolve() cannot provide."""
+        return BuildScope(self, resolve, preview).get(clip_id)
+
+    @contextmanager
+    def detached(self, clip_id: str, preview: bool = False):
+        """
+        Builds a private instance of clip_id (with its own file readers) and
+        closes everything it opened on exit.
+        """
+        scope = BuildScope(self, preview=preview)
+        try:
+            yield scope.get(clip_id)
+        finally:
+            scope.close()
+
+
+def rebuild_clip(module_name: str, graph_data: dict, clip_id: str):
+    """
+    Rebuilds clip_id in a fresh process from a serialized graph. module_name is
+    the module defining the operations and its CLIP_GRAPH (e.g. the server).
+    """
+    module = importlib.import_module(module_name)
+    module.CLIP_GRAPH.load(graph_data)
+    return module.CLIP_GRAPH.build(clip_id)
@@ -0,0 +1,266 @@
+import os
+import threading
+import time
+import weakref
+from collections import Counter
+
+
+def _nbytes(array) -> int:
+    nbytes = getattr(array, "nbytes", 0)
+    return nbytes if isinstance(nbytes, int) else 0
+
+
+def _process_usage(proc) -> tuple:
+    """Resident bytes of a reader's ffmpeg process (0 where /proc is unavailable) and the pipes held to it."""
+    fds = sum(1 for pipe in (proc.stdin, proc.stdout, proc.stderr) if pipe is not None and not pipe.closed)
+    try:
+        with open(f"/proc/{proc.pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"), fds
+    except (OSError, ValueError, IndexError):
+        return 0, fds
+
+
+def clip_resources(clip) -> tuple:
+    """
+    The file readers and image arrays a clip holds, directly or through its
+    audio, mask and the clips it composes, as two dicts keyed by id so that
+    resources shared by several clips are counted once.
+    """
+    readers, images = {}, {}
+    seen = set()
+    stack = [clip]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        # Instance attributes only: clips never compute these lazily
+        attrs = getattr(obj, "__dict__", None) or {}
+        reader = attrs.get("reader")
+        # Pooled readers (reader_pool.py) stand for all the readers of their source
+        for reader in getattr(reader, "readers", None) or [reader]:
+            if reader is not None and hasattr(reader, "proc"):
+                readers[id(reader)] = reader
+        img = attrs.get("img")
+        if _nbytes(img):
+            images[id(img)] = img
+        stack.extend(sub for sub in (attrs.get("audio"), attrs.get("mask")) if sub is not None)
+        stack.extend(attrs.get("clips") or ())
+    return readers, images
+
+
+class ReaderGuard:
+    """
+    Installed as reader.get_frame of an ffmpeg video or audio reader: records
+    when the reader was last read, keeps it from being closed mid-read, and
+    reopens it at the requested time if it was closed.
+    """
+
+    def __init__(self, reader, memory):
+        self.reader = reader
+        self.memory = memory
+        self.audio = hasattr(reader, "buffer_around")
+        self.last_used = time.monotonic()
+        # Audio readers split long reads into recursive get_frame calls
+        self.lock = threading.RLock()
+        self._get_frame = reader.get_frame
+
+    def __call__(self, t):
+        with self.lock:
+            self.last_used = time.monotonic()
+            if self.reader.proc is None:
+                self.memory.reopened += 1
+                if not self.audio:
+                    # What the reader does itself, without printing to stdout
+                    self.reader.initialize(t)
+                    return self.reader.last_read
+                self._refill(t)
+            return self._get_frame(t)
+
+    def _refill(self, t):
+        """Restarts an audio reader so its buffer covers t (a time or an array of times)."""
+        reader = self.reader
+        first = float(t.min()) if hasattr(t, "min") else float(t)
+        frame = min(max(0, int(reader.fps * first)), reader.n_frames)
+        start = max(0, frame - reader.buffersize // 2)
+        reader.initialize(start / reader.fps)
+        reader.buffer = None
+        reader.buffer_around(frame)
+
+    @property
+    def is_open(self) -> bool:
+        return self.reader.proc is not None
+
+    def usage(self) -> tuple:
+        """Estimated bytes and file descriptors held by the reader."""
+        reader = self.reader
+        if self.audio:
+            nbytes = _nbytes(reader.buffer)
+        else:
+            nbytes = _nbytes(getattr(reader, "last_read", None))
+        proc = reader.proc
+        if proc is None:
+            return nbytes, 0
+        rss, fds = _process_usage(proc)
+        # Popen's read buffer on the pipe
+        return nbytes + rss + (reader.buffersize if self.audio else reader.bufsize), fds
+
+    def release(self) -> bool:
+        """Closes the reader and drops its buffers unless it is being read. Returns whether it was closed."""
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            proc = self.reader.proc
+            if proc is None:
+                return False
+            self.reader.close()
+            # close() leaves the pipes of an ffmpeg that already exited open
+            for pipe in (proc.stdout, proc.stderr):
+                if pipe is not None:
+                    pipe.close()
+            if self.audio:
+                self.reader.buffer = None
+            self.memory.released += 1
+            return True
+        finally:
+            self.lock.release()
+
+
+class ClipMemory:
+    """
+    Accounts for the memory and file descriptors held by registered clips:
+    the ffmpeg processes, pipe buffers and decoded frames of their file
+    readers, and their image arrays. Readers not read for idle_seconds are
+    closed; when admitting a clip would exceed max_bytes, the least recently
+    read readers are closed too. Closed readers reopen transparently on their
+    next read. A max_bytes of 0 disables the budget, an idle_seconds of 0
+    keeps idle readers open.
+    """
+
+    def __init__(self, max_bytes: int = 0, idle_seconds: float = 0):
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.released = 0
+        self.reopened = 0
+        self._guards = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def guard(self, reader) -> ReaderGuard:
+        """The guard of reader, installed on first use."""
+        guard = vars(reader).get("get_frame")
+        if not isinstance(guard, ReaderGuard):
+            guard = ReaderGuard(reader, self)
+            reader.get_frame = guard
+            self._guards.add(guard)
+        return guard
+
+    def track(self, clip):
+        """Guards the readers of clip so they can be closed and reopened. Returns clip."""
+        with self._lock:
+            for reader in clip_resources(clip)[0].values():
+                self.guard(reader)
+        return clip
+
+    def release_idle(self) -> int:
+        """Closes the readers not read for idle_seconds. Returns how many were closed."""
+        if not self.idle_seconds:
+            return 0
+        deadline = time.monotonic() - self.idle_seconds
+        return sum(guard.release() for guard in list(self._guards) if guard.is_open and guard.last_used < deadline)
+
+    def usage(self, clips: dict) -> dict:
+        """
+        Estimated bytes, file descriptors and open readers in total, held by
+        each clip alone, and shared by several clips (the pooled readers of a
+        source, an image and its copies, a clip and the clips made from it).
+        Shared resources are counted once, under "shared", rather than
+        against every clip holding them.
+        """
+        held = {clip_id: clip_resources(clip) for clip_id, clip in list(clips.items())}
+        holders = Counter()
+        for readers, images in held.values():
+            holders.update(readers.keys())
+            holders.update(images.keys())
+        all_readers, all_images, shared_readers, shared_images = {}, {}, {}, {}
+        per_clip = {}
+        with self._lock:
+            for clip_id, (readers, images) in held.items():
+                all_readers.update(readers)
+                all_images.update(images)
+                shared_readers.update((key, reader) for key, reader in readers.items() if holders[key] > 1)
+                shared_images.update((key, img) for key, img in images.items() if holders[key] > 1)
+                per_clip[clip_id] = self._usage(
+                    {key: reader for key, reader in readers.items() if holders[key] == 1},
+                    {key: img for key, img in images.items() if holders[key] == 1},
+                )
+            return {
+                "clips": per_clip,
+                "shared": self._usage(shared_readers, shared_images),
+                **self._usage(all_readers, all_images),
+            }
+
+    def _usage(self, readers: dict, images: dict) -> dict:
+        # Called with the lock held
+        usages = [self.guard(reader).usage() for reader in readers.values()]
+        return {
+            "bytes": sum(u[0] for u in usages) + sum(_nbytes(img) for img in images.values()),
+            "fds": sum(u[1] for u in usages),
+            "open_readers": sum(reader.proc is not None for reader in readers.values()),
+        }
+
+    def total_bytes(self, clips) -> int:
+        """Estimated bytes held by an iterable of clips, shared resources counted once."""
+        readers, images = {}, {}
+        for clip in clips:
+            clip_readers, clip_images = clip_resources(clip)
+            readers.update(clip_readers)
+            images.update(clip_images)
+        with self._lock:
+            reader_bytes = sum(self.guard(reader).usage()[0] for reader in readers.values())
+        return reader_bytes + sum(_nbytes(img) for img in images.values())
+
+    def admit(self, clip, clips: dict, strict: bool = True, max_bytes: int = None):
+        """
+        Tracks clip, about to join clips, and brings the total under max_bytes
+        by closing idle readers, then the least recently read ones. Raises
+        RuntimeError if strict and the clips would still exceed the budget.
+        A max_bytes given here replaces the budget for a subset of the clips
+        (e.g. a session's): only readers of clips and clip are closed for it.
+        """
+        self.track(clip)
+        self.release_idle()
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        if not budget:
+            return clip
+        loaded = [clip, *list(clips.values())]
+        total = self.total_bytes(loaded)
+        if total > budget:
+            if max_bytes is None:
+                guards = list(self._guards)
+            else:
+                readers = {}
+                for loaded_clip in loaded:
+                    readers.update(clip_resources(loaded_clip)[0])
+                with self._lock:
+                    guards = [self.guard(reader) for reader in readers.values()]
+            for guard in sorted((g for g in guards if g.is_open), key=lambda g: g.last_used):
+                held = guard.usage()[0]
+                if guard.release():
+                    total -= held - guard.usage()[0]
+                    if total <= budget:
+                        break
+        if strict and total > budget:
+            raise RuntimeError(
+                f"Clip memory budget ({budget} bytes) exceeded: loaded clips would use {total} bytes. "
+                "Delete some clips first."
+            )
+        return clip
+
+    def stats(self, clips: dict) -> dict:
+        return {
+            **self.usage(clips),
+            "max_bytes": self.max_bytes,
+            "idle_seconds": self.idle_seconds,
+            "readers_closed": self.released,
+            "readers_reopened": self.reopened,
+        }
@@ -10,4 +10,40 @@ except ImportError:
 
 # Configuration Constants
 MAX_CLIPS = int(os.environ.get("MAX_CLIPS", 100))
+RECENT_CLIPS = int(os.environ.get("RECENT_CLIPS", 20))
+CLIP_MEMORY_MAX_BYTES = int(os.environ.get("CLIP_MEMORY_MAX_BYTES", 2 * 1024**3))
+CLIP_IDLE_SECONDS = float(os.environ.get("CLIP_IDLE_SECONDS", 60))
+MAX_READER_PROCESSES = int(os.environ.get("MAX_READER_PROCESSES", 32))
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_BYTES", 1024**3))
+SESSION_MAX_RENDERS = int(os.environ.get("SESSION_MAX_RENDERS", 2))
+SESSION_MAX_CPU_SECONDS = float(os.environ.get("SESSION_MAX_CPU_SECONDS", 0))
+SESSION_CPU_WINDOW_SECONDS = float(os.environ.get("SESSION_CPU_WINDOW_SECONDS", 3600))
+SESSION_IDLE_SECONDS = float(os.environ.get("SESSION_IDLE_SECONDS", 3600))
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", 100))
+MAX_TOTAL_CLIPS = int(os.environ.get("MAX_TOTAL_CLIPS", 1000))
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "")
+HEAVY_TOOL_WORKERS = int(os.environ.get("HEAVY_TOOL_WORKERS", 2))
 OUTPUT_DIR = Path(os.environ.get("OUTPUT_DIR", Path.cwd() / "output"))
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", 2))
+RENDER_JOB_TTL_SECONDS = float(os.environ.get("RENDER_JOB_TTL_SECONDS", 3600))
+MAX_FINISHED_RENDER_JOBS = int(os.environ.get("MAX_FINISHED_RENDER_JOBS", 100))
+RENDER_PROCESSES = int(os.environ.get("RENDER_PROCESSES", os.cpu_count() or 1))
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", os.cpu_count() or 1))
+ANALYSIS_DIR = Path(os.environ.get("ANALYSIS_DIR", OUTPUT_DIR / ".analysis"))
+ANALYSIS_STORE_MAX_BYTES = int(os.environ.get("ANALYSIS_STORE_MAX_BYTES", 256 * 1024**2))
+RENDER_CACHE_DIR = Path(os.environ.get("RENDER_CACHE_DIR", OUTPUT_DIR / ".render_cache"))
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", 2 * 1024**3))
+FRAME_CACHE_MAX_BYTES = int(os.environ.get("FRAME_CACHE_MAX_BYTES", 0))
+WARP_CACHE_MAX_BYTES = int(os.environ.get("WARP_CACHE_MAX_BYTES", 256 * 1024**2))
+PROXY_DIR = Path(os.environ.get("PROXY_DIR", OUTPUT_DIR / ".proxies"))
+PROXY_HEIGHT = int(os.environ.get("PROXY_HEIGHT", 540))
+PROXY_MAX_BYTES = int(os.environ.get("PROXY_MAX_BYTES", 4 * 1024**3))
+PREVIEW_DIR = Path(os.environ.get("PREVIEW_DIR", OUTPUT_DIR / ".previews"))
+PREVIEW_CACHE_MAX_BYTES = int(os.environ.get("PREVIEW_CACHE_MAX_BYTES", 512 * 1024**2))
+PREVIEW_HEIGHT = int(os.environ.get("PREVIEW_HEIGHT", 360))
+PREVIEW_FPS = float(os.environ.get("PREVIEW_FPS", 15))
+PREVIEW_SEGMENT_SECONDS = float(os.environ.get("PREVIEW_SEGMENT_SECONDS", 2))
+THUMBNAIL_DIR = Path(os.environ.get("THUMBNAIL_DIR", OUTPUT_DIR / ".thumbnails"))
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get("THUMBNAIL_CACHE_MAX_BYTES", 128 * 1024**2))
+THUMBNAIL_HEIGHT = int(os.environ.get("THUMBNAIL_HEIGHT", 90))
+THUMBNAIL_WORKERS = int(os.environ.get("THUMBNAIL_WORKERS", 4))
@@ -1,9 +1,38 @@
-from .quad_mirror import QuadMirror
-from .chroma_key import ChromaKey
-from .rgb_sync import RGBSync
-from .kaleidoscope import Kaleidoscope
-from .matrix import Matrix
-from .auto_framing import AutoFraming
-from .clone_grid import CloneGrid
-from .rotating_cube import RotatingCube
-from .kaleidoscope_cube import KaleidoscopeCube
+import importlib
+
+# Registry of the package's names: each module (and OpenCV, PIL, MoviePy
+# with it) is only imported when one of its names is first used
+_EXPORTS = {
+    "QuadMirror": "quad_mirror",
+    "ChromaKey": "chroma_key",
+    "RGBSync": "rgb_sync",
+    "Kaleidoscope": "kaleidoscope",
+    "Matrix": "matrix",
+    "AutoFraming": "auto_framing",
+    "CloneGrid": "clone_grid",
+    "RotatingCube": "rotating_cube",
+    "KaleidoscopeCube": "kaleidoscope_cube",
+    "FusedEffect": "effect_chain",
+    "apply_fused": "effect_chain",
+    "compile_effects": "effect_chain",
+    "Animation": "animation",
+    "AnimatedEffect": "animation",
+    "WARP_CACHE": "warp_cache",
+    "WarpCache": "warp_cache",
+    "WarpMap": "warp",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,179 @@
+import ast
+import threading
+
+from moviepy import AudioClip, Effect
+import numpy as np
+
+# Names an expression may use besides t
+CONSTANTS = {"pi": np.pi, "e": np.e}
+
+
+class Animation:
+    """
+    A numeric effect parameter as a function of time, from a time
+    expression or a keyframe list. It is compiled once and evaluated on
+    arrays of times; prepare() evaluates it over all the frame times of a
+    clip ahead of rendering, after which the value at a frame time is an
+    index into that table.
+    """
+
+    def __init__(self, sample, source):
+        self._sample = sample
+        self.source = source
+        # (fps, values at i / fps), replaced as a whole: copies of an effect
+        # share their Animation, and clips applying it may prepare it concurrently
+        self._table = None
+
+    @classmethod
+    def expression(cls, code: str) -> "Animation":
+        """
+        An animation evaluating code, a numexpr expression of t (which must
+        have been validated: it is compiled as is).
+        """
+        import numexpr
+
+        names = {node.id for node in ast.walk(ast.parse(code, mode="eval")) if isinstance(node, ast.Name)}
+        inputs = sorted(names & ({"t"} | set(CONSTANTS)))
+        program = numexpr.NumExpr(code, signature=[(name, np.float64) for name in inputs])
+        # Compiled programs are not safe to run from several threads at once
+        lock = threading.Lock()
+
+        def sample(ts):
+            args = [ts if name == "t" else CONSTANTS[name] for name in inputs]
+            with lock:
+                values = program(*args)
+            return np.broadcast_to(np.asarray(values, dtype=np.float64), ts.shape)
+
+        return cls(sample, code)
+
+    @classmethod
+    def keyframes(cls, keyframes) -> "Animation":
+        """
+        An animation interpolating linearly between keyframes, [time, value]
+        pairs in time order. Values hold before the first and after the last.
+        """
+        try:
+            table = np.array(keyframes, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Keyframes must be a list of [time, value] pairs")
+        if table.ndim != 2 or table.shape[1] != 2 or not len(table):
+            raise ValueError("Keyframes must be a list of [time, value] pairs")
+        if not np.isfinite(table).all():
+            raise ValueError("Keyframe times and values must be finite numbers")
+        if (np.diff(table[:, 0]) < 0).any():
+            raise ValueError("Keyframe times must be in increasing order")
+        times, values = table[:, 0], table[:, 1]
+        return cls(lambda ts: np.interp(ts, times, values), table.tolist())
+
+    def sample(self, ts) -> np.ndarray:
+        """The values at the times ts, as an array of the same shape."""
+        return self._sample(np.asarray(ts, dtype=np.float64))
+
+    def prepare(self, fps: float, duration: float):
+        """Evaluates the animation at every frame time i / fps of a clip of the given duration."""
+        n_values = int(duration * fps) + 1
+        table = self._table
+        if table is not None and table[0] == fps and len(table[1]) >= n_values:
+            return
+        self._table = (fps, self.sample(np.arange(n_values) / fps))
+
+    def __call__(self, t):
+        if np.ndim(t):
+            return self.sample(t)
+        table = self._table
+        if table is not None:
+            fps, values = table
+            index = round(t * fps)
+            if abs(index - t * fps) < 1e-6 and 0 <= index < len(values):
+                return float(values[index])
+        return float(self.sample([t])[0])
+
+    def __repr__(self):
+        return f"Animation({self.source!r})"
+
+
+class _FrameValues(threading.local):
+    """Values of the animated attributes for the frame each thread is computing."""
+
+    def __init__(self, values: dict):
+        self.values = dict(values)
+
+
+def _animated_class(cls, names):
+    """
+    Subclass of the effect class cls whose attributes names read (and write)
+    the values of the frame being computed by the calling thread.
+    """
+    def attribute(name):
+        def get(self):
+            return self._frame_values.values[name]
+
+        def set(self, value):
+            self._frame_values.values[name] = value
+
+        return property(get, set)
+
+    return type(cls.__name__, (cls,), {name: attribute(name) for name in names})
+
+
+def _value(animation, t):
+    value = animation(t)
+    return value[:, None] if np.ndim(value) else value
+
+
+class AnimatedEffect(Effect):
+    """
+    Applies effect with its Animation attributes animated. Each frame is
+    computed with the attributes at their values at its time, which works
+    for effects that read their parameters per frame rather than in
+    apply(). The values are kept per thread, so frames are computed
+    concurrently without locking. Attributes named in native are functions
+    of time the effect calls itself (e.g. HeadBlur positions, Resize
+    scale): they are left in place and only prepared. Audio frames are
+    computed for arrays of times, so the attributes are then a column of
+    values.
+    """
+
+    def __init__(self, effect, native: tuple = ()):
+        self.effect = effect
+        self.native = tuple(native)
+
+    def apply(self, clip):
+        effect = self.effect.copy()
+        animations = {name: value for name, value in vars(effect).items() if isinstance(value, Animation)}
+        fps = getattr(clip, "fps", None)
+        # Audio is not rendered frame by frame: a table per sample would not be looked up
+        if fps and clip.duration is not None and not isinstance(clip, AudioClip):
+            for animation in animations.values():
+                animation.prepare(fps, clip.duration)
+        animated = {name: animation for name, animation in animations.items() if name not in self.native}
+        if not animated:
+            return effect.apply(clip)
+
+        # apply() sees the values at t=0, like threads that have not computed a frame yet
+        frame_values = _FrameValues({name: _value(animation, 0) for name, animation in animated.items()})
+        effect.__class__ = _animated_class(type(effect), animated)
+        effect._frame_values = frame_values
+        # Maps of geometry that changes every frame would only evict static ones from the warp cache
+        if hasattr(effect, "cache_maps"):
+            effect.cache_maps = False
+
+        def animate(frame_function):
+            def animated_frame_function(t):
+                # Restored afterwards: computing this frame may need frames of the same clip at other times
+                previous = frame_values.values
+                frame_values.values = {name: _value(animation, t) for name, animation in animated.items()}
+                try:
+                    return frame_function(t)
+                finally:
+                    frame_values.values = previous
+            return animated_frame_function
+
+        # Copied so that an effect returning its input does not change it
+        result = effect.apply(clip).copy()
+        result.frame_function = animate(result.frame_function)
+        # A mask the effect derived from the clip's mask reads the same parameters
+        mask = getattr(result, "mask", None)
+        if mask is not None and mask is not getattr(clip, "mask", None):
+            mask.frame_function = animate(mask.frame_function)
+        return result
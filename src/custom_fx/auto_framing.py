@@ -1,93 +1,239 @@
+import threading
+
 from moviepy import Effect
 import numpy as np
 import cv2
 
+
+def smooth_track(values, smoothing: float):
+    """
+    Zero-phase exponential smoothing: an EMA run forwards then backwards,
+    so the smoothed path does not lag behind the subject.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values) or smoothing <= 0:
+        return values.copy()
+    out = values.copy()
+    for i in range(1, len(out)):
+        out[i] = out[i - 1] * smoothing + out[i] * (1 - smoothing)
+    for i in range(len(out) - 2, -1, -1):
+        out[i] = out[i + 1] * smoothing + out[i] * (1 - smoothing)
+    return out
+
+
+def fill_gaps(values, default: float):
+    """Replaces NaNs by interpolating between known values, holding the first and last."""
+    values = np.asarray(values, dtype=np.float64)
+    known = ~np.isnan(values)
+    if not known.any():
+        return np.full(len(values), float(default))
+    index = np.arange(len(values))
+    return np.interp(index, index[known], values[known])
+
+
+def _once(compute):
+    """A function returning compute()'s result, computed on the first call only, thread-safely."""
+    result = []
+    lock = threading.Lock()
+
+    def get():
+        with lock:
+            if not result:
+                result.append(compute())
+        return result[0]
+
+    return get
+
+
+class CropTrack:
+    """
+    Per-frame crop windows of a clip, sampled at fps: crop i covers
+    x[i]:x[i] + crop_w, y[i]:y[i] + crop_h of the frame shown at t = i / fps.
+    """
+
+    def __init__(self, fps, x, y, crop_w: int, crop_h: int):
+        self.fps = fps
+        self.x = np.asarray(x, dtype=np.int64)
+        self.y = np.asarray(y, dtype=np.int64)
+        self.crop_w = crop_w
+        self.crop_h = crop_h
+
+    def __len__(self):
+        return len(self.x)
+
+    def window(self, t):
+        """(x1, y1, x2, y2) of the crop at time t."""
+        i = min(len(self.x) - 1, max(0, int(round(t * self.fps))))
+        x1, y1 = int(self.x[i]), int(self.y[i])
+        return x1, y1, x1 + self.crop_w, y1 + self.crop_h
+
+
 class AutoFraming(Effect):
     """
     Automatically crops and centers the frame on a detected face or a specified focus point.
     Ideal for converting horizontal video to vertical while keeping the subject in frame.
+
+    Works in two passes. The first frame requested triggers an analysis of the
+    whole clip: the subject is detected at reduced resolution every
+    detect_every frames, followed with optical flow in between, and the
+    trajectory is smoothed offline into a CropTrack. Rendering then only
+    looks up the crop for t, so frames can be requested in any order or in
+    parallel.
     """
-    def __init__(self, target_aspect_ratio: float = 9/16, smoothing: float = 0.9, 
-                 focus_func=None):
+    def __init__(self, target_aspect_ratio: float = 9/16, smoothing: float = 0.9,
+                 focus_func=None, detect_every: int = 5, analysis_height: int = 360,
+                 analysis_cache=None):
         """
         Args:
             target_aspect_ratio (float): The aspect ratio of the output (width/height).
             smoothing (float): Smoothing factor (0 to 1). Higher = smoother movement.
-            focus_func (callable): Optional function taking (frame, t) and returning (x, y) 
+            focus_func (callable): Optional function taking (frame, t) and returning (x, y)
                                  or None. If it returns None, face detection is used.
+            detect_every (int): Run detection on every Nth frame and track the subject in between.
+            analysis_height (int): Height frames are downscaled to for detection and tracking.
+            analysis_cache (callable): Optional function taking (kind, params, compute) and
+                                 returning compute()'s result, e.g. from a persistent store.
+                                 Not used with focus_func, whose results cannot be keyed.
         """
+        if detect_every < 1:
+            raise ValueError("detect_every must be at least 1")
         self.target_aspect_ratio = target_aspect_ratio
         self.smoothing = smoothing
         self.focus_func = focus_func
-        
+        self.detect_every = detect_every
+        self.analysis_height = analysis_height
+        self.analysis_cache = analysis_cache
+
         # Load the face cascade
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        # State for smoothing
-        self.current_x = None
-        self.current_y = None
 
-    def apply(self, clip):
-        def process_frame(get_frame, t):
-            frame = get_frame(t)
-            h, w = frame.shape[:2]
-            
-            target_x, target_y = None, None
-            
-            # 1. Try custom focus function
-            if self.focus_func:
-                try:
-                    res = self.focus_func(frame, t)
-                    if res and len(res) == 2:
-                        target_x, target_y = res
-                except Exception:
-                    pass
-            
-            # 2. Try face detection if no target yet
-            if target_x is None:
-                gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
-                faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-                
-                if len(faces) > 0:
-                    # Select the largest face as the main subject
-                    fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
-                    target_x = fx + fw / 2
-                    target_y = fy + fh / 2
+    def crop_size(self, w, h):
+        """Width and height of the crop box for a w x h frame."""
+        if w / h > self.target_aspect_ratio:
+            # Source is wider than target (e.g. 16:9 -> 9:16)
+            return int(h * self.target_aspect_ratio), h
+        # Source is taller than target (e.g. 4:3 -> 1:1)
+        return w, int(w / self.target_aspect_ratio)
+
+    def _detect(self, frame, gray, scale, t):
+        """Subject centre in analysis coordinates, or None."""
+        # 1. Try custom focus function
+        if self.focus_func:
+            try:
+                res = self.focus_func(frame, t)
+                if res and len(res) == 2:
+                    return res[0] * scale, res[1] * scale
+            except Exception:
+                pass
+
+        # 2. Try face detection (skipped if OpenCV ships without the cascade)
+        if self.face_cascade.empty():
+            return None
+        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        if len(faces) > 0:
+            # Select the largest face as the main subject
+            fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+            return fx + fw / 2, fy + fh / 2
+        return None
+
+    def _features(self, gray, center):
+        """Corners to track around the subject centre."""
+        gh, gw = gray.shape
+        radius = max(8, gh // 8)
+        mask = np.zeros_like(gray)
+        cx, cy = int(center[0]), int(center[1])
+        mask[max(0, cy - radius):min(gh, cy + radius), max(0, cx - radius):min(gw, cx + radius)] = 255
+        return cv2.goodFeaturesToTrack(gray, 50, 0.01, 3, mask=mask)
+
+    def track_subject(self, clip) -> dict:
+        """
+        First pass: the subject centre on every frame of clip, in pixels, NaN
+        where it was not found. Returns {"fps", "size": [w, h], "x", "y"}.
+        """
+        fps = clip.fps or 25
+        if self.analysis_cache is None or self.focus_func is not None:
+            return self._track_subject(clip, fps)
+        params = {"fps": fps, "detect_every": self.detect_every, "analysis_height": self.analysis_height}
+        return self.analysis_cache("subject_track", params, lambda: self._track_subject(clip, fps))
+
+    def _track_subject(self, clip, fps) -> dict:
+        xs, ys = [], []
+        prev_gray, points, center = None, None, None
+        w = h = scale = None
+        for i, frame in enumerate(clip.iter_frames(fps=fps, dtype="uint8")):
+            if scale is None:
+                h, w = frame.shape[:2]
+                scale = min(1.0, self.analysis_height / h) if self.analysis_height else 1.0
+                size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+            if scale < 1:
+                gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+            detected = self._detect(frame, gray, scale, i / fps) if i % self.detect_every == 0 else None
+            if detected is not None:
+                center = detected
+                points = self._features(gray, center)
+            elif points is not None and len(points):
+                # Follow the subject with the median motion of its corners
+                moved, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None)
+                good = status.ravel() == 1
+                if good.any():
+                    shift = np.median(moved[good] - points[good], axis=0).ravel()
+                    center = (center[0] + float(shift[0]), center[1] + float(shift[1]))
+                    points = moved[good].reshape(-1, 1, 2)
                 else:
-                    # Fallback to center or last known position
-                    target_x = self.current_x if self.current_x is not None else w / 2
-                    target_y = self.current_y if self.current_y is not None else h / 2
-
-            # 3. Apply Smoothing (Exponential Moving Average)
-            if self.current_x is None:
-                self.current_x = target_x
-                self.current_y = target_y
-            else:
-                self.current_x = self.current_x * self.smoothing + target_x * (1 - self.smoothing)
-                self.current_y = self.current_y * self.smoothing + target_y * (1 - self.smoothing)
-
-            # 4. Calculate Crop Box
-            # Determine dimensions based on target aspect ratio
-            if w / h > self.target_aspect_ratio:
-                # Source is wider than target (e.g. 16:9 -> 9:16)
-                crop_h = h
-                crop_w = h * self.target_aspect_ratio
+                    points, center = None, None
             else:
-                # Source is taller than target (e.g. 4:3 -> 1:1)
-                crop_w = w
-                crop_h = w / self.target_aspect_ratio
-
-            # Initial bounds based on smoothed center
-            x1 = int(self.current_x - crop_w / 2)
-            y1 = int(self.current_y - crop_h / 2)
-            
-            # Clamp bounds to ensure the crop box stays within the original frame
-            x1 = max(0, min(w - int(crop_w), x1))
-            y1 = max(0, min(h - int(crop_h), y1))
-            x2 = x1 + int(crop_w)
-            y2 = y1 + int(crop_h)
-
-            # Crop the frame
-            return frame[y1:y2, x1:x2]
+                center = None
+
+            xs.append(np.nan if center is None else center[0] / scale)
+            ys.append(np.nan if center is None else center[1] / scale)
+            prev_gray = gray
+
+        if w is None:
+            raise ValueError("AutoFraming needs a clip with at least one frame")
+        return {"fps": fps, "size": [w, h], "x": np.array(xs), "y": np.array(ys)}
+
+    def subject_path(self, clip):
+        """fps, frame size and the gap-filled, smoothed subject centre (x, y arrays) on every frame of clip."""
+        track = self.track_subject(clip)
+        w, h = track["size"]
+
+        # Missing positions are interpolated, then the whole path is smoothed
+        cx = smooth_track(fill_gaps(track["x"], w / 2), self.smoothing)
+        cy = smooth_track(fill_gaps(track["y"], h / 2), self.smoothing)
+        return track["fps"], (w, h), cx, cy
+
+    def analyze(self, clip) -> CropTrack:
+        """The crop window of every frame of clip."""
+        fps, (w, h), cx, cy = self.subject_path(clip)
+        crop_w, crop_h = self.crop_size(w, h)
+        # Clamp bounds to ensure the crop box stays within the original frame
+        x = np.clip((cx - crop_w / 2).astype(np.int64), 0, w - crop_w)
+        y = np.clip((cy - crop_h / 2).astype(np.int64), 0, h - crop_h)
+        return CropTrack(fps, x, y, crop_w, crop_h)
+
+    def follow(self, clip):
+        """
+        fx(t), fy(t) following the subject of clip (e.g. for HeadBlur). The
+        clip is analysed on the first call, not when follow is called.
+        """
+        get_path = _once(lambda: self.subject_path(clip))
+
+        def position(axis):
+            def at(t):
+                fps, _, cx, cy = get_path()
+                i = min(len(cx) - 1, max(0, int(round(t * fps))))
+                return float((cx, cy)[axis][i])
+            return at
+
+        return position(0), position(1)
+
+    def apply(self, clip):
+        get_track = _once(lambda: self.analyze(clip))
+
+        def process_frame(get_frame, t):
+            x1, y1, x2, y2 = get_track().window(t)
+            return get_frame(t)[y1:y2, x1:x2]
 
         return clip.transform(process_frame)
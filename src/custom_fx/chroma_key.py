@@ -1,11 +1,81 @@
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
 from moviepy import Effect
 import numpy as np
+import cv2
+
+KEY_SPACES = ("rgb", "yuv", "hsv")
+
+
+def _key_coordinates(rgb, space):
+    """Coordinates of float32 RGB colours (n, 3) in which key distances are measured, in 0-255 units."""
+    if space == "rgb":
+        return rgb
+    if space == "yuv":
+        # Chroma plane only, so shadows and highlights of the screen key alike
+        return cv2.cvtColor(rgb[None], cv2.COLOR_RGB2YCrCb)[0, :, 1:]
+    if space == "hsv":
+        # The HSV cone: hue as an angle, chroma (max - min) as the radius, value as the height
+        hsv = cv2.cvtColor(rgb[None], cv2.COLOR_RGB2HSV)[0]
+        angle = np.deg2rad(hsv[:, 0])
+        chroma = hsv[:, 1] * hsv[:, 2]
+        return np.stack([chroma * np.cos(angle), chroma * np.sin(angle), hsv[:, 2]], axis=1)
+    raise ValueError(f"Unknown key space '{space}'. Use one of {', '.join(KEY_SPACES)}.")
+
+
+@functools.lru_cache(maxsize=4)
+def key_lut(color, threshold: float, softness: float, space: str = "rgb"):
+    """
+    Alpha (uint8, 0 transparent to 255 opaque) of every 8-bit RGB colour,
+    laid out [B, G, R] so that a pixel's index is R + 256 * G + 65536 * B.
+    16 MiB per table; the few most recently used are kept.
+    """
+    key = _key_coordinates(np.array([color], np.float32), space)[0]
+    levels = np.arange(256, dtype=np.float32)
+    r, g = np.meshgrid(levels, levels)  # g varies along axis 0, r along axis 1
+    rgb = np.empty((256 * 256, 3), np.float32)
+    rgb[:, 0] = r.ravel()
+    rgb[:, 1] = g.ravel()
+    lut = np.empty((256, 256, 256), np.uint8)
+    for b in range(256):
+        rgb[:, 2] = b
+        diff = _key_coordinates(rgb, space) - key
+        dist = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        if softness > 0:
+            alpha = np.clip((dist - threshold) / softness, 0, 1)
+        else:
+            alpha = (dist > threshold).astype(np.float32)
+        lut[b] = np.rint(alpha * 255).reshape(256, 256)
+    lut.flags.writeable = False
+    return lut
+
+
+def lut_index(frame):
+    """Index of each pixel of a uint8 RGB frame into a key_lut table, as uint32."""
+    if sys.byteorder == "little":
+        # Padding to RGBA and reading each pixel as one integer gives R + G << 8 + B << 16 + A << 24
+        index = cv2.cvtColor(frame, cv2.COLOR_RGB2RGBA).view(np.uint32)[..., 0]
+        index &= 0xFFFFFF
+        return index
+    index = frame[..., 2].astype(np.uint32) << 16
+    index |= frame[..., 1].astype(np.uint32) << 8
+    index |= frame[..., 0]
+    return index
+
 
 class ChromaKey(Effect):
     """
     An advanced Chroma Key effect that creates a mask for transparency
     based on the distance from a target color.
-    
+
+    The distance-to-alpha curve is precomputed for every 8-bit colour
+    (key_lut), so keying a frame is a single table lookup per pixel. Colour
+    and mask come from the same decoded frame: the alpha computed while
+    producing the colour frame at t is reused by the mask at t.
+
     Parameters:
     -----------
     color : tuple (R, G, B)
@@ -14,38 +84,69 @@ class ChromaKey(Effect):
         The distance threshold below which pixels are fully transparent.
     softness : float
         The range over which pixels transition from transparent to opaque.
+    space : str
+        Where distances are measured: "rgb" (Euclidean RGB distance), "yuv"
+        (chroma only, ignoring luma) or "hsv" (the HSV colour cone).
+    spill : float
+        Spill suppression strength (0 to 1): pulls the key's dominant channel
+        down towards the other two, removing the screen's colour cast.
     """
-    def __init__(self, color=(0, 255, 0), threshold=50, softness=20):
+    def __init__(self, color=(0, 255, 0), threshold=50, softness=20, space="rgb", spill=0.0):
+        if space not in KEY_SPACES:
+            raise ValueError(f"Unknown key space '{space}'. Use one of {', '.join(KEY_SPACES)}.")
+        if not 0 <= spill <= 1:
+            raise ValueError("spill must be between 0 and 1")
         self.color = np.array(color)
         self.threshold = threshold
         self.softness = softness
+        self.space = space
+        self.spill = spill
+
+    def alpha(self, frame):
+        """uint8 alpha of an RGB frame."""
+        frame = np.ascontiguousarray(frame[..., :3], dtype=np.uint8)
+        lut = key_lut(tuple(int(c) for c in self.color), float(self.threshold), float(self.softness), self.space)
+        return np.take(lut, lut_index(frame))
+
+    def suppress_spill(self, frame):
+        """frame with the key's dominant channel limited by the brightest other channel, by spill."""
+        channels = list(cv2.split(np.ascontiguousarray(frame[..., :3], dtype=np.uint8)))
+        dominant = int(np.argmax(self.color))
+        others = [c for i, c in enumerate(channels) if i != dominant]
+        excess = cv2.subtract(channels[dominant], cv2.max(others[0], others[1]))
+        channels[dominant] = cv2.addWeighted(channels[dominant], 1, excess, -self.spill, 0)
+        return cv2.merge(channels)
 
     def apply(self, clip):
-        def process_frame(image):
-            # Calculate Euclidean distance to target color
-            # Use float32 to avoid overflow during squaring
-            dist = np.sqrt(np.sum((image.astype('float32') - self.color)**2, axis=-1))
-            
-            # Create a smooth mask
-            # 0.0 is transparent, 1.0 is opaque
-            if self.softness > 0:
-                mask = np.clip((dist - self.threshold) / self.softness, 0, 1)
-            else:
-                mask = (dist > self.threshold).astype('float32')
-            
-            # MoviePy masks are usually 2D arrays of floats [0, 1]
-            # If the clip already has a mask, we should combine them
-            if clip.mask is not None:
-                old_mask = clip.mask.get_frame(0) # Simplified for image_transform context
-                # Note: combining with existing mask is tricky in image_transform
-                # Usually better to set the mask explicitly
-                pass
+        # Alphas of the latest colour frames, for the mask of the same timestamp
+        alphas = OrderedDict()
+        lock = threading.Lock()
 
+        def color_frame(get_frame, t):
+            frame = get_frame(t)
+            alpha = self.alpha(frame)
+            with lock:
+                alphas[t] = alpha
+                alphas.move_to_end(t)
+                while len(alphas) > 8:
+                    alphas.popitem(last=False)
+            return self.suppress_spill(frame) if self.spill else frame
+
+        def mask_frame(get_frame, t):
+            with lock:
+                alpha = alphas.get(t)
+            if alpha is None:
+                # The colour frame was not just rendered (e.g. it came from a cache)
+                alpha = self.alpha(get_frame(t))
+            mask = np.multiply(alpha, np.float32(1 / 255), dtype=np.float32)
+            # Combine with the clip's own transparency
+            if clip.mask is not None:
+                mask *= clip.mask.get_frame(t)
             return mask
 
-        # In MoviePy, we apply the mask to the clip
-        mask_clip = clip.image_transform(process_frame)
-        return clip.with_mask(mask_clip)
+        mask_clip = clip.transform(mask_frame).with_mask(None).without_audio()
+        mask_clip.is_mask = True
+        return clip.transform(color_frame).with_mask(mask_clip)
 
 # Usage Example:
 # clip = VideoFileClip("greenscreen.mp4")
@@ -0,0 +1,273 @@
+import functools
+import weakref
+
+from moviepy import Effect, VideoClip, vfx
+import numpy as np
+import cv2
+
+from .clone_grid import CloneGrid
+from .kaleidoscope import Kaleidoscope
+from .quad_mirror import QuadMirror
+from .warp import WARP_CACHE, WarpMap
+
+# Effects that only move pixels: each output pixel is one input pixel (or an interpolation of neighbours)
+GEOMETRIC_EFFECTS = (QuadMirror, Kaleidoscope, CloneGrid, vfx.MirrorX, vfx.MirrorY, vfx.Crop)
+# Effects that map each pixel's colour on its own, the same way for every channel (BlackAndWhite mixes them)
+COLOR_EFFECTS = (vfx.InvertColors, vfx.MultiplyColor, vfx.GammaCorrection, vfx.LumContrast, vfx.BlackAndWhite)
+
+
+def is_fusible(effect) -> bool:
+    """Whether effect can be compiled into a FusedEffect."""
+    return isinstance(effect, GEOMETRIC_EFFECTS + COLOR_EFFECTS + (FusedEffect,))
+
+
+def _signature(effect):
+    """Hashable description of an effect's parameters, for cache keys."""
+    return type(effect).__name__, tuple(sorted((name, repr(value)) for name, value in vars(effect).items()))
+
+
+def _index_map(xs, ys) -> WarpMap:
+    """Map sampling column xs[i] and row ys[j] at output pixel (i, j)."""
+    return WarpMap(np.broadcast_to(xs, (len(ys), len(xs))), np.broadcast_to(ys[:, None], (len(ys), len(xs))))
+
+
+def _crop_slices(effect, w: int, h: int):
+    """The slices vfx.Crop cuts out of a w x h frame, resolved as Crop.apply does without modifying effect."""
+    x1, y1, x2, y2 = effect.x1, effect.y1, effect.x2, effect.y2
+    if effect.width and x1 is not None:
+        x2 = x1 + effect.width
+    elif effect.width and x2 is not None:
+        x1 = x2 - effect.width
+    if effect.height and y1 is not None:
+        y2 = y1 + effect.height
+    elif effect.height and y2 is not None:
+        y1 = y2 - effect.height
+    if effect.x_center:
+        x1, x2 = effect.x_center - effect.width / 2, effect.x_center + effect.width / 2
+    if effect.y_center:
+        y1, y2 = effect.y_center - effect.height / 2, effect.y_center + effect.height / 2
+    return slice(int(x1 or 0), int(x2 or w)), slice(int(y1 or 0), int(y2 or h))
+
+
+def _effect_map(effect, w: int, h: int):
+    """The map of a geometric effect (other than CloneGrid) on a w x h frame, and its output size."""
+    if isinstance(effect, (QuadMirror, Kaleidoscope)):
+        return effect.warp_map(w, h), w, h
+    xs = np.arange(w, dtype=np.float32)
+    ys = np.arange(h, dtype=np.float32)
+    if isinstance(effect, vfx.MirrorX):
+        xs = xs[::-1]
+    elif isinstance(effect, vfx.MirrorY):
+        ys = ys[::-1]
+    elif isinstance(effect, vfx.Crop):
+        x_slice, y_slice = _crop_slices(effect, w, h)
+        xs, ys = xs[x_slice], ys[y_slice]
+    return _index_map(xs, ys), len(xs), len(ys)
+
+
+def _clone_grid_map(effect, w: int, h: int):
+    """
+    The size clones are downscaled to, and the map tiling such a clone over
+    a w x h frame (resized back to w x h by nearest pixel, as CloneGrid does).
+    """
+    clone_w, clone_h = w // effect.cols, h // effect.rows
+    grid_w, grid_h = clone_w * effect.cols, clone_h * effect.rows
+    xs = np.minimum(np.floor(np.arange(w) * (grid_w / w)), grid_w - 1) % clone_w
+    ys = np.minimum(np.floor(np.arange(h) * (grid_h / h)), grid_h - 1) % clone_h
+    return (clone_w, clone_h), _index_map(xs.astype(np.float32), ys.astype(np.float32))
+
+
+def compose(first: WarpMap, then: WarpMap) -> WarpMap:
+    """
+    The map sampling through first, then through then: then's coordinates
+    are points of first's output. Whole-pixel maps compose exactly.
+    """
+    if then.integral:
+        iy = np.clip(then.map_y.astype(np.intp), 0, first.shape[0] - 1)
+        ix = np.clip(then.map_x.astype(np.intp), 0, first.shape[1] - 1)
+        return WarpMap(first.map_x[iy, ix], first.map_y[iy, ix])
+    linear = [
+        cv2.remap(m, then.map_x, then.map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        for m in (first.map_x, first.map_y)
+    ]
+    nearest = compose(first, WarpMap(np.rint(then.map_x), np.rint(then.map_y)))
+    # Across a fold or tile edge of first, interpolated coordinates land between unrelated pixels
+    seam = (np.abs(linear[0] - nearest.map_x) > 1) | (np.abs(linear[1] - nearest.map_y) > 1)
+    for coordinates, fallback in zip(linear, (nearest.map_x, nearest.map_y)):
+        coordinates[seam] = fallback[seam]
+    return WarpMap(*linear)
+
+
+class ResamplePlan:
+    """
+    A run of geometric effects on a given frame size, compiled to as few
+    resampling steps as possible: one WarpMap, preceded by an area downscale
+    and another map for each CloneGrid (whose clones are averaged, not
+    sampled).
+    """
+
+    def __init__(self, effects, w: int, h: int):
+        self.steps = []
+        # Map from the current effect's output to the last step's output; None for the identity
+        composite = None
+        for effect in effects:
+            if isinstance(effect, CloneGrid):
+                if composite is not None:
+                    self.steps.append(composite)
+                clone_size, composite = _clone_grid_map(effect, w, h)
+                self.steps.append(clone_size)
+                continue
+            warp, w, h = _effect_map(effect, w, h)
+            composite = warp if composite is None else compose(composite, warp)
+        if composite is not None:
+            self.steps.append(composite)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(step.nbytes for step in self.steps if isinstance(step, WarpMap))
+
+    def apply(self, frame):
+        """The resampled frame, a new array (frame itself if there is nothing to do)."""
+        for step in self.steps:
+            if isinstance(step, WarpMap):
+                frame = step.apply(frame)
+            else:
+                frame = cv2.resize(frame, step, interpolation=cv2.INTER_AREA)
+        return frame
+
+
+def _apply_to_table(effect, table):
+    """The 256-entry table effect(table[v]): effect applied to a one-row frame of the table's levels."""
+    levels = np.dstack([table] * 3)
+    clip = VideoClip(lambda t: levels, duration=1)
+    return np.asarray(effect.copy().apply(clip).get_frame(0))[0, :, 0].astype(np.uint8)
+
+
+def _black_and_white_weights(effect):
+    """The channel weights of vfx.BlackAndWhite, as its apply computes them."""
+    rgb = effect.RGB
+    if rgb is None:
+        rgb = [1, 1, 1]
+    if rgb == "CRT_phosphor":
+        rgb = [0.2125, 0.7154, 0.0721]
+    weights = np.array(rgb, dtype=np.float64)
+    return weights / (weights.sum() if effect.preserve_luminosity else 1)
+
+
+class ColorProgram:
+    """
+    A run of colour effects compiled to 8-bit lookup tables: one table for
+    every effect up to the first BlackAndWhite, the channel mix, and one
+    table for every effect after it (channels are equal by then).
+    """
+
+    def __init__(self, effects):
+        identity = np.arange(256, dtype=np.uint8)
+        self.table = identity
+        self.weights = None
+        self.gray_table = identity
+        for effect in effects:
+            if self.weights is None and isinstance(effect, vfx.BlackAndWhite):
+                self.weights = _black_and_white_weights(effect)
+            elif self.weights is None:
+                self.table = _apply_to_table(effect, self.table)
+            else:
+                self.gray_table = _apply_to_table(effect, self.gray_table)
+        self._identity = np.array_equal(self.table, identity)
+        # BlackAndWhite truncates the weighted sum; cv2.transform rounds, hence the -0.5
+        self._mix = None if self.weights is None else np.append(self.weights, -0.5 + 1e-6)[None].astype(np.float32)
+
+    def apply(self, frame, in_place: bool = False):
+        """The frame with the colour effects applied; in place if allowed and possible."""
+        if self.weights is None:
+            if self._identity:
+                return frame
+            return cv2.LUT(frame, self.table, dst=frame if in_place else None)
+        if not self._identity:
+            frame = cv2.LUT(frame, self.table, dst=frame if in_place else None)
+        gray = cv2.LUT(cv2.transform(frame, self._mix), self.gray_table)
+        return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+
+
+class FusedEffect(Effect):
+    """
+    Several geometric and colour effects applied in a single pass: every
+    remap (QuadMirror, Kaleidoscope, MirrorX/Y, Crop, CloneGrid) is composed
+    into one sampling map per frame size (cached in WARP_CACHE), and every
+    per-pixel colour effect (InvertColors, MultiplyColor, GammaCorrection,
+    LumContrast, BlackAndWhite) into one lookup table, applied to the
+    resampled frame.
+
+    The result is the same as applying the effects one by one, except that
+    colours are mapped after resampling: where a map interpolates
+    (Kaleidoscope, CloneGrid's downscale), nonlinear colour effects that
+    came first may differ by a few levels, and BlackAndWhite's weighted sum
+    is rounded consistently where MoviePy's float arithmetic occasionally
+    truncates it one level lower. Clips with masks, and frames that are not
+    8-bit RGB, are processed effect by effect.
+    """
+
+    def __init__(self, effects):
+        self.effects = []
+        for effect in effects:
+            if not is_fusible(effect):
+                raise ValueError(f"{type(effect).__name__} cannot be fused")
+            self.effects.extend(effect.effects if isinstance(effect, FusedEffect) else [effect])
+
+    def apply(self, clip):
+        if clip.is_mask or clip.mask is not None:
+            # MirrorX/Y and Crop also apply to masks, custom effects do not
+            return clip.with_effects(self.effects)
+
+        geometric = [effect for effect in self.effects if isinstance(effect, GEOMETRIC_EFFECTS)]
+        signature = tuple(_signature(effect) for effect in geometric)
+        colors = ColorProgram([effect for effect in self.effects if isinstance(effect, COLOR_EFFECTS)])
+
+        @functools.cache
+        def unfused():
+            return clip.with_effects(self.effects)
+
+        def process_frame(get_frame, t):
+            frame = get_frame(t)
+            if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] != 3:
+                return unfused().get_frame(t)
+            if not geometric:
+                return colors.apply(frame)
+            h, w = frame.shape[:2]
+            plan = WARP_CACHE.get(("fused", w, h, signature), lambda: ResamplePlan(geometric, w, h))
+            # The resampled frame is a new array, so the colours can be mapped in place
+            return colors.apply(plan.apply(frame), in_place=True)
+
+        return clip.transform(process_frame)
+
+
+def compile_effects(effects) -> list:
+    """effects with each run of consecutive fusible effects replaced by one FusedEffect."""
+    compiled = []
+    for effect in effects:
+        if not is_fusible(effect):
+            compiled.append(effect)
+        elif compiled and isinstance(compiled[-1], FusedEffect):
+            compiled[-1] = FusedEffect([compiled[-1], effect])
+        else:
+            compiled.append(FusedEffect([effect]))
+    return compiled
+
+
+def apply_fused(clip, effect):
+    """
+    clip with effect applied. If clip was itself made by apply_fused, a
+    fusible effect joins that run: the whole run is applied to the run's
+    source in one FusedEffect, instead of wrapping clip in another pass.
+    """
+    if not is_fusible(effect):
+        return clip.with_effects([effect])
+    source, effects = clip, []
+    chain = getattr(clip, "fused_chain", None)
+    # Copies of a fused clip (with a new position, duration...) carry the attribute but start a new run
+    if chain is not None and chain[0]() is clip:
+        _, source, effects = chain
+    fused = FusedEffect(effects + [effect])
+    result = source.with_effects([fused])
+    result.fused_chain = (weakref.ref(result), source, fused.effects)
+    return result
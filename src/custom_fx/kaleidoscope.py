@@ -1,11 +1,16 @@
 from moviepy import Effect
 import numpy as np
 
+from .warp import WARP_CACHE, WarpMap, pixel_grid
+
 class Kaleidoscope(Effect):
     """
     A custom effect that creates a kaleidoscope symmetry by taking a wedge 
     of the image and mirroring/rotating it radially.
     """
+    # Whether maps go through WARP_CACHE (AnimatedEffect turns it off)
+    cache_maps = True
+
     def __init__(self, n_slices: int = 6, x: int = None, y: int = None):
         """
         :param n_slices: Number of radial slices. Usually an even number works best for mirroring.
@@ -15,62 +20,54 @@ class Kaleidoscope(Effect):
         self.n_slices = n_slices
         self.x = x
         self.y = y
-        self._cache = {}
+
+    def _build_map(self, w, h, x_center, y_center):
+        # Create a grid of coordinates relative to the center
+        x_coords, y_coords = pixel_grid(w, h)
+        y_rel = y_coords - y_center
+        x_rel = x_coords - x_center
+
+        # Polar coordinates
+        r = np.sqrt(x_rel**2 + y_rel**2)
+        theta = np.arctan2(y_rel, x_rel)
+
+        # Normalize theta to [0, 2*pi)
+        theta = theta % (2 * np.pi)
+
+        # Map theta to the kaleidoscope slices
+        slice_angle = 2 * np.pi / self.n_slices
+
+        # Find which slice we are in
+        slice_idx = theta // slice_angle
+
+        # Normalize theta to [0, slice_angle)
+        theta_in_slice = theta % slice_angle
+
+        # Mirror every other slice for seamless edges
+        mask = (slice_idx % 2 == 1)
+        theta_in_slice[mask] = slice_angle - theta_in_slice[mask]
+
+        # Convert back to Cartesian for source sampling, using the first
+        # slice [0, slice_angle] as the source wedge. Sub-pixel coordinates
+        # are kept so the wedge is sampled bilinearly instead of snapped.
+        map_x = np.clip(r * np.cos(theta_in_slice) + x_center, 0, w - 1)
+        map_y = np.clip(r * np.sin(theta_in_slice) + y_center, 0, h - 1)
+        return WarpMap(map_x, map_y)
+
+    def warp_map(self, w: int, h: int) -> WarpMap:
+        """The (cached) sampling map of a w x h frame."""
+        x_center = self.x if self.x is not None else w // 2
+        y_center = self.y if self.y is not None else h // 2
+
+        if not self.cache_maps:
+            return self._build_map(w, h, x_center, y_center)
+        cache_key = ("kaleidoscope", w, h, self.n_slices, x_center, y_center)
+        return WARP_CACHE.get(cache_key, lambda: self._build_map(w, h, x_center, y_center))
 
     def apply(self, clip):
         def process_frame(get_frame, t):
             frame = get_frame(t)
             h, w = frame.shape[:2]
-            
-            # Check cache
-            cache_key = (w, h, self.n_slices, self.x, self.y)
-            if cache_key in self._cache:
-                ix, iy = self._cache[cache_key]
-                return frame[iy, ix]
-
-            x_center = self.x if self.x is not None else w // 2
-            y_center = self.y if self.y is not None else h // 2
-            
-            # Create a grid of coordinates
-            y_coords, x_coords = np.indices((h, w))
-            
-            # Relative to center
-            y_rel = y_coords - y_center
-            x_rel = x_coords - x_center
-            
-            # Polar coordinates
-            r = np.sqrt(x_rel**2 + y_rel**2)
-            theta = np.arctan2(y_rel, x_rel)
-            
-            # Normalize theta to [0, 2*pi)
-            theta = theta % (2 * np.pi)
-            
-            # Map theta to the kaleidoscope slices
-            slice_angle = 2 * np.pi / self.n_slices
-            
-            # Find which slice we are in
-            slice_idx = theta // slice_angle
-            
-            # Normalize theta to [0, slice_angle)
-            theta_in_slice = theta % slice_angle
-            
-            # Mirror every other slice for seamless edges
-            mask = (slice_idx % 2 == 1)
-            theta_in_slice[mask] = slice_angle - theta_in_slice[mask]
-            
-            # Convert back to Cartesian for source sampling
-            # Using the first slice [0, slice_angle] as the source wedge
-            ix = (r * np.cos(theta_in_slice) + x_center).astype(int)
-            iy = (r * np.sin(theta_in_slice) + y_center).astype(int)
-            
-            # Clip indices to be within frame bounds
-            ix = np.clip(ix, 0, w - 1)
-            iy = np.clip(iy, 0, h - 1)
-            
-            # Update cache
-            self._cache[cache_key] = (ix, iy)
-
-            # Sample input frame at calculated source indices
-            return frame[iy, ix]
+            return self.warp_map(w, h).apply(frame)
 
         return clip.transform(process_frame)
@@ -1,12 +1,21 @@
 from moviepy import Effect
+import numpy as np
+
 from .kaleidoscope import Kaleidoscope
+from .quad_mirror import quad_mirror_map
 from .rotating_cube import RotatingCube
+from .warp import WARP_CACHE, WarpMap
 
 class KaleidoscopeCube(Effect):
     """
     A custom effect that combines Kaleidoscope and RotatingCube.
-    It first applies a kaleidoscope effect and then maps the result
-    onto a rotating 3D cube.
+    It applies a kaleidoscope effect and maps the result onto a rotating
+    3D cube.
+
+    The two are fused: the kaleidoscope map (composed with the cube's quad
+    mirror) is warped into each face's perspective, and the source frame is
+    sampled through the result, once per output pixel, instead of
+    rendering the kaleidoscope and mirrored frames in between.
     """
     def __init__(self, kaleidoscope_params=None, cube_params=None):
         """
@@ -15,17 +24,44 @@ class KaleidoscopeCube(Effect):
         """
         self.kaleidoscope_params = kaleidoscope_params if kaleidoscope_params is not None else {}
         self.cube_params = cube_params if cube_params is not None else {}
-        
+
         # Instantiate the individual effects
         self.kaleidoscope_effect = Kaleidoscope(**self.kaleidoscope_params)
         self.cube_effect = RotatingCube(**self.cube_params)
 
+    def source_map(self, w: int, h: int) -> WarpMap:
+        """Where each pixel of a cube face's image samples the source: kaleidoscope after the optional mirror."""
+        kaleidoscope = self.kaleidoscope_effect
+        mirror = self.cube_effect.mirror
+
+        def build():
+            warp = kaleidoscope.warp_map(w, h)
+            if not mirror:
+                return warp
+            # The mirror is a whole-pixel map, so composing it is an exact gather
+            mirrored = quad_mirror_map(w, h, w // 2, h // 2)
+            iy, ix = mirrored.map_y.astype(np.intp), mirrored.map_x.astype(np.intp)
+            return WarpMap(warp.map_x[iy, ix], warp.map_y[iy, ix])
+
+        cache_key = ("kaleidoscope_cube", w, h, kaleidoscope.n_slices, kaleidoscope.x, kaleidoscope.y, mirror)
+        return WARP_CACHE.get(cache_key, build)
+
     def apply(self, clip):
         """
-        Applies the chained effects.
+        Applies the fused effect.
         """
-        # Chain the transformations: first kaleidoscope, then rotating cube
-        kaleidoscope_clip = self.kaleidoscope_effect.apply(clip)
-        final_clip = self.cube_effect.apply(kaleidoscope_clip)
-        
-        return final_clip
+        cube = self.cube_effect
+
+        def process_frame(get_frame, t):
+            frame = get_frame(t)
+            h, w = frame.shape[:2]
+            source_map = self.source_map(w, h)
+
+            # The output is a new array: callers such as the frame cache keep it
+            canvas = np.zeros_like(frame)
+            src_pts = np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=np.float32)
+            for dst_pts in cube._project_faces(w, h, t):
+                cube._draw_face(canvas, frame, dst_pts, src_pts, source_map=source_map)
+            return canvas
+
+        return clip.transform(process_frame)
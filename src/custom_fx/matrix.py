@@ -1,11 +1,50 @@
+import functools
+import threading
+
 from moviepy import Effect
 import numpy as np
+import cv2
 from PIL import Image, ImageDraw, ImageFont
 
+# Background dimming of the additive blend: frame * 205 >> 8 (about 0.8) for every 8-bit value
+_DIM_LUT = ((np.arange(256, dtype=np.uint16) * 205) >> 8).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=16)
+def glyph_atlas(chars: str, font_size: int):
+    """
+    The characters pre-rendered into a read-only (len(chars), char_h, char_w)
+    uint8 atlas, shared by every Matrix effect with the same chars and size.
+    """
+    try:
+        # Try to load a monospace font
+        font = ImageFont.truetype("DejaVuSansMono.ttf", font_size)
+    except:
+        font = ImageFont.load_default()
+
+    # Fixed grid size based on font size
+    char_w = font_size
+    char_h = int(font_size * 1.3)
+
+    atlas = np.zeros((len(chars), char_h, char_w), dtype=np.uint8)
+    for i, char in enumerate(chars):
+        img = Image.new('L', (char_w, char_h), 0)
+        draw = ImageDraw.Draw(img)
+        draw.text((0, 0), char, font=font, fill=255)
+        atlas[i] = np.array(img)
+    atlas.flags.writeable = False
+    return atlas
+
+
 class Matrix(Effect):
     """
     A MoviePy effect that overlays a 'Matrix' digital rain animation on a clip.
-    
+
+    Only the lit cells of the active columns are drawn: the glyphs of those
+    columns are assembled once per character change (12 times a second) and
+    each frame scales them by the trail brightness and adds them onto the
+    dimmed frame in place.
+
     Parameters:
     -----------
     speed : float
@@ -25,7 +64,7 @@ class Matrix(Effect):
         self.chars = chars
         self.color_name = color.lower()
         self.font_size = font_size
-        
+
         # Color mapping
         colors = {
             "red": (255, 0, 0),
@@ -34,7 +73,7 @@ class Matrix(Effect):
             "white": (255, 255, 255)
         }
         self.rgb = np.array(colors.get(self.color_name, (0, 255, 0)), dtype=np.uint8)
-        
+
         # Internal state
         self._atlas = None
         self.char_w = 0
@@ -46,114 +85,106 @@ class Matrix(Effect):
             self.rgb = np.array(self.rgb, dtype=np.uint8)
 
     def _init_atlas(self):
-        """Pre-renders the character set into a font atlas for fast blitting."""
-        try:
-            # Try to load a monospace font
-            font = ImageFont.truetype("DejaVuSansMono.ttf", self.font_size)
-        except:
-            font = ImageFont.load_default()
-            
-        # Fixed grid size based on font size
-        self.char_w = self.font_size
-        self.char_h = int(self.font_size * 1.3)
-        
-        num_chars = len(self.chars)
-        self._atlas = np.zeros((num_chars, self.char_h, self.char_w), dtype=np.uint8)
-        
-        for i, char in enumerate(self.chars):
-            img = Image.new('L', (self.char_w, self.char_h), 0)
-            draw = ImageDraw.Draw(img)
-            draw.text((0, 0), char, font=font, fill=255)
-            self._atlas[i] = np.array(img)
+        """Fetches the shared font atlas for fast blitting."""
+        self._atlas = glyph_atlas(self.chars, self.font_size)
+        _, self.char_h, self.char_w = self._atlas.shape
 
     def apply(self, clip):
         self._ensure_numpy_rgb()
         if self._atlas is None:
             self._init_atlas()
-            
+
         h, w = clip.h, clip.w
-        rows = h // self.char_h + 1
-        cols = w // self.char_w + 1
-        
+        char_h, char_w = self.char_h, self.char_w
+        rows = h // char_h + 1
+        cols = w // char_w + 1
+
         # Pre-generate column offsets and speeds for consistency
         np.random.seed(42)
         col_offsets = np.random.rand(cols) * h * 2
         col_speeds = self.speed * (0.8 + 0.4 * np.random.rand(cols))
-        col_active = (np.random.rand(cols) < self.density).astype(np.float32)
-        
+        col_active = np.random.rand(cols) < self.density
+
         # Static grid for character randomization
         base_char_grid = np.random.randint(0, len(self.chars), (rows, cols))
 
+        # Only active columns are ever drawn
+        active = np.flatnonzero(col_active)
+        col_offsets, col_speeds = col_offsets[active], col_speeds[active]
+        base_char_grid = base_char_grid[:, active]
+
         # Pre-calculate row Y coordinates (moved out of process_frame)
-        row_y = np.arange(rows) * self.char_h
+        row_y = np.arange(rows) * char_h
+        trail_len = h // 2
+
+        # Rain value (glyph pixel * brightness >> 8, at most 255 * 1.4) -> additive RGB, saturated
+        levels = np.arange(int(255 * 1.4) + 1, dtype=np.uint32)
+        rain_lut = np.minimum((levels[:, None] * self.rgb.astype(np.uint32)) >> 8, 255).astype(np.uint8)
+
+        # Glyphs of the active columns, (n_active, rows * char_h, char_w), for the latest character ticks
+        glyph_layers = {}
+        lock = threading.Lock()
+
+        def glyph_layer(char_tick):
+            with lock:
+                layer = glyph_layers.get(char_tick)
+            if layer is None:
+                char_indices = (base_char_grid.T + char_tick) % len(self.chars)
+                layer = self._atlas[char_indices].reshape(len(active), rows * char_h, char_w)
+                with lock:
+                    glyph_layers[char_tick] = layer
+                    while len(glyph_layers) > 2:
+                        glyph_layers.pop(next(iter(glyph_layers)))
+            return layer
 
         def process_frame(get_frame, t):
             frame = get_frame(t)
-            
-            # 1. Calculate the Brightness Grid (Vectorized)
+
+            # Composite with original frame
+            # We use an additive blend but slightly dim the background for visibility
+            out = cv2.LUT(frame, _DIM_LUT)
+            if not len(active):
+                return out
+
+            # 1. Calculate the Brightness Grid of the active columns (rows, n_active)
             # Time-based position of the 'lead' for each column
-            trail_len = h // 2
             lead_y = (col_speeds * t + col_offsets) % (h + trail_len)
-            
+
             # Calculate distance from each cell to its column's lead position
-            # Shape: (rows, cols)
             dist = lead_y[None, :] - row_y[:, None]
-            
+
             # Brightness decreases as we move away from the lead (upward)
-            brightness = np.where((dist >= 0) & (dist < trail_len), 
+            brightness = np.where((dist >= 0) & (dist < trail_len),
                                   1.0 - (dist / trail_len), 0.0)
-            
+
             # Highlight the head of the drop
-            brightness = np.where((dist >= 0) & (dist < self.char_h), 
+            brightness = np.where((dist >= 0) & (dist < char_h),
                                   1.4, brightness)
-            
-            # Apply column activity mask
-            brightness *= col_active[None, :]
-            
-            # 2. Randomize characters periodically
-            # Characters change slightly over time to simulate shifting data
-            char_tick = int(t * 12)
-            char_indices = (base_char_grid + char_tick) % len(self.chars)
-            
-            # 3. Assemble the Rain Layer (Vectorized Blitting)
-            # Pick character bitmaps from atlas: (rows, cols, char_h, char_w)
-            char_slices = self._atlas[char_indices]
-            
-            # Apply brightness using integer math: (rows, cols, char_h, char_w)
+
             # Scale brightness by 256 for fixed-point arithmetic
             brightness_int = (brightness * 256).astype(np.uint16)
 
-            # rain_mask_int fits in uint16 after shift (max ~360)
-            # char_slices (uint8) * brightness_int (uint16) -> temporary uint32/int64
-            rain_mask_int = (char_slices.astype(np.uint32) * brightness_int[:, :, None, None]) >> 8
-            
-            # Reshape/Transpose to form the full rain image
-            # (rows, cols, char_h, char_w) -> (rows, char_h, cols, char_w) -> (H, W)
-            rain_layer_int = rain_mask_int.transpose(0, 2, 1, 3).reshape(rows * self.char_h, cols * self.char_w)
-            
-            # Crop to frame size
-            rain_layer_int = rain_layer_int[:h, :w]
-            
-            # 4. Coloring and Compositing
-            # Apply color: (rain_layer_int * rgb) >> 8
-            # rain_layer_int is effectively 0-360 range (scaled by brightness)
-            # We use uint32 for multiplication to avoid overflow, then shift back to 0-255 range.
-            # NOTE: Original implementation caused integer overflow/wrapping for bright spots (e.g. 357 * 255 -> wrapped).
-            # This implementation clips values to 255, producing correct saturation instead of dark artifacts.
-            rain_rgb_temp = (rain_layer_int[:, :, None].astype(np.uint32) * self.rgb.astype(np.uint32)) >> 8
-
-            # Clip to ensure valid uint8 range (handles brightness > 1.0 correctly)
-            rain_rgb = np.clip(rain_rgb_temp, 0, 255).astype(np.uint8)
-            
-            # Composite with original frame
-            # We use an additive blend but slightly dim the background for visibility
-            # frame * 0.8 ~= (frame * 205) >> 8. Use uint16 to prevent overflow before shift.
-            dimmed_bg = (frame.astype(np.uint16) * 205 >> 8).astype(np.uint8)
-            
-            # Additive blend with clipping
-            # Use uint16 to prevent overflow during addition
-            out = np.clip(dimmed_bg.astype(np.uint16) + rain_rgb.astype(np.uint16), 0, 255).astype(np.uint8)
-            
+            # 2. Characters change 12 times a second to simulate shifting data
+            layer = glyph_layer(int(t * 12))
+
+            # 3. Blit the lit cells of each active column onto the frame
+            for i, col in enumerate(active):
+                lit = np.flatnonzero(brightness_int[:, i])
+                if not len(lit):
+                    continue
+                y0, y1 = lit[0] * char_h, min(h, (lit[-1] + 1) * char_h)
+                x0, x1 = col * char_w, min(w, (col + 1) * char_w)
+                if y0 >= y1 or x0 >= x1:
+                    continue
+                cell_brightness = np.repeat(brightness_int[lit[0]:lit[-1] + 1, i], char_h)[:y1 - y0, None]
+                rain = (layer[i, y0:y1, :x1 - x0] * cell_brightness.astype(np.uint32)) >> 8
+                rain_rgb = rain_lut[rain]
+
+                # Additive blend with clipping, in place: add at most the headroom left
+                region = out[y0:y1, x0:x1]
+                np.minimum(rain_rgb, 255 - region, out=rain_rgb)
+                region += rain_rgb
+
             return out
 
         return clip.transform(process_frame)
@@ -1,6 +1,30 @@
 from moviepy import Effect
 import numpy as np
 
+from .warp import WARP_CACHE, WarpMap
+
+
+def quad_mirror_map(w: int, h: int, x_center: int, y_center: int, cache: bool = True) -> WarpMap:
+    """
+    Map mirroring the top-left quadrant, up to (x_center, y_center), into
+    the other three. Shared with RotatingCube, so both reuse one cached map
+    (built afresh, uncached, with cache=False).
+    """
+    def build():
+        idx_x = np.arange(w, dtype=np.float32)
+        idx_x = np.where(idx_x <= x_center, idx_x, 2 * x_center - idx_x)
+        idx_x = np.clip(idx_x, 0, x_center)
+
+        idx_y = np.arange(h, dtype=np.float32)
+        idx_y = np.where(idx_y <= y_center, idx_y, 2 * y_center - idx_y)
+        idx_y = np.clip(idx_y, 0, y_center)
+
+        return WarpMap(np.broadcast_to(idx_x, (h, w)), np.broadcast_to(idx_y[:, None], (h, w)))
+
+    if not cache:
+        return build()
+    return WARP_CACHE.get(("quad_mirror", w, h, x_center, y_center), build)
+
 
 class QuadMirror(Effect):
     """
@@ -8,37 +32,28 @@ class QuadMirror(Effect):
     based on a custom center (x, y).
     """
 
+    # Whether maps go through WARP_CACHE (AnimatedEffect turns it off)
+    cache_maps = True
+
     def __init__(self, x: int = None, y: int = None):
         self.x = x
         self.y = y
-        self._cache = {}
+
+    def warp_map(self, w: int, h: int) -> WarpMap:
+        """The (cached) sampling map of a w x h frame."""
+        x_center = self.x if self.x is not None else w // 2
+        y_center = self.y if self.y is not None else h // 2
+
+        # Ensure center is within bounds
+        x_center = int(max(0, min(w - 1, x_center)))
+        y_center = int(max(0, min(h - 1, y_center)))
+
+        return quad_mirror_map(w, h, x_center, y_center, cache=self.cache_maps)
 
     def apply(self, clip):
         def process_frame(get_frame, t):
             frame = get_frame(t)
             h, w = frame.shape[:2]
-
-            x_center = self.x if self.x is not None else w // 2
-            y_center = self.y if self.y is not None else h // 2
-
-            # Ensure center is within bounds
-            x_center = int(max(0, min(w - 1, x_center)))
-            y_center = int(max(0, min(h - 1, y_center)))
-
-            cache_key = (w, h, x_center, y_center)
-            if cache_key in self._cache:
-                idx_x, idx_y = self._cache[cache_key]
-            else:
-                idx_x = np.arange(w)
-                idx_x = np.where(idx_x <= x_center, idx_x, 2 * x_center - idx_x)
-                idx_x = np.clip(idx_x, 0, x_center)
-
-                idx_y = np.arange(h)
-                idx_y = np.where(idx_y <= y_center, idx_y, 2 * y_center - idx_y)
-                idx_y = np.clip(idx_y, 0, y_center)
-
-                self._cache[cache_key] = (idx_x, idx_y)
-
-            return frame[idx_y][:, idx_x]
+            return self.warp_map(w, h).apply(frame)
 
         return clip.transform(process_frame)
@@ -1,11 +1,33 @@
+import threading
+from collections import OrderedDict
+
 from moviepy import Effect
 import numpy as np
 
+
+def roll_into(dst, src, dx: int, dy: int):
+    """
+    dst[...] = np.roll(src, (dy, dx), axis=(0, 1)) without the temporary:
+    the wrapped image is written as (up to) four block copies.
+    """
+    h, w = src.shape[:2]
+    dx %= w
+    dy %= h
+    for src_y, dst_y in ((slice(0, h - dy), slice(dy, h)), (slice(h - dy, h), slice(0, dy))):
+        for src_x, dst_x in ((slice(0, w - dx), slice(dx, w)), (slice(w - dx, w), slice(0, dx))):
+            dst[dst_y, dst_x] = src[src_y, src_x]
+
+
 class RGBSync(Effect):
     """
     Splits the RGB channels and applies spatial and/or temporal offsets
     to create a "sync" or "split" glitch effect.
-    
+
+    Shifted channels are copied straight into the output frame. With time
+    offsets, the last few decoded frames are kept so that a sequential
+    render decodes each source frame once: the frame a channel reads ahead
+    (or behind) is the main frame of a nearby timestamp.
+
     Parameters:
     -----------
     r_offset : tuple (x, y)
@@ -21,39 +43,59 @@ class RGBSync(Effect):
     b_time_offset : float
         Time offset (seconds) for the Blue channel.
     """
-    def __init__(self, 
+    def __init__(self,
                  r_offset=(0, 0), g_offset=(0, 0), b_offset=(0, 0),
                  r_time_offset=0, g_time_offset=0, b_time_offset=0):
         self.offsets = [r_offset, g_offset, b_offset]
         self.time_offsets = [r_time_offset, g_time_offset, b_time_offset]
 
+    def _ring_size(self, clip) -> int:
+        """Frames to keep: enough to span the largest time offset at the clip's frame rate."""
+        spread = max(self.time_offsets) - min(self.time_offsets)
+        if not spread:
+            return 0
+        fps = getattr(clip, "fps", None)
+        return min(16, int(spread * fps) + 3) if fps else 8
+
     def apply(self, clip):
-        def process_frame(get_frame, t):
-            # Get frames for each channel based on time offsets
-            # We use float32 for processing and then clip back to uint8
-            channels = []
-            # Local cache to avoid redundant frame decoding if time offsets are same
-            frames_cache = {}
+        # Recently decoded frames, keyed by time in milliseconds
+        ring = OrderedDict()
+        ring_size = self._ring_size(clip)
+        lock = threading.Lock()
+
+        def fetch(get_frame, channel_t):
+            if not ring_size:
+                return get_frame(channel_t)
+            key = round(channel_t * 1000)
+            with lock:
+                frame = ring.get(key)
+            if frame is None:
+                frame = get_frame(channel_t)
+                with lock:
+                    ring[key] = frame
+                    while len(ring) > ring_size:
+                        ring.popitem(last=False)
+            return frame
 
+        def process_frame(get_frame, t):
+            out = None
+            # Channels at the same time share one frame
+            frames = {}
             for i in range(3):
                 # Calculate the timestamp for this specific channel
                 # Ensure it stays within clip bounds [0, duration]
                 channel_t = max(0, min(clip.duration, t + self.time_offsets[i])) if clip.duration else t + self.time_offsets[i]
-                
-                if channel_t not in frames_cache:
-                    frames_cache[channel_t] = get_frame(channel_t)
-
-                frame = frames_cache[channel_t]
-                channel_data = frame[:, :, i]
-                
-                # Apply spatial offset using np.roll (wraps around)
-                # axis 0 is Y, axis 1 is X
-                if self.offsets[i] != (0, 0):
-                    channel_data = np.roll(channel_data, shift=self.offsets[i], axis=(1, 0))
-                
-                channels.append(channel_data)
-            
-            return np.stack(channels, axis=-1)
+                if channel_t not in frames:
+                    frames[channel_t] = fetch(get_frame, channel_t)
+                frame = frames[channel_t]
+                if out is None:
+                    out = np.empty(frame.shape[:2] + (3,), dtype=frame.dtype)
+
+                # Spatial offset (x, y), wrapping around like np.roll
+                dx, dy = self.offsets[i]
+                roll_into(out[:, :, i], frame[:, :, i], dx, dy)
+
+            return out
 
         return clip.transform(process_frame)
 
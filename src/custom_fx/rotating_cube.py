@@ -1,7 +1,24 @@
+import threading
+
 from moviepy import Effect
 import numpy as np
 import cv2
 
+from .quad_mirror import quad_mirror_map
+
+
+def _scratch(local, name, shape, dtype):
+    """
+    A C-contiguous array of the given shape backed by a per-thread buffer
+    that only grows, so per-face temporaries are not reallocated every frame.
+    """
+    size = int(np.prod(shape))
+    buffer = getattr(local, name, None)
+    if buffer is None or len(buffer) < size or buffer.dtype != dtype:
+        buffer = np.empty(size, dtype=dtype)
+        setattr(local, name, buffer)
+    return buffer[:size].reshape(shape)
+
 
 class RotatingCube(Effect):
     """
@@ -34,26 +51,123 @@ class RotatingCube(Effect):
         self.mirror = mirror
         self.motion_radius = motion_radius
         self.motion_speed = motion_speed
-        self._mirror_cache = {}
+        self._geometry = {}
+        self._local = threading.local()
 
-    def _apply_quad_mirror(self, frame):
-        h, w = frame.shape[:2]
-        xc, yc = w // 2, h // 2
-
-        cache_key = (w, h)
-        if cache_key in self._mirror_cache:
-            idx_x, idx_y = self._mirror_cache[cache_key]
+    def _cube_faces(self, w, h):
+        """Corners of the 6 faces (Front, Back, Top, Bottom, Right, Left) for a w x h frame, built once per size."""
+        faces = self._geometry.get((w, h))
+        if faces is None:
+            dist = max(w, h) / 2
+            faces = [
+                np.array([[-w / 2, -h / 2, dist], [w / 2, -h / 2, dist], [w / 2, h / 2, dist], [-w / 2, h / 2, dist]]),
+                np.array([[w / 2, -h / 2, -dist], [-w / 2, -h / 2, -dist], [-w / 2, h / 2, -dist], [w / 2, h / 2, -dist]]),
+                np.array([[-w / 2, -dist, -h / 2], [w / 2, -dist, -h / 2], [w / 2, -dist, h / 2], [-w / 2, -dist, h / 2]]),
+                np.array([[-w / 2, dist, h / 2], [w / 2, dist, h / 2], [w / 2, dist, -h / 2], [-w / 2, dist, -h / 2]]),
+                np.array([[dist, -h / 2, w / 2], [dist, -h / 2, -w / 2], [dist, h / 2, -w / 2], [dist, h / 2, w / 2]]),
+                np.array([[-dist, -h / 2, -w / 2], [-dist, -h / 2, w / 2], [-dist, h / 2, w / 2], [-dist, h / 2, -w / 2]]),
+            ]
+            self._geometry[(w, h)] = faces
+        return faces
+
+    def _project_faces(self, w, h, t):
+        """Visible faces at time t as 2D quads (float32, 4x2), farthest first."""
+        # Rotation angles
+        ax = np.deg2rad((self.speed_x * t) % 360)
+        ay = np.deg2rad((self.speed_y * t) % 360)
+
+        # Motion path offset
+        m_rad = np.deg2rad((self.motion_speed * t) % 360)
+        off_x = w * self.motion_radius * np.cos(m_rad)
+        off_y = h * self.motion_radius * np.sin(m_rad)
+
+        # Perspective parameters
+        focal_length = max(w, h) * self.zoom
+
+        # Rotation Matrices
+        cx, sx = np.cos(ax), np.sin(ax)
+        Rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+        cy, sy = np.cos(ay), np.sin(ay)
+        Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+
+        R = Ry @ Rx  # Combined rotation
+
+        # Project and sort faces by depth
+        rendered_faces = []
+        for face_pts in self._cube_faces(w, h):
+            # Rotate
+            rot_pts = face_pts @ R.T
+
+            # Check visibility (backface culling)
+            v1 = rot_pts[1] - rot_pts[0]
+            v2 = rot_pts[3] - rot_pts[0]
+            normal = np.cross(v1, v2)
+            if normal[2] <= 0:  # Facing away
+                continue
+
+            # Project
+            points_2d = []
+            visible = True
+            avg_z = np.mean(rot_pts[:, 2])
+
+            for x, y, z in rot_pts:
+                if z <= 0.1:
+                    visible = False
+                    break
+                px = (x * focal_length / z) + w / 2 + off_x
+                py = (y * focal_length / z) + h / 2 + off_y
+                points_2d.append([px, py])
+
+            if visible:
+                rendered_faces.append(
+                    (avg_z, np.array(points_2d, dtype=np.float32))
+                )
+
+        # Sort by depth (farthest first)
+        rendered_faces.sort(key=lambda x: x[0], reverse=True)
+
+        return [pts for _, pts in rendered_faces]
+
+    def _draw_face(self, canvas, frame, dst_pts, src_pts, source_map=None):
+        """
+        Warps frame onto the face quad dst_pts of canvas. Only the quad's
+        bounding box is resampled, and the quad itself is the coverage mask.
+        With source_map (a WarpMap of the face image's pixels into frame), the
+        map is warped instead of an intermediate image, so frame is sampled
+        once.
+        """
+        h, w = canvas.shape[:2]
+        x0 = max(0, int(np.floor(dst_pts[:, 0].min())))
+        x1 = min(w, int(np.ceil(dst_pts[:, 0].max())) + 1)
+        y0 = max(0, int(np.floor(dst_pts[:, 1].min())))
+        y1 = min(h, int(np.ceil(dst_pts[:, 1].max())) + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        # Canvas pixel (x0 + i, y0 + j) -> source pixel
+        M = cv2.getPerspectiveTransform(dst_pts, src_pts) @ np.array([[1, 0, x0], [0, 1, y0], [0, 0, 1]])
+        box = (y1 - y0, x1 - x0)
+        face = _scratch(self._local, "face", box + frame.shape[2:], frame.dtype)
+        if source_map is None:
+            cv2.warpPerspective(
+                frame, M, (box[1], box[0]), dst=face,
+                flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE,
+            )
         else:
-            idx_x = np.arange(w)
-            idx_x = np.where(idx_x <= xc, idx_x, 2 * xc - idx_x)
-            idx_x = np.clip(idx_x, 0, xc)
-
-            idx_y = np.arange(h)
-            idx_y = np.where(idx_y <= yc, idx_y, 2 * yc - idx_y)
-            idx_y = np.clip(idx_y, 0, yc)
-            self._mirror_cache[cache_key] = (idx_x, idx_y)
-
-        return frame[idx_y][:, idx_x]
+            map_x = _scratch(self._local, "map_x", box, np.float32)
+            map_y = _scratch(self._local, "map_y", box, np.float32)
+            for src, dst in ((source_map.map_x, map_x), (source_map.map_y, map_y)):
+                cv2.warpPerspective(
+                    src, M, (box[1], box[0]), dst=dst,
+                    flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE,
+                )
+            cv2.remap(frame, map_x, map_y, cv2.INTER_LINEAR, dst=face, borderMode=cv2.BORDER_REPLICATE)
+
+        # Polygon rasterised with 4 bits of sub-pixel precision
+        mask = _scratch(self._local, "mask", box, np.uint8)
+        mask.fill(0)
+        cv2.fillConvexPoly(mask, np.round((dst_pts - [x0, y0]) * 16).astype(np.int32), 1, cv2.LINE_8, 4)
+        cv2.copyTo(face, mask, canvas[y0:y1, x0:x1])
 
     def apply(self, clip):
         def process_frame(get_frame, t):
@@ -62,125 +176,19 @@ class RotatingCube(Effect):
             Named process_frame instead of filter to avoid shadowing the built-in filter function.
             """
             raw_frame = get_frame(t)
-            frame = self._apply_quad_mirror(raw_frame) if self.mirror else raw_frame
-            h, w = frame.shape[:2]
-
-            # Rotation angles
-            ax = np.deg2rad((self.speed_x * t) % 360)
-            ay = np.deg2rad((self.speed_y * t) % 360)
-
-            # Motion path offset
-            m_rad = np.deg2rad((self.motion_speed * t) % 360)
-            off_x = w * self.motion_radius * np.cos(m_rad)
-            off_y = h * self.motion_radius * np.sin(m_rad)
-
-            # Perspective parameters
-            focal_length = max(w, h) * self.zoom
-            dist = max(w, h) / 2
-
-            # Define 6 faces (Front, Back, Top, Bottom, Right, Left)
-            cube_faces = [
-                np.array(
-                    [
-                        [-w / 2, -h / 2, dist],
-                        [w / 2, -h / 2, dist],
-                        [w / 2, h / 2, dist],
-                        [-w / 2, h / 2, dist],
-                    ]
-                ),  # Front
-                np.array(
-                    [
-                        [w / 2, -h / 2, -dist],
-                        [-w / 2, -h / 2, -dist],
-                        [-w / 2, h / 2, -dist],
-                        [w / 2, h / 2, -dist],
-                    ]
-                ),  # Back
-                np.array(
-                    [
-                        [-w / 2, -dist, -h / 2],
-                        [w / 2, -dist, -h / 2],
-                        [w / 2, -dist, h / 2],
-                        [-w / 2, -dist, h / 2],
-                    ]
-                ),  # Top
-                np.array(
-                    [
-                        [-w / 2, dist, h / 2],
-                        [w / 2, dist, h / 2],
-                        [w / 2, dist, -h / 2],
-                        [-w / 2, dist, -h / 2],
-                    ]
-                ),  # Bottom
-                np.array(
-                    [
-                        [dist, -h / 2, w / 2],
-                        [dist, -h / 2, -w / 2],
-                        [dist, h / 2, -w / 2],
-                        [dist, h / 2, w / 2],
-                    ]
-                ),  # Right
-                np.array(
-                    [
-                        [-dist, -h / 2, -w / 2],
-                        [-dist, -h / 2, w / 2],
-                        [-dist, h / 2, w / 2],
-                        [-dist, h / 2, -w / 2],
-                    ]
-                ),  # Left
-            ]
-
-            # Rotation Matrices
-            cx, sx = np.cos(ax), np.sin(ax)
-            Rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
-            cy, sy = np.cos(ay), np.sin(ay)
-            Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
-
-            R = Ry @ Rx  # Combined rotation
-
-            # Project and sort faces by depth
-            rendered_faces = []
-            for face_pts in cube_faces:
-                # Rotate
-                rot_pts = face_pts @ R.T
-
-                # Check visibility (backface culling)
-                v1 = rot_pts[1] - rot_pts[0]
-                v2 = rot_pts[3] - rot_pts[0]
-                normal = np.cross(v1, v2)
-                if normal[2] <= 0:  # Facing away
-                    continue
-
-                # Project
-                points_2d = []
-                visible = True
-                avg_z = np.mean(rot_pts[:, 2])
-
-                for x, y, z in rot_pts:
-                    if z <= 0.1:
-                        visible = False
-                        break
-                    px = (x * focal_length / z) + w / 2 + off_x
-                    py = (y * focal_length / z) + h / 2 + off_y
-                    points_2d.append([px, py])
-
-                if visible:
-                    rendered_faces.append(
-                        (avg_z, np.array(points_2d, dtype=np.float32))
-                    )
-
-            # Sort by depth (farthest first)
-            rendered_faces.sort(key=lambda x: x[0], reverse=True)
-
-            # Draw
-            canvas = np.zeros_like(frame)
+            h, w = raw_frame.shape[:2]
+            if self.mirror:
+                # Whole-pixel copy, so the face warp stays the only interpolation
+                mirrored = _scratch(self._local, "mirrored", raw_frame.shape, raw_frame.dtype)
+                frame = quad_mirror_map(w, h, w // 2, h // 2).apply(raw_frame, out=mirrored)
+            else:
+                frame = raw_frame
+
+            # The output is a new array: callers such as the frame cache keep it
+            canvas = np.zeros_like(raw_frame)
             src_pts = np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=np.float32)
-
-            for _, dst_pts in rendered_faces:
-                M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-                face_img = cv2.warpPerspective(frame, M, (w, h))
-                mask = np.any(face_img > 0, axis=-1)
-                canvas[mask] = face_img[mask]
+            for dst_pts in self._project_faces(w, h, t):
+                self._draw_face(canvas, frame, dst_pts, src_pts)
 
             return canvas
 
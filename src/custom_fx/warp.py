@@ -0,0 +1,56 @@
+import numpy as np
+import cv2
+
+from .warp_cache import WARP_CACHE, WarpCache
+
+
+class WarpMap:
+    """
+    Where each output pixel samples the input: float32 source coordinates
+    map_x, map_y of shape (h, w), applied with cv2.remap. Coordinates outside
+    the input (e.g. -1) give transparent black.
+    """
+
+    def __init__(self, map_x, map_y):
+        self.map_x = np.ascontiguousarray(map_x, dtype=np.float32)
+        self.map_y = np.ascontiguousarray(map_y, dtype=np.float32)
+        # Whole-pixel maps (mirrors, flips, crops) sample exactly the same with
+        # nearest-neighbour lookups, which are about three times cheaper
+        self.integral = bool(
+            np.array_equal(self.map_x, np.rint(self.map_x)) and np.array_equal(self.map_y, np.rint(self.map_y))
+        )
+
+    @property
+    def shape(self):
+        return self.map_x.shape
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.map_x.nbytes + self.map_y.nbytes)
+
+    def apply(self, frame, interpolation=cv2.INTER_LINEAR, out=None):
+        """
+        Resamples frame (bilinear by default), into out if given. Dtypes
+        OpenCV cannot remap use the nearest pixel.
+        """
+        if frame.dtype in (np.uint8, np.uint16, np.int16, np.float32, np.float64):
+            if self.integral:
+                interpolation = cv2.INTER_NEAREST
+            return cv2.remap(
+                frame, self.map_x, self.map_y, interpolation, dst=out,
+                borderMode=cv2.BORDER_CONSTANT, borderValue=0,
+            )
+        h, w = frame.shape[:2]
+        ix = np.clip(np.rint(self.map_x).astype(np.intp), 0, w - 1)
+        iy = np.clip(np.rint(self.map_y).astype(np.intp), 0, h - 1)
+        if out is None:
+            return frame[iy, ix]
+        out[...] = frame[iy, ix]
+        return out
+
+
+def pixel_grid(w: int, h: int):
+    """float32 x and y coordinates of every pixel of a w x h frame."""
+    x = np.arange(w, dtype=np.float32)
+    y = np.arange(h, dtype=np.float32)
+    return np.broadcast_to(x, (h, w)), np.broadcast_to(y[:, None], (h, w))
@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+
+class WarpCache:
+    """
+    LRU cache of WarpMaps bounded in bytes, shared by every effect instance:
+    a map is built once per (effect, frame size, parameters) and evicted
+    least recently used first.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._maps = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Returns the map for key, calling build() to make it on a miss."""
+        with self._lock:
+            warp = self._maps.get(key)
+            if warp is not None:
+                self._maps.move_to_end(key)
+                self.hits += 1
+                return warp
+            self.misses += 1
+        # Built outside the lock: two threads may build the same map, which is harmless
+        warp = build()
+        with self._lock:
+            if key not in self._maps and warp.nbytes <= self.max_bytes:
+                self._maps[key] = warp
+                self._bytes += warp.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._maps.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return warp
+
+    def clear(self):
+        with self._lock:
+            self._maps.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._maps),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+WARP_CACHE = WarpCache()
@@ -0,0 +1,126 @@
+import numbers
+import threading
+from collections import OrderedDict
+
+
+def _nbytes(frame) -> int:
+    return getattr(frame, "nbytes", 0)
+
+
+class _CachedFrameFunction:
+    """frame_function of an attached clip: looks frames up in cache under node_key."""
+
+    def __init__(self, cache, node_key: str, frame_function):
+        self.cache = cache
+        self.node_key = node_key
+        self.frame_function = frame_function
+
+    def __call__(self, t):
+        # Audio clips are sampled with arrays of times; only cache single frames
+        if not self.cache.max_bytes or not isinstance(t, numbers.Real):
+            return self.frame_function(t)
+        key = (self.node_key, round(t * 1000))
+        frame = self.cache.get(key)
+        if frame is None:
+            frame = self.cache.put(key, self.frame_function(t))
+        return frame
+
+
+class FrameCache:
+    """
+    Process-wide LRU cache of computed frames, keyed by (clip node, t rounded
+    to the millisecond) and bounded by a memory budget in bytes. Clips are
+    attached by wrapping their frame_function, so every clip derived from an
+    attached clip (effects, composites, rebuilt instances) reuses its
+    cached frames. A budget of 0 disables caching.
+
+    Cached frames are returned as read-only arrays shared by all callers.
+    """
+
+    def __init__(self, max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def attach(self, clip, node_key: str):
+        """
+        Routes clip.get_frame through the cache under node_key. Copies of an
+        attached clip that kept its frame_function (with_position, with_start,
+        ...) produce the same frames, so they keep using the node they were
+        copied from instead of caching each frame twice.
+        """
+        frame_function = getattr(clip, "frame_function", None)
+        if frame_function is None or isinstance(frame_function, _CachedFrameFunction):
+            return clip
+
+        clip.frame_function = _CachedFrameFunction(self, node_key, frame_function)
+        return clip
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key, frame):
+        """Caches frame under key. Returns the read-only view of it that the cache hands out."""
+        size = _nbytes(frame)
+        if size > self.max_bytes:
+            return frame
+        # A view, so the array of whoever produced the frame stays writable
+        if hasattr(frame, "setflags"):
+            frame = frame.view()
+            frame.setflags(write=False)
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self._bytes -= _nbytes(old)
+            self._frames[key] = frame
+            self._bytes += size
+            self._evict()
+        return frame
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._frames:
+            _, frame = self._frames.popitem(last=False)
+            self._bytes -= _nbytes(frame)
+
+    def configure(self, max_bytes: int):
+        """Changes the memory budget, evicting frames if it shrinks. 0 disables and empties the cache."""
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative.")
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def discard(self, node_keys):
+        """Drops the cached frames of the given nodes, e.g. once their clips are rebuilt from other media."""
+        node_keys = set(node_keys)
+        with self._lock:
+            for key in [key for key in self._frames if key[0] in node_keys]:
+                self._bytes -= _nbytes(self._frames.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.max_bytes > 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "frames": len(self._frames),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,56 @@
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stands for the module name, imported on first attribute access. Reads
+    are forwarded to the real module; imports go through importlib, which
+    makes a first use from several threads at once safe.
+    """
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.__name__), attr)
+
+
+def lazy_import(name: str):
+    """
+    The module name, imported on first use instead of now, so that importing
+    a module using it stays cheap until something is actually needed. A
+    module already imported, or replaced in sys.modules, is returned as is.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
+
+
+class LazyAttribute:
+    """
+    Stands for getattr(module, name) without loading a lazy module: calling
+    it, reading its attributes and isinstance checks against it resolve the
+    object on first use. For names a module would otherwise star-import.
+    """
+
+    def __init__(self, module, name: str):
+        self._module = module
+        self._name = name
+
+    def resolve(self):
+        return getattr(self._module, self._name)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __instancecheck__(self, obj) -> bool:
+        return isinstance(obj, self.resolve())
+
+    def __repr__(self):
+        return f"<lazy {self._module.__name__}.{self._name}>"
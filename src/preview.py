@@ -0,0 +1,121 @@
+import math
+import os
+import subprocess as sp
+import tempfile
+import threading
+import wave
+
+
+def preview_size(size, height: int) -> tuple[int, int]:
+    """Scales (width, height) down to at most height pixels high, keeping even dimensions."""
+    w, h = size
+    scale = min(1.0, height / h)
+    return max(2, round(w * scale / 2) * 2), max(2, round(h * scale / 2) * 2)
+
+
+def segment_count(duration: float, segment_seconds: float) -> int:
+    return max(1, math.ceil(duration / segment_seconds - 1e-9))
+
+
+def segment_bounds(duration: float, segment_seconds: float, index: int) -> tuple[float, float]:
+    """Start and end time of segment index. Raises ValueError if out of range."""
+    if not 0 <= index < segment_count(duration, segment_seconds):
+        raise ValueError(f"Segment {index} is out of range.")
+    start = index * segment_seconds
+    return start, min(duration, start + segment_seconds)
+
+
+def build_playlist(duration: float, segment_seconds: float, segment_url) -> str:
+    """
+    HLS VOD playlist covering the whole clip. segment_url(index) gives the
+    URL of each segment; segments are rendered when they are requested.
+    """
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+        f"#EXT-X-TARGETDURATION:{math.ceil(segment_seconds)}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+    ]
+    for index in range(segment_count(duration, segment_seconds)):
+        start, end = segment_bounds(duration, segment_seconds, index)
+        lines.append(f"#EXTINF:{end - start:.3f},")
+        lines.append(segment_url(index))
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def _write_audio(clip, start: float, end: float, path: str, fps: int = 44100):
+    import numpy as np
+
+    samples = clip.audio.subclipped(start, end).to_soundarray(fps=fps)
+    samples = np.atleast_2d(samples.T).T
+    with wave.open(path, "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(fps)
+        f.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+
+
+def encode_segment(clip, start: float, end: float, fps: float, size, chunk_size: int = 64 * 1024):
+    """
+    Renders clip between start and end at the given fps and size into an
+    MPEG-TS segment, yielding the encoded bytes as ffmpeg produces them.
+    Timestamps are offset to start so consecutive segments play back to back.
+    """
+    import cv2
+    from moviepy.config import FFMPEG_BINARY
+
+    w, h = size
+    audiofile = None
+    cmd = [
+        FFMPEG_BINARY, "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-r", f"{fps}", "-i", "-",
+    ]
+    if clip.audio is not None:
+        fd, audiofile = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        _write_audio(clip, start, end, audiofile)
+        cmd.extend(["-i", audiofile, "-map", "0:v", "-map", "1:a", "-c:a", "aac", "-b:a", "96k"])
+    cmd.extend([
+        "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency", "-pix_fmt", "yuv420p",
+        "-output_ts_offset", f"{start:.6f}", "-flush_packets", "1", "-f", "mpegts", "-",
+    ])
+
+    proc = sp.Popen(cmd, stdin=sp.PIPE, stdout=sp.PIPE, stderr=sp.DEVNULL)
+    errors = []
+
+    def feed():
+        # Frame indices on the global fps grid, so segments neither overlap nor leave gaps
+        try:
+            for frame_index in range(round(start * fps), round(end * fps)):
+                frame = clip.get_frame(frame_index / fps)
+                if frame.shape[1] != w or frame.shape[0] != h:
+                    frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+                proc.stdin.write(frame.astype("uint8", copy=False)[:, :, :3].tobytes())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, name="preview-feed", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            chunk = proc.stdout.read1(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        feeder.join()
+        if proc.wait() != 0 or errors:
+            raise IOError(f"Preview encoding failed: {errors[0] if errors else 'ffmpeg error'}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        feeder.join()
+        if audiofile is not None:
+            os.remove(audiofile)
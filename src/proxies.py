@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import subprocess as sp
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+class Proxy:
+    """A low-resolution, all-intra stand-in for one source video file."""
+
+    def __init__(self, source: str, path: Path, size=None):
+        self.source = source
+        self.path = path
+        # Size of the original the proxy stands for
+        self.size = size
+        self.status = "pending"
+        self.error = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "proxy_path": str(self.path),
+            "status": self.status,
+            "original_size": list(self.size) if self.size else None,
+            "error": self.error,
+        }
+
+
+class ProxyManager:
+    """
+    Generates and caches proxy files for loaded sources in the background.
+    Proxies are encoded with every frame as a keyframe, so random access
+    (scrubbing, thumbnails, segment starts) never decodes a whole GOP, and are
+    keyed by the source's path, size and mtime so edited files get new ones.
+    Once the directory exceeds max_bytes, least recently used proxies are
+    evicted first; sources whose proxy was evicted fall back to the original
+    until it is requested again. height = 0 disables proxies, max_bytes = 0
+    removes the limit.
+    """
+
+    def __init__(self, directory, height: int = 540, max_bytes: int = 0, max_workers: int = 1, on_ready=None):
+        self.directory = Path(directory)
+        self.height = height
+        self.max_bytes = max_bytes
+        # Called with the source path once its proxy is ready
+        self.on_ready = on_ready
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="proxy")
+        self._proxies = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.height > 0
+
+    def _key(self, source: str) -> str:
+        stat = os.stat(source)
+        identity = f"{os.path.realpath(source)}|{stat.st_size}|{stat.st_mtime_ns}|{self.height}"
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def lookup(self, source: str):
+        """Returns the ready proxy of source, or None."""
+        if not self.enabled:
+            return None
+        key = self._key(source)
+        with self._lock:
+            proxy = self._proxies.get(key)
+            if proxy is None:
+                # Proxies generated by a previous run
+                sidecar = self.directory / f"{key}.json"
+                if not sidecar.exists():
+                    return None
+                with open(sidecar) as f:
+                    proxy = Proxy(source, self.directory / f"{key}.mp4", tuple(json.load(f)["size"]))
+                proxy.status = "ready"
+                self._proxies[key] = proxy
+            if not proxy.ready:
+                return None
+            try:
+                os.utime(proxy.path)
+            except FileNotFoundError:
+                # Removed behind our back
+                del self._proxies[key]
+                return None
+        return proxy
+
+    def request(self, source: str, size) -> Proxy:
+        """
+        Queues proxy generation for a source of the given (width, height),
+        unless it is already small enough. Returns the proxy or None.
+        """
+        if not self.enabled or size[1] <= self.height:
+            return None
+        key = self._key(source)
+        with self._lock:
+            proxy = self._proxies.get(key)
+            if proxy is not None and proxy.status != "failed":
+                return proxy
+            proxy = Proxy(source, self.directory / f"{key}.mp4", tuple(size))
+            self._proxies[key] = proxy
+        self._executor.submit(self._generate, key, proxy)
+        return proxy
+
+    def _generate(self, key: str, proxy: Proxy):
+        from moviepy.config import FFMPEG_BINARY
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f".{key}.mp4"
+        cmd = [
+            FFMPEG_BINARY, "-y", "-loglevel", "error",
+            "-i", proxy.source,
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-vf", f"scale=-2:{self.height}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-crf", "23", "-g", "1", "-pix_fmt", "yuv420p",
+            "-c:a", "aac",
+            str(tmp),
+        ]
+        try:
+            result = sp.run(cmd, stdout=sp.DEVNULL, stderr=sp.PIPE)
+            if result.returncode != 0:
+                raise IOError(result.stderr.decode(errors="replace"))
+            os.replace(tmp, proxy.path)
+            with open(self.directory / f"{key}.json", "w") as f:
+                json.dump({"source": proxy.source, "size": list(proxy.size)}, f)
+            with self._lock:
+                self._evict(keep=key)
+        except Exception as e:
+            print(f"Proxy generation for {proxy.source} failed: {e}", file=sys.stderr)
+            proxy.status = "failed"
+            proxy.error = str(e)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+
+        proxy.status = "ready"
+        if self.on_ready is not None:
+            self.on_ready(proxy.source)
+
+    def _evict(self, keep: str):
+        """Removes least recently used proxies other than keep while over max_bytes."""
+        if not self.max_bytes:
+            return
+        entries = []
+        for entry in os.scandir(self.directory):
+            key, ext = os.path.splitext(entry.name)
+            # Proxies still being encoded start with a dot
+            if ext == ".mp4" and not key.startswith(".") and key != keep:
+                entries.append((entry.stat().st_mtime_ns, key))
+        total = sum(e.stat().st_size for e in os.scandir(self.directory) if e.is_file())
+        for _, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (self.directory / f"{key}.mp4", self.directory / f"{key}.json"):
+                try:
+                    total -= path.stat().st_size
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            # Clips already reading the proxy keep their open file
+            self._proxies.pop(key, None)
+
+    def list(self) -> list[Proxy]:
+        with self._lock:
+            return list(self._proxies.values())
@@ -0,0 +1,242 @@
+import copy
+import os
+import threading
+import time
+
+# A reader read more recently than this is taken to be serving a stream of
+# frames: a read elsewhere in its source gets another reader rather than
+# seeking it away
+STREAM_SECONDS = 1.0
+
+
+def _is_audio(reader) -> bool:
+    return hasattr(reader, "buffer_around")
+
+
+def _source_key(reader) -> tuple:
+    """What clips must agree on to share reader: the file as it is now and the decoding parameters."""
+    stat = os.stat(reader.filename)
+    source = (os.path.realpath(reader.filename), stat.st_mtime_ns, stat.st_size)
+    if _is_audio(reader):
+        return ("audio", *source, reader.fps, reader.nbytes, reader.nchannels, reader.buffersize)
+    return ("video", *source, tuple(reader.size), reader.pixel_format, reader.fps, reader.resize_algo)
+
+
+def _read_ahead(reader, t):
+    """How many frames reader has to decode to reach t, or None if it would have to restart."""
+    if reader.proc is None:
+        return None
+    if _is_audio(reader):
+        first = float(t.min()) if hasattr(t, "min") else float(t)
+        frame = int(reader.fps * first)
+        if reader.buffer is not None and 0 <= frame - reader.buffer_startframe < len(reader.buffer):
+            return 0
+        ahead = frame - reader.pos
+        return ahead if 0 <= ahead < reader.buffersize else None
+    # Mirrors FFMPEG_VideoReader.get_frame: up to 100 frames are skipped rather than seeked
+    ahead = reader.get_frame_number(t) + 1 - reader.pos
+    return ahead if 0 <= ahead <= 100 else None
+
+
+class _Source:
+    """The readers of one source, and the number of clips using them."""
+
+    def __init__(self, key, template):
+        self.key = key
+        self.template = template
+        self.guards = []
+        self.handles = 0
+
+
+class SharedReader:
+    """
+    Stands for a file reader in a clip (clip.reader). Each read is served by
+    a reader of the pool leased for the call; other attributes are those of
+    the reader the clip was opened with.
+    """
+
+    def __init__(self, pool, source: _Source):
+        self._pool = pool
+        self._source = source
+        self._closed = False
+
+    @property
+    def readers(self) -> list:
+        """The readers of the source, open or not."""
+        return [guard.reader for guard in self._source.guards]
+
+    def get_frame(self, t):
+        if self._closed:
+            # A copy of a closed clip is still being read: rejoin the pool
+            self._source = self._pool.reopen(self._source)
+            self._closed = False
+        return self._pool.read(self._source, t)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._pool.release(self._source)
+
+    def __del__(self):
+        self.close()
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self._source.template, attr)
+
+
+class ReaderPool:
+    """
+    Shares the ffmpeg readers of video and audio file clips between clips of
+    the same source (file, size, pixel format and sampling), and caps the
+    number of ffmpeg processes they keep alive.
+
+    Each read goes to the source's reader that can reach the requested time
+    by decoding ahead, so clips playing different parts of a source keep
+    their own warm readers. Otherwise a reader no longer streaming is
+    restarted at that time, or another one opened; at max_processes, the
+    least recently read reader of any source is closed first. Readers are
+    guarded by memory (see clip_memory.py), which also closes idle ones, and
+    reopen on their next read. A max_processes of 0 removes the cap.
+    """
+
+    def __init__(self, memory, max_processes: int = 0):
+        self.memory = memory
+        self.max_processes = max_processes
+        self.warm_reads = 0
+        self.restarts = 0
+        self.spawned = 0
+        self.evicted = 0
+        self._sources = {}
+        self._leased = set()
+        self._cond = threading.Condition()
+
+    def share(self, clip):
+        """Hands the file readers of clip and of its audio to the pool. Returns clip."""
+        for owner in (clip, getattr(clip, "audio", None)):
+            reader = getattr(owner, "reader", None)
+            if reader is not None and not isinstance(reader, SharedReader):
+                owner.reader = SharedReader(self, self._adopt(reader))
+        return clip
+
+    def _adopt(self, reader) -> _Source:
+        key = _source_key(reader)
+        with self._cond:
+            source = self._sources.get(key)
+            duplicate = source is not None
+            if not duplicate:
+                source = self._sources[key] = _Source(key, reader)
+                source.guards.append(self.memory.guard(reader))
+            source.handles += 1
+            self._trim()
+        if duplicate:
+            # The source is already open: the clip only needed this reader to probe it
+            reader.close()
+        return source
+
+    def reopen(self, source: _Source) -> _Source:
+        """Takes a released source back, or the source now open under its key."""
+        with self._cond:
+            source = self._sources.setdefault(source.key, source)
+            source.handles += 1
+            return source
+
+    def release(self, source: _Source):
+        """Called when a clip using source is closed; closes its readers once no clip uses them."""
+        with self._cond:
+            source.handles -= 1
+            if source.handles > 0:
+                return
+            if self._sources.get(source.key) is source:
+                del self._sources[source.key]
+            guards = list(source.guards)
+        for guard in guards:
+            guard.release()
+
+    def read(self, source: _Source, t):
+        with self._cond:
+            guard = self._lease(source, t)
+            self._leased.add(guard)
+        try:
+            return guard(t)
+        finally:
+            with self._cond:
+                self._leased.discard(guard)
+                self._cond.notify_all()
+
+    def _lease(self, source: _Source, t):
+        while True:
+            idle = [guard for guard in source.guards if guard not in self._leased]
+            warm = [(ahead, guard) for guard in idle if (ahead := _read_ahead(guard.reader, t)) is not None]
+            if warm:
+                self.warm_reads += 1
+                return min(warm, key=lambda w: w[0])[1]
+            opened = sorted((guard for guard in idle if guard.is_open), key=lambda guard: guard.last_used)
+            stale = [guard for guard in opened if time.monotonic() - guard.last_used > STREAM_SECONDS]
+            if stale:
+                self.restarts += 1
+                return stale[0]
+            if not self.max_processes or self._processes() < self.max_processes or self._evict():
+                closed = [guard for guard in idle if not guard.is_open]
+                return closed[0] if closed else self._spawn(source)
+            if opened:
+                self.restarts += 1
+                return opened[0]
+            # Every process is busy reading: wait for one to be returned
+            self._cond.wait()
+
+    def _spawn(self, source: _Source):
+        """Adds a closed copy of the source's reader; it opens at the time of its first read."""
+        reader = copy.copy(source.template)
+        state = vars(reader)
+        state.pop("get_frame", None)
+        state.pop("last_read", None)
+        reader.proc = None
+        if _is_audio(reader):
+            reader.buffer = None
+        guard = self.memory.guard(reader)
+        source.guards.append(guard)
+        self.spawned += 1
+        return guard
+
+    def _processes(self) -> int:
+        """Open readers, counting leased ones that are about to open."""
+        return sum(guard.is_open or guard in self._leased for source in self._sources.values() for guard in source.guards)
+
+    def _evict(self) -> bool:
+        """Closes the least recently read reader not in use. Returns whether one was closed."""
+        idle = [guard for source in self._sources.values() for guard in source.guards if guard.is_open and guard not in self._leased]
+        for guard in sorted(idle, key=lambda guard: guard.last_used):
+            if guard.release():
+                self.evicted += 1
+                return True
+        return False
+
+    def _trim(self):
+        if self.max_processes:
+            while self._processes() > self.max_processes and self._evict():
+                pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            sources = [
+                {
+                    "kind": source.key[0],
+                    "filename": source.key[1],
+                    "clips": source.handles,
+                    "readers": len(source.guards),
+                    "open_readers": sum(guard.is_open for guard in source.guards),
+                }
+                for source in self._sources.values()
+            ]
+            processes = self._processes()
+        return {
+            "processes": processes,
+            "max_processes": self.max_processes,
+            "warm_reads": self.warm_reads,
+            "restarts": self.restarts,
+            "spawned": self.spawned,
+            "evicted": self.evicted,
+            "sources": sources,
+        }
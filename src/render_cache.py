@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+
+def link_or_copy(source: str, target: str):
+    """Hardlinks source to target, copying instead across filesystems."""
+    if os.path.lexists(target):
+        os.unlink(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class RenderCache:
+    """
+    Disk-backed cache of rendered files, keyed by a hash of the clip graph
+    fingerprint and the encode settings. Entries are hardlinked (or copied)
+    to and from the requested output paths and evicted least recently used
+    first once the directory exceeds max_bytes. max_bytes = 0 disables it.
+    """
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(fingerprint: str, kind: str, extension: str, settings: dict) -> str:
+        payload = {"fingerprint": fingerprint, "kind": kind, "extension": extension.lower(), "settings": settings}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _entry(self, key: str, extension: str) -> Path:
+        return self.directory / f"{key}{extension.lower()}"
+
+    def fetch(self, key: str, target: str) -> bool:
+        """Puts the cached render for key at target. Returns False on a miss."""
+        if not self.enabled:
+            return False
+        entry = self._entry(key, os.path.splitext(target)[1])
+        with self._lock:
+            try:
+                link_or_copy(str(entry), target)
+                os.utime(entry)
+            except FileNotFoundError:
+                self.misses += 1
+                return False
+            self.hits += 1
+            return True
+
+    def lookup(self, key: str, extension: str):
+        """Returns the path of the cached file for key, or None on a miss."""
+        if not self.enabled:
+            return None
+        entry = self._entry(key, extension)
+        with self._lock:
+            try:
+                os.utime(entry)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry
+
+    def store(self, key: str, path: str):
+        """Adds a finished render to the cache and evicts old entries if over budget."""
+        if not self.enabled:
+            return
+        entry = self._entry(key, os.path.splitext(path)[1])
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Link under a temporary name so a concurrent fetch never sees a partial entry
+            tmp = entry.with_name(f".{entry.name}.{threading.get_ident()}")
+            link_or_copy(path, str(tmp))
+            os.replace(tmp, entry)
+            os.utime(entry)
+            self._evict()
+
+    def _entries(self) -> list[os.DirEntry]:
+        try:
+            return [e for e in os.scandir(self.directory) if e.is_file() and not e.name.startswith(".")]
+        except FileNotFoundError:
+            return []
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime_ns)
+        total = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.unlink(entry.path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "entries": len(entries),
+                "bytes": sum(e.stat().st_size for e in entries),
+                "max_bytes": self.max_bytes,
+                "directory": str(self.directory),
+            }
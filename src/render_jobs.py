@@ -0,0 +1,208 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from proglog import ProgressBarLogger
+
+
+FINISHED = ("completed", "failed", "cancelled")
+
+
+class RenderCancelled(Exception):
+    """Raised inside a running render when its job has been cancelled."""
+
+
+class JobProgressLogger(ProgressBarLogger):
+    """
+    Proglog logger handed to MoviePy's writers.
+    It turns the updates of one progress bar into the job's progress and
+    aborts the render at the next update once the job has been cancelled.
+    """
+
+    def __init__(self, job, bar_name: str):
+        super().__init__(logged_bars=False)
+        self.job = job
+        self.bar_name = bar_name
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if self.job.cancel_requested.is_set():
+            raise RenderCancelled(f"Render job {self.job.job_id} was cancelled.")
+        if bar == self.bar_name and attr == "index":
+            total = self.bars[bar]["total"]
+            if total:
+                self.job.progress = min(1.0, max(0.0, value / total))
+
+
+class RenderJob:
+    """State of a single queued, running or finished render."""
+
+    def __init__(self, kind: str, clip_id: str, output_path: str, session: str = None):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.clip_id = clip_id
+        self.output_path = output_path
+        # Where the render writes, next to output_path (with its extension,
+        # which picks the format); moved over output_path once complete
+        directory, name = os.path.split(output_path)
+        stem, ext = os.path.splitext(name)
+        self.partial_path = os.path.join(directory, f".{stem}.{self.job_id[:8]}.partial{ext}")
+        # ID of the session that submitted the job
+        self.session = session
+        self.status = "queued"
+        self.progress = 0.0
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = threading.Event()
+        self.future = None
+        # True when the output was served from the render cache
+        self.cached = False
+
+    @property
+    def eta(self):
+        """Estimated seconds until completion, or None if it cannot be estimated yet."""
+        if self.status != "running" or not self.progress:
+            return None
+        elapsed = time.time() - self.started_at
+        return elapsed * (1.0 - self.progress) / self.progress
+
+    def to_dict(self) -> dict:
+        eta = self.eta
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "clip_id": self.clip_id,
+            "status": self.status,
+            "progress": round(self.progress * 100, 1),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "output_path": self.output_path,
+            "error": self.error,
+            "cached": self.cached,
+        }
+
+
+class RenderJobManager:
+    """
+    Runs renders on a bounded pool of worker threads so that MCP tools can
+    return a job ID immediately instead of blocking for the whole encode.
+
+    Finished (completed, failed or cancelled) jobs are forgotten ttl seconds
+    after they finish, and beyond the max_finished most recent ones; 0
+    disables either limit.
+    """
+
+    def __init__(self, max_workers: int = 2, ttl: float = 3600, max_finished: int = 100):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, kind: str, clip_id: str, output_path: str, render_func, progress_bar: str = "frame_index", session: str = None
+    ) -> RenderJob:
+        """
+        Queues render_func(logger, path) and returns its job.
+        render_func must write its output to path, a temporary sibling of
+        output_path moved over it once the render completes, so a failed or
+        cancelled render leaves output_path as it was. It must pass the
+        given proglog logger to the MoviePy writer so that progress and
+        cancellation work.
+        """
+        job = RenderJob(kind, clip_id, output_path, session)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        job.future = self._executor.submit(self._run, job, render_func, progress_bar)
+        return job
+
+    def add_cached(self, kind: str, clip_id: str, output_path: str, session: str = None) -> RenderJob:
+        """Records a render that was served from the render cache as a completed job."""
+        job = RenderJob(kind, clip_id, output_path, session)
+        job.status = "completed"
+        job.progress = 1.0
+        job.cached = True
+        job.started_at = job.finished_at = job.submitted_at
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        return job
+
+    def _prune(self):
+        # Called with the lock held
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status in FINISHED and job.finished_at is not None),
+            key=lambda job: job.finished_at,
+        )
+        excess = len(finished) - self.max_finished if self.max_finished else 0
+        deadline = time.time() - self.ttl if self.ttl else None
+        for i, job in enumerate(finished):
+            if i < excess or (deadline is not None and job.finished_at < deadline):
+                del self._jobs[job.job_id]
+
+    def _run(self, job: RenderJob, render_func, progress_bar: str):
+        if job.cancel_requested.is_set():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            render_func(JobProgressLogger(job, progress_bar), job.partial_path)
+            os.replace(job.partial_path, job.output_path)
+        except RenderCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            print(f"Render job {job.job_id} failed: {e}", file=sys.stderr)
+            job.status = "failed"
+            job.error = str(e)
+        else:
+            job.status = "completed"
+            job.progress = 1.0
+        finally:
+            self._remove_partial_output(job)
+            job.finished_at = time.time()
+
+    @staticmethod
+    def _remove_partial_output(job: RenderJob):
+        # Only what the job wrote itself: output_path is only ever replaced by a complete render
+        try:
+            os.remove(job.partial_path)
+        except OSError:
+            pass
+
+    def get(self, job_id: str, session: str = None) -> RenderJob:
+        """Retrieves a job by ID. Raises ValueError if not found, or if session is given and did not submit it."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (session is not None and job.session != session):
+            raise ValueError(f"Render job with ID {job_id} not found.")
+        return job
+
+    def list(self, session: str = None) -> list[RenderJob]:
+        """All jobs, or those submitted by session."""
+        with self._lock:
+            self._prune()
+            return [job for job in self._jobs.values() if session is None or job.session == session]
+
+    def active(self, session: str = None) -> int:
+        """Number of queued and running jobs (of session, if given)."""
+        return sum(job.status in ("queued", "running") for job in self.list(session))
+
+    def cancel(self, job_id: str, session: str = None) -> RenderJob:
+        """
+        Cancels a job. Queued jobs never start; running jobs stop at the next
+        progress update from the writer.
+        """
+        job = self.get(job_id, session)
+        if job.status in FINISHED:
+            return job
+        job.cancel_requested.set()
+        if job.future is not None and job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        return job
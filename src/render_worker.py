@@ -0,0 +1,55 @@
+"""
+Entry point of the worker processes of segmented renders (see
+segment_render.py). Workers never inherit the server process: they are
+forked from a forkserver, a fresh single-threaded process started once,
+which preloads this module, MoviePy and the module defining the clip graph
+operations. Each worker then only rebuilds its clip, instead of importing
+the server (FastMCP and all) again.
+"""
+
+# (clip, fps, write options, frames done, cancelled) of this worker
+_STATE = None
+
+
+def frame_times(duration: float, fps: float):
+    """
+    Times of the frames of a clip, as clip.iter_frames (and so MoviePy's
+    writers) computes them: int(duration * fps) frames, the last one
+    dropped when duration * fps is not integral, at frame_index / fps.
+    """
+    import numpy as np
+
+    return np.arange(0, int(duration * fps)) / fps
+
+
+def init(clip_factory, fps, write_options, frames_done, cancelled):
+    """Builds the clip once per worker."""
+    global _STATE
+    _STATE = (clip_factory(), fps, write_options, frames_done, cancelled)
+
+
+def render_segment(start_frame: int, end_frame: int, path: str) -> str:
+    """Encodes frames [start_frame, end_frame) of the worker's clip to path."""
+    from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+    import numpy as np
+
+    clip, fps, write_options, frames_done, cancelled = _STATE
+
+    has_mask = clip.mask is not None
+    with FFMPEG_VideoWriter(path, clip.size, fps, with_mask=has_mask, **write_options) as writer:
+        # Same timestamps as clip.iter_frames, so the output matches a serial render
+        for t in frame_times(clip.duration, fps)[start_frame:end_frame]:
+            if cancelled.is_set():
+                raise RuntimeError("Segment render cancelled.")
+            frame = clip.get_frame(t)
+            if frame.dtype != "uint8":
+                frame = frame.astype("uint8")
+            if has_mask:
+                mask = 255 * clip.mask.get_frame(t)
+                if mask.dtype != "uint8":
+                    mask = mask.astype("uint8")
+                frame = np.dstack([frame, mask])
+            writer.write_frame(frame)
+            with frames_done.get_lock():
+                frames_done.value += 1
+    return path
@@ -0,0 +1,148 @@
+import subprocess as sp
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .segment_render import split_frames
+except ImportError:
+    from segment_render import split_frames
+
+# Frames are analysed at this size: luminance and colour distribution survive
+# the area downscale, and it makes the decode and the NumPy work ~400x smaller than 720p
+ANALYSIS_SIZE = (64, 36)
+HISTOGRAM_BINS = 16
+METHODS = ("luminance", "histogram")
+# Time ranges shorter than this are not worth a decoder of their own
+MIN_RANGE_SECONDS = 30
+
+
+def frame_features(frames, method: str = "luminance"):
+    """
+    Features of a block of frames of shape (n, h, w, 3): the summed RGB
+    luminosity of each frame (what MoviePy's detect_scenes compares), or a
+    normalised HISTOGRAM_BINS-bin histogram of its grey levels.
+    """
+    import numpy as np
+
+    n = len(frames)
+    if method == "luminance":
+        return frames.reshape(n, -1).sum(axis=1, dtype=np.uint64).astype(float)
+    if method == "histogram":
+        grey = frames.reshape(n, -1, 3).mean(axis=2, dtype=np.float32)
+        bins = np.minimum((grey * (HISTOGRAM_BINS / 256)).astype(np.int64), HISTOGRAM_BINS - 1)
+        # One bincount for the whole block: frame i uses bins [i * BINS, (i + 1) * BINS)
+        bins += np.arange(n)[:, None] * HISTOGRAM_BINS
+        counts = np.bincount(bins.ravel(), minlength=n * HISTOGRAM_BINS).reshape(n, HISTOGRAM_BINS)
+        return counts / grey.shape[1]
+    raise ValueError(f"Unknown scene detection method '{method}'. Use one of {', '.join(METHODS)}.")
+
+
+def _decode_range(source: str, fps: float, start_frame: int, end_frame: int, method: str, block: int = 256):
+    """Features of frames [start_frame, end_frame) of a video file, decoded by ffmpeg at ANALYSIS_SIZE."""
+    import numpy as np
+    from moviepy.config import FFMPEG_BINARY
+
+    w, h = ANALYSIS_SIZE
+    frame_bytes = w * h * 3
+    # Converting to RGB inside the filter graph keeps the colour conversion
+    # identical whether or not the decoder started with a seek
+    cmd = [
+        FFMPEG_BINARY, "-loglevel", "error", "-ss", f"{start_frame / fps:.6f}", "-i", source,
+        "-frames:v", str(end_frame - start_frame), "-an",
+        "-vf", f"scale={w}:{h}:flags=area,format=rgb24", "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+    ]
+    proc = sp.Popen(cmd, stdout=sp.PIPE, stderr=sp.PIPE)
+    features = []
+    try:
+        while True:
+            data = proc.stdout.read(block * frame_bytes)
+            n = len(data) // frame_bytes
+            if n:
+                frames = np.frombuffer(data, np.uint8, count=n * frame_bytes).reshape(n, h, w, 3)
+                features.append(frame_features(frames, method))
+            if len(data) < block * frame_bytes:
+                break
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise IOError(f"Could not decode {source}: {stderr.decode(errors='replace').strip()}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if not features:
+        return np.empty((0,) if method == "luminance" else (0, HISTOGRAM_BINS))
+    return np.concatenate(features)
+
+
+def file_features(source: str, fps: float, n_frames: int, method: str = "luminance", workers: int = 1):
+    """
+    Features of the first n_frames frames of a video file. Long files are
+    split into time ranges decoded by parallel ffmpeg processes.
+    """
+    import numpy as np
+
+    n_ranges = max(1, min(workers, n_frames // max(1, round(MIN_RANGE_SECONDS * fps))))
+    ranges = split_frames(n_frames, n_ranges)
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        parts = list(executor.map(lambda r: _decode_range(source, fps, r[0], r[1], method), ranges))
+    return np.concatenate(parts)[:n_frames]
+
+
+def clip_features(clip, fps: float, method: str = "luminance", block: int = 64):
+    """Features of the frames of any clip, downscaled to ANALYSIS_SIZE before they are compared."""
+    import cv2
+    import numpy as np
+
+    features, frames = [], []
+    for frame in clip.iter_frames(fps=fps, dtype="uint8"):
+        frames.append(cv2.resize(frame[:, :, :3], ANALYSIS_SIZE, interpolation=cv2.INTER_AREA))
+        if len(frames) == block:
+            features.append(frame_features(np.stack(frames), method))
+            frames = []
+    if frames:
+        features.append(frame_features(np.stack(frames), method))
+    if not features:
+        return np.empty((0,) if method == "luminance" else (0, HISTOGRAM_BINS))
+    return np.concatenate(features)
+
+
+def find_cuts(features, fps: float, duration: float, threshold: float = 10):
+    """
+    Cuts where the change between consecutive frames exceeds threshold times
+    the average change, as in MoviePy's detect_scenes. Returns the scenes
+    [(start, end), ...] and a confidence per cut: 1 - threshold * average / change,
+    0 at the threshold and approaching 1 for the sharpest cuts.
+    """
+    import numpy as np
+
+    if len(features) < 2:
+        return [(0, duration)], []
+    diffs = np.abs(np.diff(features, axis=0))
+    if diffs.ndim > 1:
+        diffs = diffs.sum(axis=1)
+    limit = threshold * diffs.mean()
+    jumps = np.nonzero(diffs > limit)[0]
+    confidences = [float(1 - limit / diffs[i]) for i in jumps]
+    timings = [0] + [float((i + 1) / fps) for i in jumps] + [duration]
+    return list(zip(timings, timings[1:])), confidences
+
+
+def detect_scenes(clip, source: str = None, fps: float = None, threshold: float = 10,
+                  method: str = "luminance", workers: int = 1):
+    """
+    Detects the scenes of clip. If source is given it is the video file the
+    clip plays unchanged, and its native frames are decoded from it directly
+    instead of being rendered by the clip (unless a different fps is asked
+    for). Returns (scenes, confidences) as find_cuts.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown scene detection method '{method}'. Use one of {', '.join(METHODS)}.")
+    clip_fps = getattr(clip, "fps", None)
+    fps = fps or clip_fps
+    if not fps:
+        raise ValueError("The clip has no fps: pass fps explicitly.")
+    n_frames = int(clip.duration * fps)
+    if source is not None and fps == clip_fps:
+        features = file_features(source, fps, n_frames, method, workers)
+    else:
+        features = clip_features(clip, fps, method)
+    return find_cuts(features, fps, clip.duration, threshold)
@@ -0,0 +1,154 @@
+import multiprocessing
+import os
+import shutil
+import subprocess as sp
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+
+try:
+    from . import render_worker
+except ImportError:
+    import render_worker
+
+# The forkserver's preloaded modules are fixed when it starts, on first use
+_CONTEXT = None
+_CONTEXT_LOCK = threading.Lock()
+
+
+def split_frames(n_frames: int, n_segments: int) -> list[tuple[int, int]]:
+    """
+    Splits frame indices [0, n_frames) into at most n_segments contiguous
+    (start, end) ranges of near-equal length.
+    """
+    n_segments = max(1, min(n_segments, n_frames))
+    bounds = [round(i * n_frames / n_segments) for i in range(n_segments + 1)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _worker_context(preload: list[str]):
+    """
+    The multiprocessing context workers are started from: a forkserver
+    preloading render_worker, numpy, MoviePy and the preload modules where
+    available, so starting a worker is a cheap fork of a process that has
+    no threads. Elsewhere, spawn.
+    """
+    global _CONTEXT
+    with _CONTEXT_LOCK:
+        if _CONTEXT is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                _CONTEXT = multiprocessing.get_context("forkserver")
+                _CONTEXT.set_forkserver_preload([render_worker.__name__, "numpy", "moviepy", *preload])
+            else:
+                _CONTEXT = multiprocessing.get_context("spawn")
+        return _CONTEXT
+
+
+def concat_segments(segment_paths: list[str], filename: str, audiofile: str = None):
+    """Joins encoded segments (and optionally an audio track) without re-encoding."""
+    from moviepy.config import FFMPEG_BINARY
+
+    list_path = os.path.join(os.path.dirname(segment_paths[0]), "segments.txt")
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            escaped = path.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = [FFMPEG_BINARY, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audiofile is not None:
+        cmd.extend(["-i", audiofile, "-map", "0:v", "-map", "1:a"])
+    cmd.extend(["-c", "copy", filename])
+
+    result = sp.run(cmd, stdout=sp.DEVNULL, stderr=sp.PIPE)
+    if result.returncode != 0:
+        raise IOError(f"ffmpeg failed to join segments into {filename}:\n{result.stderr.decode(errors='replace')}")
+
+
+def render_segments(
+    clip,
+    filename: str,
+    clip_factory,
+    fps: float = None,
+    codec: str = "libx264",
+    audio_codec: str = "aac",
+    audio_fps: int = 44100,
+    bitrate: str = None,
+    preset: str = "medium",
+    threads: int = None,
+    segments: int = 2,
+    workers: int = None,
+    logger=None,
+    preload: list[str] = (),
+):
+    """
+    Renders a clip by splitting its timeline into time segments that are
+    encoded in parallel worker processes, then joined with ffmpeg's concat
+    demuxer without re-encoding. The frames are those clip.write_videofile
+    would write. The audio track is encoded once, at audio_fps, in this
+    process, while the workers run.
+
+    clip_factory is a picklable callable returning an equivalent of clip
+    (e.g. rebuilding it from its clip graph), called once in each worker;
+    preload names the modules it needs, imported once for all workers (see
+    render_worker.py). Clips that cannot be rebuilt must be rendered
+    serially.
+
+    logger is an optional proglog logger; progress is reported on its
+    "frame_index" bar, like MoviePy's own writers.
+    """
+    from moviepy.tools import find_extension
+
+    fps = fps or getattr(clip, "fps", None)
+    if not fps:
+        raise ValueError("No fps specified and the clip has no fps attribute.")
+    if clip.duration is None:
+        raise ValueError("Cannot render a clip without a duration.")
+
+    n_frames = len(render_worker.frame_times(clip.duration, fps))
+    ranges = split_frames(n_frames, segments)
+    workers = min(workers or os.cpu_count() or 1, len(ranges))
+    ext = os.path.splitext(filename)[1] or ".mp4"
+
+    tmpdir = tempfile.mkdtemp(prefix=".segments_", dir=os.path.dirname(filename))
+    ctx = _worker_context(list(preload))
+    frames_done = ctx.Value("i", 0)
+    cancelled = ctx.Event()
+    write_options = {"codec": codec, "preset": preset, "bitrate": bitrate, "threads": threads}
+    segment_paths = [os.path.join(tmpdir, f"segment_{i:04d}{ext}") for i in range(len(ranges))]
+
+    try:
+        if logger is not None:
+            logger(frame_index__total=n_frames)
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=render_worker.init,
+            initargs=(clip_factory, fps, write_options, frames_done, cancelled),
+        ) as pool:
+            try:
+                futures = [
+                    pool.submit(render_worker.render_segment, start, end, path)
+                    for (start, end), path in zip(ranges, segment_paths)
+                ]
+
+                audiofile = None
+                if clip.audio is not None:
+                    audiofile = os.path.join(tmpdir, "audio." + find_extension(audio_codec))
+                    clip.audio.write_audiofile(audiofile, fps=audio_fps, codec=audio_codec, logger=logger)
+
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.25, return_when=FIRST_EXCEPTION)
+                    for future in done:
+                        future.result()
+                    if logger is not None:
+                        logger(frame_index__index=frames_done.value)
+            except BaseException:
+                cancelled.set()
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+
+        concat_segments(segment_paths, filename, audiofile)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
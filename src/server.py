@@ -1,27 +1,165 @@
 from pathlib import Path
 from fastmcp import FastMCP, Client
-from moviepy import *
-from moviepy.video.tools.drawing import color_gradient, color_split
-from moviepy.video.tools.cuts import detect_scenes, find_video_period
-from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
-from moviepy.video.tools.subtitles import file_to_subtitles, SubtitlesClip
-from moviepy.video.tools.credits import CreditsClip
 import os
 import ast
+import json
+import gc
+import time
+import asyncio
 import uuid
-import numpy as np
-import numexpr
-from custom_fx import *
+import weakref
+import functools
+from contextlib import contextmanager
 from typing import Any
 from mcp_ui.core import create_ui_resource, UIMetadataKey
 try:
-    from .config import MAX_CLIPS, OUTPUT_DIR
+    from .config import MAX_CLIPS, OUTPUT_DIR, RENDER_WORKERS, RENDER_JOB_TTL_SECONDS, MAX_FINISHED_RENDER_JOBS, RENDER_PROCESSES, ANALYSIS_WORKERS, ANALYSIS_DIR, ANALYSIS_STORE_MAX_BYTES, RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES, FRAME_CACHE_MAX_BYTES, WARP_CACHE_MAX_BYTES, PROXY_DIR, PROXY_HEIGHT, PROXY_MAX_BYTES, CLIP_MEMORY_MAX_BYTES, CLIP_IDLE_SECONDS, MAX_READER_PROCESSES, RECENT_CLIPS, SESSION_MAX_BYTES, SESSION_MAX_RENDERS, SESSION_MAX_CPU_SECONDS, SESSION_CPU_WINDOW_SECONDS, SESSION_IDLE_SECONDS, MAX_SESSIONS, MAX_TOTAL_CLIPS, HEAVY_TOOL_WORKERS
+    from .render_jobs import RenderJobManager
+    from .render_cache import RenderCache
+    from .frame_cache import FrameCache
+    from .clip_memory import ClipMemory
+    from .reader_pool import ReaderPool
+    from .clip_gc import ClipCollector
+    from .sessions import DEFAULT_SESSION, FairScheduler, Session, SessionManager
+    from .proxies import ProxyManager
+    from .segment_render import render_segments
+    from .scene_detect import detect_scenes
+    from .analysis_store import AnalysisStore, content_digest
+    from .clip_graph import ClipGraph, current_build, current_operation, rebuild_clip
+    from .lazy import LazyAttribute, lazy_import
 except ImportError:
-    from config import MAX_CLIPS, OUTPUT_DIR
+    from config import MAX_CLIPS, OUTPUT_DIR, RENDER_WORKERS, RENDER_JOB_TTL_SECONDS, MAX_FINISHED_RENDER_JOBS, RENDER_PROCESSES, ANALYSIS_WORKERS, ANALYSIS_DIR, ANALYSIS_STORE_MAX_BYTES, RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES, FRAME_CACHE_MAX_BYTES, WARP_CACHE_MAX_BYTES, PROXY_DIR, PROXY_HEIGHT, PROXY_MAX_BYTES, CLIP_MEMORY_MAX_BYTES, CLIP_IDLE_SECONDS, MAX_READER_PROCESSES, RECENT_CLIPS, SESSION_MAX_BYTES, SESSION_MAX_RENDERS, SESSION_MAX_CPU_SECONDS, SESSION_CPU_WINDOW_SECONDS, SESSION_IDLE_SECONDS, MAX_SESSIONS, MAX_TOTAL_CLIPS, HEAVY_TOOL_WORKERS
+    from render_jobs import RenderJobManager
+    from render_cache import RenderCache
+    from frame_cache import FrameCache
+    from clip_memory import ClipMemory
+    from reader_pool import ReaderPool
+    from clip_gc import ClipCollector
+    from sessions import DEFAULT_SESSION, FairScheduler, Session, SessionManager
+    from proxies import ProxyManager
+    from segment_render import render_segments
+    from scene_detect import detect_scenes
+    from analysis_store import AnalysisStore, content_digest
+    from clip_graph import ClipGraph, current_build, current_operation, rebuild_clip
+    from lazy import LazyAttribute, lazy_import
+
+# MoviePy, numpy and the effects (with OpenCV, PIL and numexpr) are only
+# imported by the first tool that uses them, so starting a server is cheap
+moviepy = lazy_import("moviepy")
+np = lazy_import("numpy")
+import custom_fx
+from custom_fx import WARP_CACHE
+
+(
+    VideoClip, ImageClip, ColorClip, TextClip, VideoFileClip, ImageSequenceClip, CompositeVideoClip,
+    AudioFileClip, CompositeAudioClip, clips_array, concatenate_videoclips, concatenate_audioclips, vfx, afx,
+) = (LazyAttribute(moviepy, name) for name in (
+    "VideoClip", "ImageClip", "ColorClip", "TextClip", "VideoFileClip", "ImageSequenceClip", "CompositeVideoClip",
+    "AudioFileClip", "CompositeAudioClip", "clips_array", "concatenate_videoclips", "concatenate_audioclips", "vfx", "afx",
+))
 
 mcp = FastMCP("moviepy-mcp")
 
+# Clips of the default session (see SESSIONS below)
 CLIPS = {}
+# Declarative record of how every clip was made; see clip_graph.py
+CLIP_GRAPH = ClipGraph()
+# Unloads intermediate clips no named or recent clip is made from; see clip_gc.py
+CLIP_COLLECTOR = ClipCollector(CLIP_GRAPH, RECENT_CLIPS)
+# Module render workers import to replay the graph (see render_worker.py)
+GRAPH_MODULE = "server" if __name__ == "__main__" else __name__
+RENDER_JOBS = RenderJobManager(RENDER_WORKERS, RENDER_JOB_TTL_SECONDS, MAX_FINISHED_RENDER_JOBS)
+RENDER_CACHE = RenderCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES)
+FRAME_CACHE = FrameCache(FRAME_CACHE_MAX_BYTES)
+# Memory and file readers held by the clips of all sessions; see clip_memory.py
+CLIP_MEMORY = ClipMemory(CLIP_MEMORY_MAX_BYTES, CLIP_IDLE_SECONDS)
+# ffmpeg readers of file clips, shared by the clips of each source
+READER_POOL = ReaderPool(CLIP_MEMORY, MAX_READER_PROCESSES)
+# Results of analysis tools and effects, kept across restarts
+ANALYSES = AnalysisStore(ANALYSIS_DIR, ANALYSIS_STORE_MAX_BYTES)
+# Sampling maps of the geometric effects, shared by all clips
+WARP_CACHE.max_bytes = WARP_CACHE_MAX_BYTES
+
+
+def _new_session(session_id: str) -> Session:
+    # Sessions replay the same operations into graphs of their own
+    graph = ClipGraph(CLIP_GRAPH.operations)
+    return Session(session_id, graph, ClipCollector(graph, RECENT_CLIPS))
+
+def _close_session(session: Session):
+    """Closes the clips of an expired session."""
+    with session.lock:
+        clips = list(session.clips.values())
+        session.clips.clear()
+    for clip in clips:
+        try:
+            clip.close()
+        except Exception:
+            pass
+    gc.collect()
+
+# Each MCP client and web UI user works in a session of its own: its clips,
+# clip graph and collector, with quotas on clips, memory, renders and CPU time.
+# CLIPS, CLIP_GRAPH and CLIP_COLLECTOR are those of the default session, used
+# outside of any client session; see sessions.py
+SESSIONS = SessionManager(
+    Session(DEFAULT_SESSION, CLIP_GRAPH, CLIP_COLLECTOR, CLIPS), _new_session, SESSION_IDLE_SECONDS, _close_session,
+    max_sessions=MAX_SESSIONS,
+)
+# Runs heavy analysis tools, shared fairly between sessions
+HEAVY_TOOLS = FairScheduler(HEAVY_TOOL_WORKERS, SESSION_CPU_WINDOW_SECONDS)
+
+
+async def _bind_session(context, call_next):
+    """FastMCP middleware handling each request in the session of the client that sent it."""
+    fastmcp_context = context.fastmcp_context
+    session_id = None
+    # No session yet while the client initializes
+    if fastmcp_context is not None and fastmcp_context.request_context is not None:
+        session_id = fastmcp_context.session_id
+        # HTTP clients send their session ID back in a header: never let one name the default session
+        if session_id == DEFAULT_SESSION:
+            raise ValueError(f"Session ID '{DEFAULT_SESSION}' is reserved.")
+    with SESSIONS.bind(session_id):
+        return await call_next(context)
+
+mcp.add_middleware(_bind_session)
+
+
+def _reload_with_proxy(source: str):
+    """Unloads clips built from source so they are rebuilt from its new proxy on next use."""
+    source = os.path.realpath(source)
+    for session in SESSIONS.list():
+        graph = session.graph
+        with session.lock:
+            stale = [
+                clip_id for clip_id in list(session.clips)
+                if graph.is_rebuildable(clip_id) and any(
+                    graph.nodes[cid].op == "video_file_clip"
+                    and os.path.realpath(graph.nodes[cid].params["filename"]) == source
+                    for cid in graph.ancestors(clip_id)
+                )
+            ]
+            for clip_id in stale:
+                unload_clip(session, clip_id)
+        # Their frames were decoded from the original
+        FRAME_CACHE.discard(stale)
+    # Readers of dropped clips sit in reference cycles (clip <-> frame_function)
+    gc.collect()
+
+PROXIES = ProxyManager(PROXY_DIR, PROXY_HEIGHT, PROXY_MAX_BYTES, on_ready=_reload_with_proxy)
+# Operations with no pixel coordinates among their parameters that treat all
+# pixels alike and return a copy of their input clip: they get proxy clips at
+# proxy resolution (see get_clip), so chains of them over a proxy, as in
+# previews and thumbnails, process small frames
+PROXY_RESOLUTION_OPS = frozenset({
+    "set_audio", "set_start", "set_end", "set_duration", "subclip",
+    "vfx_accel_decel", "vfx_black_white", "vfx_blink", "vfx_cross_fade_in", "vfx_cross_fade_out",
+    "vfx_fade_in", "vfx_fade_out", "vfx_gamma_correction", "vfx_invert_colors", "vfx_loop",
+    "vfx_lum_contrast", "vfx_mirror_x", "vfx_mirror_y", "vfx_multiply_color", "vfx_multiply_speed",
+    "vfx_time_mirror", "afx_audio_delay", "afx_audio_fade_in", "afx_audio_fade_out", "afx_audio_loop",
+    "afx_audio_normalize", "afx_multiply_stereo_volume", "afx_multiply_volume",
+})
 
 
 try:
@@ -65,53 +203,387 @@ def validate_path(filename: str) -> str:
     return str(path)
 
 def register_clip(clip):
-    """Registers a clip in the global state and returns its ID."""
-    if len(CLIPS) >= MAX_CLIPS:
-        raise RuntimeError(f"Maximum number of clips ({MAX_CLIPS}) reached. Delete some clips first.")
+    """Registers a clip in the current session and returns its ID."""
+    build = current_build()
+    if build is not None:
+        # Replaying a graph node: hand the clip to the build instead
+        clip_id = build.register(clip)
+        # Final-output builds use original media, so their frames are cached apart from previews
+        FRAME_CACHE.attach(clip, clip_id if build.preview else f"{clip_id}:original")
+        return clip_id
+    session = SESSIONS.current()
+    with session.lock:
+        return _register_clip(session, clip)
+
+def _register_clip(session: Session, clip) -> str:
+    _make_room(session, clip)
     clip_id = str(uuid.uuid4())
-    CLIPS[clip_id] = clip
+    session.clips[clip_id] = FRAME_CACHE.attach(clip, clip_id)
+    session.graph.record(clip_id)
+    session.collector.touch(clip_id)
     return clip_id
 
+def _make_room(session: Session, clip):
+    """
+    Admits clip among the loaded clips of session within MAX_CLIPS,
+    MAX_TOTAL_CLIPS and the memory budgets, unloading intermediate clips if
+    needed. Raises RuntimeError if it does not fit. Called with the session lock held.
+    """
+    if len(session.clips) >= MAX_CLIPS:
+        reclaim_clips()
+    if len(session.clips) >= MAX_CLIPS:
+        reclaim_clips(ancestors=True)
+    if len(session.clips) >= MAX_CLIPS:
+        raise RuntimeError(f"Maximum number of clips ({MAX_CLIPS}) reached. Delete some clips first.")
+    if MAX_TOTAL_CLIPS and len(SESSIONS.all_clips()) >= MAX_TOTAL_CLIPS:
+        reclaim_clips(ancestors=True)
+    if MAX_TOTAL_CLIPS and len(SESSIONS.all_clips()) >= MAX_TOTAL_CLIPS:
+        raise RuntimeError(f"Maximum number of clips of all sessions ({MAX_TOTAL_CLIPS}) reached. Try again later.")
+    try:
+        admit_clip(clip, session)
+    except RuntimeError:
+        if not reclaim_clips():
+            raise
+        admit_clip(clip, session)
+
+def admit_clip(clip, session: Session):
+    """Admits clip to CLIP_MEMORY within the memory budget of its session, then within that of all sessions."""
+    CLIP_MEMORY.admit(clip, session.clips, max_bytes=SESSION_MAX_BYTES)
+    return CLIP_MEMORY.admit(clip, SESSIONS.all_clips())
+
+def reclaim_clips(ancestors: bool = False) -> list[str]:
+    """Unloads intermediate clips of the current session (see ClipCollector.collect). Returns their IDs."""
+    session = SESSIONS.current()
+    with session.lock:
+        collected = session.collector.collect(session.clips, ancestors)
+    if collected:
+        # Readers of dropped clips sit in reference cycles (clip <-> frame_function)
+        gc.collect()
+    return collected
+
+def unload_clip(session: Session, clip_id: str):
+    """
+    Drops a loaded clip of session; its node stays in the graph. Clips share
+    readers and audio with the clips they are made from and made into: only
+    standalone clips are closed, the others (and their READER_POOL handles)
+    are released once nothing uses them.
+    """
+    clip = session.clips.pop(clip_id, None)
+    node = session.graph.nodes.get(clip_id)
+    if clip is not None and (node is None or not (node.inputs or session.graph.dependants(clip_id))):
+        try:
+            clip.close()
+        except Exception:
+            pass
+
 def get_clip(clip_id: str):
-    """Retrieves a clip by ID. Raises ValueError if not found."""
-    if clip_id not in CLIPS:
-        raise ValueError(f"Clip with ID {clip_id} not found.")
-    return CLIPS[clip_id]
+    """Retrieves a clip by ID, rebuilding it from the clip graph if needed. Raises ValueError if not found."""
+    build = current_build()
+    if build is not None:
+        clip = build.get(clip_id)
+    else:
+        session = SESSIONS.current()
+        with session.lock:
+            if clip_id not in session.clips:
+                node = session.graph.nodes.get(clip_id)
+                if node is None or node.deleted:
+                    raise ValueError(f"Clip with ID {clip_id} not found.")
+                clip = session.graph.build(clip_id, resolve=session.clips.get, preview=True)
+                # Rebuilt clips (e.g. of an imported graph) count against the same limits as new ones
+                _make_room(session, clip)
+                session.clips[clip_id] = clip
+            else:
+                CLIP_MEMORY.release_idle()
+            session.collector.touch(clip_id)
+            clip = session.clips[clip_id]
+    if current_operation() in PROXY_RESOLUTION_OPS:
+        return clip
+    return at_source_size(clip)
+
+def at_source_size(clip):
+    """
+    clip scaled up to the size of its source media if it plays a proxy at
+    proxy resolution (see video_file_clip), else clip itself. Only the frames
+    actually read are scaled.
+    """
+    size = vars(clip).get("proxy_size")
+    if size is None:
+        return clip
+    # Copies of clip inherit the attribute: the cached copy is only valid for clip itself
+    cached = vars(clip).get("_at_source_size")
+    if cached is not None and cached[0]() is clip:
+        return cached[1]
+    import cv2
+    scaled = clip.image_transform(lambda frame: cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR), apply_to=["mask"])
+    scaled.proxy_size = None
+    clip._at_source_size = (weakref.ref(clip), scaled)
+    return scaled
+
+def check_cpu_budget(session: Session):
+    """Raises RuntimeError if session used up its CPU time (SESSION_MAX_CPU_SECONDS per SESSION_CPU_WINDOW_SECONDS)."""
+    if SESSION_MAX_CPU_SECONDS and session.cpu_used(SESSION_CPU_WINDOW_SECONDS) >= SESSION_MAX_CPU_SECONDS:
+        raise RuntimeError(
+            f"CPU budget ({SESSION_MAX_CPU_SECONDS} CPU-seconds per {SESSION_CPU_WINDOW_SECONDS} seconds) used up. "
+            "Try again later."
+        )
+
+def heavy_tool(func):
+    """
+    Runs a tool making a full pass over a clip on HEAVY_TOOLS rather than on
+    the server's event loop, so it neither stalls the other clients nor lets
+    one session's calls hold back those of the others.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        session = SESSIONS.current()
+        check_cpu_budget(session)
+        return await asyncio.wrap_future(HEAVY_TOOLS.submit(session, functools.partial(func, *args, **kwargs)))
+
+    return wrapper
+
+def submit_render(kind: str, clip_id: str, filename: str, settings: dict, render, progress_bar: str = "frame_index") -> dict:
+    """
+    Serves a render from the render cache when the same clip graph was already
+    rendered with the same settings; otherwise queues render(logger, path) as a
+    render job and caches its output. Returns the job as a dict. Each session
+    has at most SESSION_MAX_RENDERS jobs queued or running, and the CPU time
+    of its renders counts against its CPU budget.
+    """
+    session = SESSIONS.current()
+    key = None
+    fingerprint = session.graph.fingerprint(clip_id)
+    if fingerprint is not None:
+        key = RENDER_CACHE.key(fingerprint, kind, os.path.splitext(filename)[1], settings)
+        if RENDER_CACHE.fetch(key, filename):
+            return RENDER_JOBS.add_cached(kind, clip_id, filename, session.session_id).to_dict()
+    if SESSION_MAX_RENDERS and RENDER_JOBS.active(session.session_id) >= SESSION_MAX_RENDERS:
+        raise RuntimeError(
+            f"Maximum number of concurrent renders ({SESSION_MAX_RENDERS}) reached. "
+            "Wait for a render to finish or cancel one first."
+        )
+    check_cpu_budget(session)
+
+    def run(logger, path):
+        session.begin()
+        start = time.thread_time()
+        try:
+            # Render threads start outside of the session that queued the job
+            with SESSIONS.bind(session.session_id):
+                render(logger, path)
+                if key is not None:
+                    RENDER_CACHE.store(key, path)
+        finally:
+            session.charge(time.thread_time() - start)
+            session.end()
+
+    return RENDER_JOBS.submit(kind, clip_id, filename, run, progress_bar=progress_bar, session=session.session_id).to_dict()
+
+def detached_clip(clip_id: str, preview: bool = False):
+    """
+    Yields a private instance of a clip, rebuilt from the clip graph with
+    original (not proxy) media unless preview is set, so background renders
+    never share clip state with the registered clips. Its file readers come
+    from READER_POOL, where a render's sequential reads keep a reader of
+    their own. Falls back to the registered clip if it cannot be rebuilt.
+    The clip is looked up in the session current when detached_clip is
+    called, so the returned context manager can be entered in another thread.
+    """
+    return _detached_clip(SESSIONS.current(), clip_id, preview)
+
+@contextmanager
+def _detached_clip(session: Session, clip_id: str, preview: bool):
+    with SESSIONS.bind(session.session_id):
+        if session.graph.is_rebuildable(clip_id):
+            with session.graph.detached(clip_id, preview=preview) as clip:
+                yield clip
+        else:
+            yield get_clip(clip_id)
+
+def clip_source_file(clip_id: str):
+    """
+    The video file a clip plays unchanged (its proxy when ready), or None.
+    Frames of such clips can be decoded by seeking in the file instead of
+    being rendered through the clip.
+    """
+    node = SESSIONS.current().graph.nodes.get(clip_id)
+    if node is None or node.op != "video_file_clip" or node.params.get("target_resolution"):
+        return None
+    source = validate_path(node.params["filename"])
+    proxy = PROXIES.lookup(source)
+    return str(proxy.path) if proxy is not None else source
+
+def analysis_subject(clip_id: str):
+    """
+    What analyses of a clip are stored under in ANALYSES: the content digest
+    and load parameters of the file a clip loads, so moved or copied sources
+    keep their results, else the clip graph fingerprint. None if the clip
+    cannot be identified.
+    """
+    graph = SESSIONS.current().graph
+    node = graph.nodes.get(clip_id)
+    if node is None or node.deleted:
+        return None
+    if node.op in ("video_file_clip", "audio_file_clip"):
+        try:
+            digest = content_digest(validate_path(node.params["filename"]))
+        except (OSError, ValueError):
+            return None
+        params = {name: value for name, value in node.params.items() if name != "filename"}
+        return json.dumps({"op": node.op, "source": digest, "params": params}, sort_keys=True)
+    return graph.fingerprint(clip_id)
+
+def analysis_cache(clip_id: str):
+    """ANALYSES bound to clip_id, as the (kind, params, compute) callable effects take."""
+    return functools.partial(ANALYSES.get_or_compute, analysis_subject(clip_id))
 
 @mcp.tool
 def list_clips() -> dict:
-    """Lists all currently loaded clips and their types."""
-    return {cid: str(type(c)) for cid, c in CLIPS.items()}
+    """Lists all clips of the session and their types. Clips that are not loaded yet (e.g. imported) are rebuilt on first use."""
+    session = SESSIONS.current()
+    clips = {cid: str(type(c)) for cid, c in list(session.clips.items())}
+    for cid, node in list(session.graph.nodes.items()):
+        if cid not in clips and not node.deleted:
+            clips[cid] = "not loaded"
+    return clips
 
 @mcp.tool
 def delete_clip(clip_id: str) -> str:
     """Removes a clip from memory and closes it."""
-    if clip_id in CLIPS:
-        try:
-            CLIPS[clip_id].close()
-        except Exception:
-            pass
-        del CLIPS[clip_id]
-        return f"Clip {clip_id} deleted."
+    session = SESSIONS.current()
+    with session.lock:
+        node = session.graph.nodes.get(clip_id)
+        if clip_id in session.clips or (node is not None and not node.deleted):
+            unload_clip(session, clip_id)
+            session.graph.remove(clip_id)
+            session.collector.forget(clip_id)
+            return f"Clip {clip_id} deleted."
     return f"Clip {clip_id} not found."
 
+@mcp.tool
+def name_clip(clip_id: str, name: str = None) -> str:
+    """Names a clip so it, and the clips it is made from, stay loaded. Without a name, unnames it."""
+    session = SESSIONS.current()
+    if clip_id not in session.clips and clip_id not in session.graph.nodes:
+        raise ValueError(f"Clip with ID {clip_id} not found.")
+    session.collector.name(clip_id, name)
+    return f"Clip {clip_id} named {name}." if name else f"Clip {clip_id} unnamed."
+
+@mcp.tool
+def collect_clips(ancestors: bool = False) -> dict:
+    """
+    Unloads intermediate clips: loaded clips that are neither named nor among the most recently returned or
+    used, nor made into one that is. With ancestors, also unloads the clips named and recent ones are made from
+    (this frees clip slots, not memory). Their IDs stay valid; they are rebuilt on next use. Runs automatically
+    when the clip count or memory limit is reached. Returns the unloaded IDs and the status of the loaded clips.
+    """
+    session = SESSIONS.current()
+    collected = reclaim_clips(ancestors)
+    return {"collected": collected, "clips": session.collector.status(session.clips), "names": dict(session.collector.names)}
+
+@mcp.tool
+def export_clip_graph(clip_id: str = None) -> dict:
+    """Export the clip graph as JSON: how each clip was made (operation, parameters, input clips).
+    With clip_id, only the nodes needed to rebuild that clip are exported."""
+    graph = SESSIONS.current().graph
+    if clip_id is not None and clip_id not in graph.nodes:
+        raise ValueError(f"Clip with ID {clip_id} not found.")
+    return graph.to_dict(clip_id)
+
+@mcp.tool
+def import_clip_graph(graph: dict) -> list:
+    """Import a clip graph exported with export_clip_graph. Clips are rebuilt lazily on first use.
+    Returns the imported clip IDs."""
+    return SESSIONS.current().graph.load(graph)
+
+@mcp.tool
+def proxy_status() -> list:
+    """Lists the proxy files of loaded sources and whether they are pending, ready or failed."""
+    return [proxy.to_dict() for proxy in PROXIES.list()]
+
+@mcp.tool
+def frame_cache_stats() -> dict:
+    """Frame cache statistics: hits, misses, hit rate, cached frames and bytes used."""
+    return FRAME_CACHE.stats()
+
+@mcp.tool
+def configure_frame_cache(max_bytes: int) -> dict:
+    """Set the frame cache memory budget in bytes (0 disables and empties it). Returns the cache statistics."""
+    FRAME_CACHE.configure(max_bytes)
+    return FRAME_CACHE.stats()
+
+@mcp.tool
+def clip_memory_stats() -> dict:
+    """
+    Estimated memory (bytes), open file descriptors and open file readers held by each loaded clip of the
+    session alone, shared by several of its clips (e.g. the readers of one source file), and in total; the
+    memory budgets of all sessions (max_bytes) and of the session (session_max_bytes), and how many idle
+    readers were closed and reopened.
+    """
+    return {**CLIP_MEMORY.stats(SESSIONS.current().clips), "session_max_bytes": SESSION_MAX_BYTES}
+
+@mcp.tool
+def session_status() -> dict:
+    """
+    The session of this client and its usage against its quotas: loaded clips, memory (bytes), queued or
+    running renders, and CPU-seconds used by heavy tools and renders over the CPU window (0 limits are unlimited).
+    """
+    session = SESSIONS.current()
+    return {
+        "session_id": session.session_id,
+        "clips": len(session.clips),
+        "max_clips": MAX_CLIPS,
+        "bytes": CLIP_MEMORY.total_bytes(list(session.clips.values())),
+        "max_bytes": SESSION_MAX_BYTES,
+        "renders": RENDER_JOBS.active(session.session_id),
+        "max_renders": SESSION_MAX_RENDERS,
+        "cpu_seconds": round(session.cpu_used(SESSION_CPU_WINDOW_SECONDS), 3),
+        "max_cpu_seconds": SESSION_MAX_CPU_SECONDS,
+        "cpu_window_seconds": SESSION_CPU_WINDOW_SECONDS,
+        "queued_heavy_calls": HEAVY_TOOLS.queued(session),
+    }
+
+@mcp.tool
+def reader_pool_stats() -> dict:
+    """
+    Live ffmpeg reader processes and their limit, how reads were served (by a reader already at the right
+    position, a restarted one or a newly opened one), readers closed to stay under the limit, and per source
+    file the clips and readers sharing it.
+    """
+    return READER_POOL.stats()
+
 # --- Video IO ---
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def video_file_clip(filename: str, audio: bool = True, fps_source: str = "fps", target_resolution: list[int] = None) -> str:
-    """Load a video file."""
+    """Load a video file. Large sources are edited through a low-resolution proxy once it is ready;
+    final renders always use the original."""
     filename = validate_path(filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
-    clip = VideoFileClip(
-        filename=filename,
-        audio=audio,
-        fps_source=fps_source,
-        target_resolution=tuple(target_resolution) if target_resolution else None
-    )
+    build = current_build()
+    proxy = PROXIES.lookup(filename) if build is None or build.preview else None
+    if proxy is not None:
+        clip = READER_POOL.share(VideoFileClip(filename=str(proxy.path), audio=audio, fps_source=fps_source))
+        # The clip stays at proxy resolution; get_clip scales it up for operations that need pixel coordinates
+        size = tuple(target_resolution) if target_resolution else proxy.size
+        if None in size:
+            scale = max(s / c for s, c in zip(size, proxy.size) if s is not None)
+            size = tuple(round(c * scale) for c in proxy.size)
+        clip.proxy_size = size
+    else:
+        clip = READER_POOL.share(VideoFileClip(
+            filename=filename,
+            audio=audio,
+            fps_source=fps_source,
+            target_resolution=tuple(target_resolution) if target_resolution else None
+        ))
+        if build is None:
+            PROXIES.request(filename, clip.reader.infos["video_size"])
     return register_clip(clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def image_clip(filename: str, duration: float = None, transparent: bool = True) -> str:
     """Load an image file."""
     filename = validate_path(filename)
@@ -123,6 +595,7 @@ def image_clip(filename: str, duration: float = None, transparent: bool = True)
     return register_clip(clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def image_sequence_clip(sequence: list[str], fps: float = None, durations: list[float] = None, with_mask: bool = True) -> str:
     """Create a clip from a sequence of images or a folder path."""
     if not sequence:
@@ -136,6 +609,7 @@ def image_sequence_clip(sequence: list[str], fps: float = None, durations: list[
     return register_clip(clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def text_clip(
     text: str,
     font: str = None,
@@ -167,6 +641,7 @@ def text_clip(
     return register_clip(clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def color_clip(size: list[int], color: list[int], duration: float = None) -> str:
     """Create a solid color clip."""
     if duration is not None and duration <= 0:
@@ -177,6 +652,7 @@ def color_clip(size: list[int], color: list[int], duration: float = None) -> str
     return register_clip(clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def credits_clip(
     creditfile: str,
     width: int,
@@ -187,6 +663,7 @@ def credits_clip(
     font_size: int = 60
 ) -> str:
     """Create a scrolling credits clip from a text file."""
+    from moviepy.video.tools.credits import CreditsClip
     creditfile = validate_path(creditfile)
     if not os.path.exists(creditfile):
         raise FileNotFoundError(f"File {creditfile} not found.")
@@ -204,8 +681,10 @@ def credits_clip(
     return register_clip(clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def subtitles_clip(filename: str, encoding: str = "utf-8", font: str = "Arial", font_size: int = 24, color: str = "white") -> str:
     """Create a subtitles clip from a .srt file."""
+    from moviepy.video.tools.subtitles import SubtitlesClip
     filename = validate_path(filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
@@ -220,27 +699,62 @@ def write_videofile(
     fps: float = None,
     codec: str = "libx264",
     audio_codec: str = "aac",
+    audio_fps: int = 44100,
     bitrate: str = None,
     preset: str = "medium",
     threads: int = None,
-) -> str:
-    """Write a video clip to a file."""
+    segments: int = 1,
+) -> dict:
+    """Queue a render of a video clip to a file. Returns the render job; poll it with render_job_status.
+    Use segments > 1 to split long, effect-heavy renders into time segments encoded in parallel processes
+    (clips that cannot be rebuilt from their clip graph are rendered in one piece)."""
     filename = validate_write_path(filename)
-    clip = get_clip(clip_id)
-    clip.write_videofile(
-        filename=filename,
-        fps=fps,
-        codec=codec,
-        audio_codec=audio_codec,
-        bitrate=bitrate,
-        preset=preset,
-        threads=threads,
-    )
-    return f"Successfully wrote video to {filename}"
+    get_clip(clip_id)
+    if segments < 1:
+        raise ValueError("segments must be at least 1.")
+
+    def render(logger, path):
+        with detached_clip(clip_id) as clip:
+            graph = SESSIONS.current().graph
+            # Segment workers rebuild the clip from its graph: other clips are rendered here
+            if segments == 1 or not graph.is_rebuildable(clip_id):
+                clip.write_videofile(
+                    filename=path,
+                    fps=fps,
+                    codec=codec,
+                    audio_codec=audio_codec,
+                    audio_fps=audio_fps,
+                    bitrate=bitrate,
+                    preset=preset,
+                    threads=threads,
+                    logger=logger,
+                )
+                return
+            render_segments(
+                clip,
+                path,
+                functools.partial(rebuild_clip, GRAPH_MODULE, graph.to_dict(clip_id), clip_id),
+                fps=fps,
+                codec=codec,
+                audio_codec=audio_codec,
+                audio_fps=audio_fps,
+                bitrate=bitrate,
+                preset=preset,
+                threads=threads,
+                segments=segments,
+                workers=RENDER_PROCESSES,
+                logger=logger,
+                preload=[GRAPH_MODULE],
+            )
+
+    # threads and segments change how the file is encoded, not what it contains
+    settings = {"fps": fps, "codec": codec, "audio_codec": audio_codec, "audio_fps": audio_fps, "bitrate": bitrate, "preset": preset}
+    return submit_render("video", clip_id, filename, settings, render)
 
 @mcp.tool
 def tools_ffmpeg_extract_subclip(filename: str, start_time: float, end_time: float, targetname: str = None) -> str:
     """Fast extraction of a subclip using ffmpeg (no decoding)."""
+    from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
     filename = validate_path(filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
@@ -256,12 +770,13 @@ def tools_ffmpeg_extract_subclip(filename: str, start_time: float, end_time: flo
 # --- Audio IO ---
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def audio_file_clip(filename: str, buffersize: int = 200000) -> str:
     """Load an audio file."""
     filename = validate_path(filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
-    clip = AudioFileClip(filename=filename, buffersize=buffersize)
+    clip = READER_POOL.share(AudioFileClip(filename=filename, buffersize=buffersize))
     return register_clip(clip)
 
 @mcp.tool
@@ -272,25 +787,91 @@ def write_audiofile(
     nbytes: int = 2,
     codec: str = "libvorbis",
     bitrate: str = None
-) -> str:
-    """Write an audio clip to a file."""
+) -> dict:
+    """Queue a render of an audio clip to a file. Returns the render job; poll it with render_job_status."""
     filename = validate_write_path(filename)
-    clip = get_clip(clip_id)
-    clip.write_audiofile(
-        filename=filename,
-        fps=fps,
-        nbytes=nbytes,
-        codec=codec,
-        bitrate=bitrate
-    )
-    return f"Successfully wrote audio to {filename}"
+    get_clip(clip_id)
+
+    def render(logger, path):
+        with detached_clip(clip_id) as clip:
+            clip.write_audiofile(
+                filename=path,
+                fps=fps,
+                nbytes=nbytes,
+                codec=codec,
+                bitrate=bitrate,
+                logger=logger,
+            )
+
+    settings = {"fps": fps, "nbytes": nbytes, "codec": codec, "bitrate": bitrate}
+    return submit_render("audio", clip_id, filename, settings, render, progress_bar="chunk")
+
+# --- Render Jobs ---
+
+@mcp.tool
+def render_job_status(job_id: str) -> dict:
+    """Get the status, progress percentage, ETA (seconds) and output path of a render job."""
+    return RENDER_JOBS.get(job_id, SESSIONS.current().session_id).to_dict()
+
+@mcp.tool
+def list_render_jobs() -> list:
+    """Lists the render jobs of the session and their status."""
+    return [job.to_dict() for job in RENDER_JOBS.list(SESSIONS.current().session_id)]
+
+@mcp.tool
+def cancel_render_job(job_id: str) -> dict:
+    """Cancel a queued or running render job."""
+    return RENDER_JOBS.cancel(job_id, SESSIONS.current().session_id).to_dict()
+
+@mcp.tool
+def render_cache_stats() -> dict:
+    """Render cache statistics: hits, misses, hit rate, number of entries and bytes used."""
+    return RENDER_CACHE.stats()
+
+@mcp.tool
+def analysis_store_stats() -> dict:
+    """Analysis store statistics: hits, misses, hit rate, number of stored analyses and bytes used."""
+    return ANALYSES.stats()
+
+# --- Animation ---
+
+# A numeric effect parameter: a number, a time expression of t (e.g. "1 + 0.5*sin(t)")
+# or keyframes ([[time, value], ...], interpolated linearly)
+Animatable = float | str | list[list[float]]
+
+def animation(value):
+    """
+    value itself if it is a number, else the compiled Animation of a time
+    expression or keyframe list. Expressions are validated as in
+    vfx_head_blur; raises ValueError for invalid expressions or keyframes.
+    """
+    if isinstance(value, str):
+        validate_math_expression(value)
+        try:
+            animation = custom_fx.Animation.expression(value)
+            # Evaluated once, so expressions failing at run time are reported here
+            animation(0)
+        except Exception as e:
+            raise ValueError(f"Invalid math expression '{value}': {e}")
+        return animation
+    if isinstance(value, (list, tuple)):
+        return custom_fx.Animation.keyframes(value)
+    return value
+
+def animate(effect, native: tuple = ()):
+    """effect, wrapped in an AnimatedEffect if any of its parameters is an Animation."""
+    if any(isinstance(value, custom_fx.Animation) for value in vars(effect).values()):
+        return custom_fx.AnimatedEffect(effect, native)
+    return effect
 
 # --- Clip Configuration ---
 
 @mcp.tool
-def set_position(clip_id: str, x: int = None, y: int = None, pos_str: str = None, relative: bool = False) -> str:
-    """Set clip position. Use x/y for pixels, or pos_str for 'center', 'left', etc."""
+@CLIP_GRAPH.operation
+def set_position(clip_id: str, x: Animatable = None, y: Animatable = None, pos_str: str = None, relative: bool = False) -> str:
+    """Set clip position. Use x/y for pixels (or animate them with a time expression or keyframes), or pos_str for 'center', 'left', etc."""
     clip = get_clip(clip_id)
+    x, y = animation(x), animation(y)
     if pos_str:
         pos = pos_str
     elif x is not None and y is not None:
@@ -301,9 +882,17 @@ def set_position(clip_id: str, x: int = None, y: int = None, pos_str: str = None
         pos = ("center", y)
     else:
         raise ValueError("Provide x, y, or pos_str")
+    if callable(x) or callable(y):
+        fps = getattr(clip, "fps", None)
+        for value in (x, y):
+            if isinstance(value, custom_fx.Animation) and fps and clip.duration is not None:
+                value.prepare(fps, clip.duration)
+        static = pos
+        pos = lambda t: tuple(value(t) if callable(value) else value for value in static)
     return register_clip(clip.with_position(pos, relative=relative))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def set_audio(clip_id: str, audio_clip_id: str) -> str:
     """Set the audio of a video clip."""
     clip = get_clip(clip_id)
@@ -311,6 +900,7 @@ def set_audio(clip_id: str, audio_clip_id: str) -> str:
     return register_clip(clip.with_audio(audio))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def set_mask(clip_id: str, mask_clip_id: str) -> str:
     """Set the mask of a clip."""
     clip = get_clip(clip_id)
@@ -318,18 +908,21 @@ def set_mask(clip_id: str, mask_clip_id: str) -> str:
     return register_clip(clip.with_mask(mask))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def set_start(clip_id: str, t: float) -> str:
     """Set clip start time."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_start(t))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def set_end(clip_id: str, t: float) -> str:
     """Set clip end time."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_end(t))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def set_duration(clip_id: str, t: float) -> str:
     """Set clip duration."""
     clip = get_clip(clip_id)
@@ -338,6 +931,7 @@ def set_duration(clip_id: str, t: float) -> str:
 # --- Transformations & Compositing ---
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def subclip(clip_id: str, start_time: float = 0, end_time: float = None) -> str:
     """Cut a clip."""
     clip = get_clip(clip_id)
@@ -347,6 +941,7 @@ def subclip(clip_id: str, start_time: float = 0, end_time: float = None) -> str:
     return register_clip(new_clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def composite_video_clips(clip_ids: list[str], size: list[int] = None, bg_color: list[int] = None, use_bgclip: bool = False) -> str:
     """Compose multiple clips."""
     if not clip_ids:
@@ -361,6 +956,7 @@ def composite_video_clips(clip_ids: list[str], size: list[int] = None, bg_color:
     return register_clip(comp_clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def tools_clips_array(clip_ids_rows: list[list[str]], bg_color: list[int] = None) -> str:
     """Arrange clips in a grid (array)."""
     if not clip_ids_rows or not any(clip_ids_rows):
@@ -379,6 +975,7 @@ def tools_clips_array(clip_ids_rows: list[list[str]], bg_color: list[int] = None
     return register_clip(comp_clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def concatenate_video_clips(clip_ids: list[str], method: str = "chain", transition: str = None) -> str:
     """Concatenate multiple clips."""
     if not clip_ids:
@@ -388,6 +985,7 @@ def concatenate_video_clips(clip_ids: list[str], method: str = "chain", transiti
     return register_clip(concat_clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def composite_audio_clips(clip_ids: list[str]) -> str:
     """Compose multiple audio clips."""
     clips = [get_clip(cid) for cid in clip_ids]
@@ -395,6 +993,7 @@ def composite_audio_clips(clip_ids: list[str]) -> str:
     return register_clip(comp_clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def concatenate_audio_clips(clip_ids: list[str]) -> str:
     """Concatenate multiple audio clips."""
     clips = [get_clip(cid) for cid in clip_ids]
@@ -404,66 +1003,77 @@ def concatenate_audio_clips(clip_ids: list[str]) -> str:
 # --- Video Effects ---
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_accel_decel(clip_id: str, new_duration: float = None, abruptness: float = 1.0, soonness: float = 1.0) -> str:
     """Accelerate/Decelerate clip."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.AccelDecel(new_duration, abruptness, soonness)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_black_white(clip_id: str) -> str:
     """Convert to black and white."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.BlackAndWhite()]))
+    return register_clip(custom_fx.apply_fused(clip, vfx.BlackAndWhite()))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_blink(clip_id: str, duration_on: float, duration_off: float) -> str:
     """Make clip blink."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.Blink(duration_on, duration_off)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_crop(clip_id: str, x1: int = None, y1: int = None, x2: int = None, y2: int = None, width: int = None, height: int = None, x_center: int = None, y_center: int = None) -> str:
     """Crop clip."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Crop(x1, y1, x2, y2, width, height, x_center, y_center)]))
+    return register_clip(custom_fx.apply_fused(clip, vfx.Crop(x1, y1, x2, y2, width, height, x_center, y_center)))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_cross_fade_in(clip_id: str, duration: float) -> str:
     """Cross fade in."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.CrossFadeIn(duration)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_cross_fade_out(clip_id: str, duration: float) -> str:
     """Cross fade out."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.CrossFadeOut(duration)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_even_size(clip_id: str) -> str:
     """Make dimensions even."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.EvenSize()]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_fade_in(clip_id: str, duration: float) -> str:
     """Fade in from black."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.FadeIn(duration)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_fade_out(clip_id: str, duration: float) -> str:
     """Fade out to black."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.FadeOut(duration)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_freeze(clip_id: str, t: float = 0, freeze_duration: float = None, total_duration: float = None, padding: float = 0) -> str:
     """Freeze a frame."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.Freeze(t, freeze_duration, total_duration, padding)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_freeze_region(clip_id: str, t: float = 0, region: list[int] = None, outside_region: list[int] = None, mask_clip_id: str = None) -> str:
     """Freeze a region."""
     clip = get_clip(clip_id)
@@ -471,10 +1081,11 @@ def vfx_freeze_region(clip_id: str, t: float = 0, region: list[int] = None, outs
     return register_clip(clip.with_effects([vfx.FreezeRegion(t, tuple(region) if region else None, tuple(outside_region) if outside_region else None, mask)]))
 
 @mcp.tool
-def vfx_gamma_correction(clip_id: str, gamma: float) -> str:
+@CLIP_GRAPH.operation
+def vfx_gamma_correction(clip_id: str, gamma: Animatable) -> str:
     """Gamma correction."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.GammaCorrection(gamma)]))
+    return register_clip(custom_fx.apply_fused(clip, animate(vfx.GammaCorrection(animation(gamma)))))
 
 
 def validate_math_expression(code: str, allowed_vars: set[str] = None) -> None:
@@ -528,58 +1139,72 @@ def validate_math_expression(code: str, allowed_vars: set[str] = None) -> None:
             else:
                  raise ValueError("Security check failed: Indirect function calls are not allowed")
 @mcp.tool
-def vfx_head_blur(clip_id: str, fx_code: str, fy_code: str, radius: float, intensity: float = None) -> str:
+@CLIP_GRAPH.operation
+def vfx_head_blur(clip_id: str, fx_code: str, fy_code: str, radius: Animatable, intensity: Animatable = None) -> str:
     """Blur moving head (requires math expressions for fx/fy positions, e.g., '100 + 50*t')."""
-    def safe_eval_func(code):
-        validate_math_expression(code)
-        # Test once to see if it's a valid expression
-        try:
-            numexpr.evaluate(code, local_dict={"t": 0})
-        except Exception as e:
-            raise ValueError(f"Invalid math expression '{code}': {e}")
-        return lambda t: float(numexpr.evaluate(code, local_dict={"t": t}))
-    fx = safe_eval_func(fx_code)
-    fy = safe_eval_func(fy_code)
+    fx = animation(fx_code)
+    fy = animation(fy_code)
+    clip = get_clip(clip_id)
+    effect = vfx.HeadBlur(fx, fy, animation(radius), animation(intensity))
+    return register_clip(clip.with_effects([custom_fx.AnimatedEffect(effect, native=("fx", "fy"))]))
+
+@mcp.tool
+@heavy_tool
+@CLIP_GRAPH.operation
+def vfx_head_blur_tracked(clip_id: str, radius: float, intensity: float = None, detect_every: int = 5, smoothing: float = 0.5) -> str:
+    """Blur the main face, following the face track of the clip (the same analysis as vfx_auto_framing, stored and reused)."""
+    if detect_every < 1:
+        raise ValueError("detect_every must be at least 1")
     clip = get_clip(clip_id)
+    tracker = custom_fx.AutoFraming(smoothing=smoothing, detect_every=detect_every, analysis_cache=analysis_cache(clip_id))
+    fx, fy = tracker.follow(clip)
     return register_clip(clip.with_effects([vfx.HeadBlur(fx, fy, radius, intensity)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_invert_colors(clip_id: str) -> str:
     """Invert colors."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.InvertColors()]))
+    return register_clip(custom_fx.apply_fused(clip, vfx.InvertColors()))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_loop(clip_id: str, n: int = None, duration: float = None) -> str:
     """Loop clip."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.Loop(n, duration)]))
 
 @mcp.tool
-def vfx_lum_contrast(clip_id: str, lum: float = 0, contrast: float = 0, contrast_threshold: float = 127) -> str:
+@CLIP_GRAPH.operation
+def vfx_lum_contrast(clip_id: str, lum: Animatable = 0, contrast: Animatable = 0, contrast_threshold: Animatable = 127) -> str:
     """Luminosity contrast."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.LumContrast(lum, contrast, contrast_threshold)]))
+    effect = vfx.LumContrast(animation(lum), animation(contrast), animation(contrast_threshold))
+    return register_clip(custom_fx.apply_fused(clip, animate(effect)))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_make_loopable(clip_id: str, overlap_duration: float) -> str:
     """Make clip loopable with fade."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.MakeLoopable(overlap_duration)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_margin(clip_id: str, margin: int, color: list[int] = (0, 0, 0)) -> str:
     """Add margin."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.Margin(margin, color=tuple(color))]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_mask_color(clip_id: str, color: list[int] = (0, 0, 0), threshold: float = 0, stiffness: float = 1) -> str:
     """Mask color."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.MaskColor(tuple(color), threshold, stiffness)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_masks_and(clip_id: str, other_clip_id: str) -> str:
     """Logical AND of masks."""
     clip = get_clip(clip_id)
@@ -587,6 +1212,7 @@ def vfx_masks_and(clip_id: str, other_clip_id: str) -> str:
     return register_clip(clip.with_effects([vfx.MasksAnd(other)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_masks_or(clip_id: str, other_clip_id: str) -> str:
     """Logical OR of masks."""
     clip = get_clip(clip_id)
@@ -594,48 +1220,57 @@ def vfx_masks_or(clip_id: str, other_clip_id: str) -> str:
     return register_clip(clip.with_effects([vfx.MasksOr(other)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_mirror_x(clip_id: str) -> str:
     """Mirror X."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MirrorX()]))
+    return register_clip(custom_fx.apply_fused(clip, vfx.MirrorX()))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_mirror_y(clip_id: str) -> str:
     """Mirror Y."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MirrorY()]))
+    return register_clip(custom_fx.apply_fused(clip, vfx.MirrorY()))
 
 @mcp.tool
-def vfx_multiply_color(clip_id: str, factor: float) -> str:
+@CLIP_GRAPH.operation
+def vfx_multiply_color(clip_id: str, factor: Animatable) -> str:
     """Multiply color."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MultiplyColor(factor)]))
+    return register_clip(custom_fx.apply_fused(clip, animate(vfx.MultiplyColor(animation(factor)))))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_multiply_speed(clip_id: str, factor: float) -> str:
     """Multiply speed."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.MultiplySpeed(factor)]))
 
 @mcp.tool
-def vfx_painting(clip_id: str, saturation: float = 1.4, black: float = 0.006) -> str:
+@CLIP_GRAPH.operation
+def vfx_painting(clip_id: str, saturation: Animatable = 1.4, black: Animatable = 0.006) -> str:
     """Painting effect."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Painting(saturation, black)]))
+    return register_clip(clip.with_effects([animate(vfx.Painting(animation(saturation), animation(black)))]))
 
 @mcp.tool
-def vfx_quad_mirror(clip_id: str, x: int = None, y: int = None) -> str:
+@CLIP_GRAPH.operation
+def vfx_quad_mirror(clip_id: str, x: Animatable = None, y: Animatable = None) -> str:
     """Apply quad mirror effect with custom axes."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([QuadMirror(x, y)]))
+    return register_clip(custom_fx.apply_fused(clip, animate(custom_fx.QuadMirror(animation(x), animation(y)))))
 
 @mcp.tool
-def vfx_chroma_key(clip_id: str, color: list[int] = (0, 255, 0), threshold: float = 50, softness: float = 20) -> str:
-    """Apply an advanced Chroma Key effect to create transparency."""
+@CLIP_GRAPH.operation
+def vfx_chroma_key(clip_id: str, color: list[int] = (0, 255, 0), threshold: float = 50, softness: float = 20, space: str = "rgb", spill: float = 0.0) -> str:
+    """Apply an advanced Chroma Key effect to create transparency. space is where color distances are measured:
+    "rgb", "yuv" (chroma only, ignores luma, so shadows on the screen key better) or "hsv". spill (0 to 1) removes the key color's cast from the foreground."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([ChromaKey(tuple(color), threshold, softness)]))
+    return register_clip(clip.with_effects([custom_fx.ChromaKey(tuple(color), threshold, softness, space=space, spill=spill)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_rgb_sync(
     clip_id: str,
     r_offset: list[int] = (0, 0),
@@ -647,18 +1282,20 @@ def vfx_rgb_sync(
 ) -> str:
     """Apply an RGB sync/split effect with spatial and temporal offsets."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([RGBSync(
+    return register_clip(clip.with_effects([custom_fx.RGBSync(
         tuple(r_offset), tuple(g_offset), tuple(b_offset),
         r_time_offset, g_time_offset, b_time_offset
     )]))
 
 @mcp.tool
-def vfx_kaleidoscope(clip_id: str, n_slices: int = 6, x: int = None, y: int = None) -> str:
+@CLIP_GRAPH.operation
+def vfx_kaleidoscope(clip_id: str, n_slices: int = 6, x: Animatable = None, y: Animatable = None) -> str:
     """Apply a kaleidoscope effect with radial symmetry."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([Kaleidoscope(n_slices, x, y)]))
+    return register_clip(custom_fx.apply_fused(clip, animate(custom_fx.Kaleidoscope(n_slices, animation(x), animation(y)))))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_matrix(
     clip_id: str,
     speed: float = 150,
@@ -669,55 +1306,67 @@ def vfx_matrix(
 ) -> str:
     """Apply a Matrix-style digital rain effect with scrolling characters."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([Matrix(speed, density, chars, color, font_size)]))
+    return register_clip(clip.with_effects([custom_fx.Matrix(speed, density, chars, color, font_size)]))
 
 @mcp.tool
-def vfx_auto_framing(clip_id: str, target_aspect_ratio: float = 9/16, smoothing: float = 0.9) -> str:
-    """Automatically crops and centers the frame on a detected face or subject."""
+@heavy_tool
+@CLIP_GRAPH.operation
+def vfx_auto_framing(clip_id: str, target_aspect_ratio: float = 9/16, smoothing: float = 0.9, detect_every: int = 5) -> str:
+    """Automatically crops and centers the frame on a detected face or subject. The subject is detected every detect_every frames and tracked in between."""
+    if detect_every < 1:
+        raise ValueError("detect_every must be at least 1")
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([AutoFraming(target_aspect_ratio, smoothing)]))
+    framing = custom_fx.AutoFraming(target_aspect_ratio, smoothing, detect_every=detect_every, analysis_cache=analysis_cache(clip_id))
+    return register_clip(clip.with_effects([framing]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_clone_grid(clip_id: str, n_clones: int = 4) -> str:
     """Creates a grid of clones of the original clip (e.g., 2, 4, 8, 16, 32, 64)."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([CloneGrid(n_clones)]))
+    return register_clip(custom_fx.apply_fused(clip, custom_fx.CloneGrid(n_clones)))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_rotating_cube(
     clip_id: str, 
-    speed_x: float = 45, 
-    speed_y: float = 30, 
-    zoom: float = 1.0, 
+    speed_x: Animatable = 45, 
+    speed_y: Animatable = 30, 
+    zoom: Animatable = 1.0, 
     mirror: bool = True,
-    motion_radius: float = 0.1,
-    motion_speed: float = 20
+    motion_radius: Animatable = 0.1,
+    motion_speed: Animatable = 20
 ) -> str:
     """Simulates a 3D rotating cube effect with the video mapped to its faces."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([RotatingCube(
-        speed_x=speed_x, 
-        speed_y=speed_y, 
-        zoom=zoom, 
+    return register_clip(clip.with_effects([animate(custom_fx.RotatingCube(
+        speed_x=animation(speed_x), 
+        speed_y=animation(speed_y), 
+        zoom=animation(zoom), 
         mirror=mirror,
-        motion_radius=motion_radius,
-        motion_speed=motion_speed
-    )]))
+        motion_radius=animation(motion_radius),
+        motion_speed=animation(motion_speed)
+    ))]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_kaleidoscope_cube(clip_id: str, kaleidoscope_params: dict = None, cube_params: dict = None) -> str:
     """Apply a KaleidoscopeCube effect."""
     clip = get_clip(clip_id)
-    effect = KaleidoscopeCube(kaleidoscope_params=kaleidoscope_params, cube_params=cube_params)
+    effect = custom_fx.KaleidoscopeCube(kaleidoscope_params=kaleidoscope_params, cube_params=cube_params)
     return register_clip(effect.apply(clip))
 
 @mcp.tool
-def vfx_resize(clip_id: str, width: int = None, height: int = None, scale: float = None) -> str:
-    """Resize clip."""
+@CLIP_GRAPH.operation
+def vfx_resize(clip_id: str, width: Animatable = None, height: Animatable = None, scale: Animatable = None) -> str:
+    """Resize clip. scale, or width or height alone, can be animated."""
     clip = get_clip(clip_id)
+    width, height, scale = animation(width), animation(height), animation(scale)
     if scale is not None:
         effect = vfx.Resize(scale)
     elif width is not None and height is not None:
+        if callable(width) or callable(height):
+            raise ValueError("Animate width or height alone, or scale.")
         effect = vfx.Resize(new_size=(width, height))
     elif width is not None:
         effect = vfx.Resize(width=width)
@@ -725,45 +1374,54 @@ def vfx_resize(clip_id: str, width: int = None, height: int = None, scale: float
         effect = vfx.Resize(height=height)
     else:
         raise ValueError("Provide scale, width, or height.")
-    return register_clip(clip.with_effects([effect]))
+    return register_clip(clip.with_effects([animate(effect, native=("new_size", "width", "height"))]))
 
 @mcp.tool
-def vfx_rotate(clip_id: str, angle: float, unit: str = "deg", resample: str = "bicubic", expand: bool = True) -> str:
+@CLIP_GRAPH.operation
+def vfx_rotate(clip_id: str, angle: Animatable, unit: str = "deg", resample: str = "bicubic", expand: bool = True) -> str:
     """Rotate clip."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Rotate(angle, unit=unit, resample=resample, expand=expand)]))
+    effect = vfx.Rotate(animation(angle), unit=unit, resample=resample, expand=expand)
+    return register_clip(clip.with_effects([animate(effect, native=("angle",))]))
 
 @mcp.tool
-def vfx_scroll(clip_id: str, w: int = None, h: int = None, x_speed: float = 0, y_speed: float = 0, x_start: float = 0, y_start: float = 0) -> str:
+@CLIP_GRAPH.operation
+def vfx_scroll(clip_id: str, w: int = None, h: int = None, x_speed: Animatable = 0, y_speed: Animatable = 0, x_start: Animatable = 0, y_start: Animatable = 0) -> str:
     """Scroll clip."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Scroll(w, h, x_speed, y_speed, x_start, y_start)]))
+    effect = vfx.Scroll(w, h, animation(x_speed), animation(y_speed), animation(x_start), animation(y_start))
+    return register_clip(clip.with_effects([animate(effect)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_slide_in(clip_id: str, duration: float, side: str) -> str:
     """Slide in."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.SlideIn(duration, side)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_slide_out(clip_id: str, duration: float, side: str) -> str:
     """Slide out."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.SlideOut(duration, side)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_supersample(clip_id: str, d: float, nframes: int) -> str:
     """Supersample."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.SuperSample(d, nframes)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_time_mirror(clip_id: str) -> str:
     """Time mirror."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([vfx.TimeMirror()]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def vfx_time_symmetrize(clip_id: str) -> str:
     """Time symmetrize."""
     clip = get_clip(clip_id)
@@ -772,65 +1430,100 @@ def vfx_time_symmetrize(clip_id: str) -> str:
 # --- Audio Effects ---
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def afx_audio_delay(clip_id: str, offset: float = 0.2, n_repeats: int = 8, decay: float = 1) -> str:
     """Audio delay."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([afx.AudioDelay(offset, n_repeats, decay)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def afx_audio_fade_in(clip_id: str, duration: float) -> str:
     """Audio fade in."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([afx.AudioFadeIn(duration)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def afx_audio_fade_out(clip_id: str, duration: float) -> str:
     """Audio fade out."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([afx.AudioFadeOut(duration)]))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def afx_audio_loop(clip_id: str, n_loops: int = None, duration: float = None) -> str:
     """Audio loop."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([afx.AudioLoop(n_loops, duration)]))
 
 @mcp.tool
+@heavy_tool
+@CLIP_GRAPH.operation
 def afx_audio_normalize(clip_id: str) -> str:
     """Audio normalize."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.AudioNormalize()]))
+    audio = clip.audio if isinstance(clip, VideoClip) else clip
+    if audio is None:
+        return register_clip(clip.with_effects([afx.AudioNormalize()]))
+    # The peak is the expensive part (a full pass over the audio), so it is stored
+    peak = ANALYSES.get_or_compute(
+        analysis_subject(clip_id), "max_volume", {}, lambda: {"max_volume": float(audio.max_volume())}
+    )["max_volume"]
+    return register_clip(clip.with_effects([afx.MultiplyVolume(1 / peak)] if peak else []))
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def afx_multiply_stereo_volume(clip_id: str, left: float = 1, right: float = 1) -> str:
     """Multiply stereo volume."""
     clip = get_clip(clip_id)
     return register_clip(clip.with_effects([afx.MultiplyStereoVolume(left, right)]))
 
 @mcp.tool
-def afx_multiply_volume(clip_id: str, factor: float) -> str:
-    """Multiply volume."""
+@CLIP_GRAPH.operation
+def afx_multiply_volume(clip_id: str, factor: Animatable) -> str:
+    """Multiply volume (a time expression or keyframes make a volume envelope)."""
     clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.MultiplyVolume(factor)]))
+    return register_clip(clip.with_effects([animate(afx.MultiplyVolume(animation(factor)))]))
 
 # --- Tools ---
 
 @mcp.tool
-def tools_detect_scenes(clip_id: str, luminosity_threshold: int = 10) -> list:
-    """Detect scenes in a clip. Returns list of timestamps."""
-    clip = get_clip(clip_id)
-    cuts, luminosities = detect_scenes(clip, luminosity_threshold=luminosity_threshold)
-    return [[float(start), float(end)] for start, end in cuts]
+@heavy_tool
+def tools_detect_scenes(clip_id: str, luminosity_threshold: int = 10, method: str = "luminance", with_confidence: bool = False) -> list:
+    """Detect scenes in a clip. Returns [[start, end], ...], or [[start, end, confidence], ...] with
+    with_confidence (confidence of the cut opening the scene, 0 at the threshold to 1; the first scene has 1).
+    method is "luminance" (frame brightness jumps) or "histogram" (grey-level distribution changes)."""
+    def compute():
+        cuts, confidences = detect_scenes(
+            get_clip(clip_id), source=clip_source_file(clip_id), threshold=luminosity_threshold, method=method,
+            workers=ANALYSIS_WORKERS,
+        )
+        return {"scenes": [[float(start), float(end)] for start, end in cuts], "confidences": [float(c) for c in confidences]}
+
+    result = ANALYSES.get_or_compute(
+        analysis_subject(clip_id), "scenes", {"threshold": luminosity_threshold, "method": method}, compute
+    )
+    if with_confidence:
+        return [scene + [round(c, 3)] for scene, c in zip(result["scenes"], [1.0] + result["confidences"])]
+    return result["scenes"]
 
 @mcp.tool
+@heavy_tool
 def tools_find_video_period(clip_id: str, start_time: float = 0.0) -> float:
     """Find video period."""
+    from moviepy.video.tools.cuts import find_video_period
     clip = get_clip(clip_id)
-    return float(find_video_period(clip, start_time=start_time))
+    return ANALYSES.get_or_compute(
+        analysis_subject(clip_id), "video_period", {"start_time": start_time},
+        lambda: {"period": float(find_video_period(clip, start_time=start_time))},
+    )["period"]
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def tools_drawing_color_gradient(size: list[int], p1: list[int], p2: list[int], col1: list[int], col2: list[int], shape: str = "linear", offset: float = 0) -> str:
     """Create a color gradient image clip."""
+    from moviepy.video.tools.drawing import color_gradient
     img = color_gradient(
         size=tuple(size),
         p1=tuple(p1),
@@ -844,8 +1537,10 @@ def tools_drawing_color_gradient(size: list[int], p1: list[int], p2: list[int],
     return register_clip(clip)
 
 @mcp.tool
+@CLIP_GRAPH.operation
 def tools_drawing_color_split(size: list[int], x: int, y: int, p1: list[int], p2: list[int], col1: list[int], col2: list[int], grad_width: int = 0) -> str:
     """Create a color split image clip."""
+    from moviepy.video.tools.drawing import color_split
     img = color_split(
         size=tuple(size),
         x=x,
@@ -862,6 +1557,7 @@ def tools_drawing_color_split(size: list[int], x: int, y: int, p1: list[int], p2
 @mcp.tool
 def tools_file_to_subtitles(filename: str, encoding: str = "utf-8") -> list:
     """Convert subtitle file to list of (start, end, text)."""
+    from moviepy.video.tools.subtitles import file_to_subtitles
     filename = validate_path(filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
@@ -874,23 +1570,26 @@ def write_gif(
     filename: str,
     fps: float = None,
     loop: int = 0
-) -> str:
-    """Write a video clip to a GIF file."""
+) -> dict:
+    """Queue a render of a video clip to a GIF file. Returns the render job; poll it with render_job_status."""
     filename = validate_write_path(filename)
-    clip = get_clip(clip_id)
-    clip.write_gif(
-        filename,
-        fps=fps,
-        loop=loop
-    )
-    return f"Successfully wrote GIF to {filename}"
+    get_clip(clip_id)
+
+    def render(logger, path):
+        with detached_clip(clip_id) as clip:
+            clip.write_gif(path, fps=fps, loop=loop, logger=logger)
+
+    return submit_render("gif", clip_id, filename, {"fps": fps, "loop": loop}, render)
 
 @mcp.tool
+@heavy_tool
 def tools_find_audio_period(clip_id: str) -> float:
     """Find the period of the audio signal."""
     from moviepy.audio.tools.cuts import find_audio_period
     clip = get_clip(clip_id)
-    return float(find_audio_period(clip))
+    return ANALYSES.get_or_compute(
+        analysis_subject(clip_id), "audio_period", {}, lambda: {"period": float(find_audio_period(clip))}
+    )["period"]
 
 @mcp.tool
 def tools_check_installation() -> str:
@@ -0,0 +1,231 @@
+import contextvars
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+DEFAULT_SESSION = "default"
+
+_SESSION_ID = re.compile(r"[A-Za-z0-9_.-]{1,128}")
+
+# ID of the session the running tool call or request belongs to
+_CURRENT_SESSION = contextvars.ContextVar("session", default=None)
+
+
+class Session:
+    """
+    The namespace of one client: its clips, the graph recording how they were
+    made and the collector unloading its intermediates, plus what it is
+    charged for (CPU time of heavy tools and renders, running work).
+    """
+
+    def __init__(self, session_id: str, graph, collector, clips: dict = None):
+        self.session_id = session_id
+        self.clips = {} if clips is None else clips
+        # Held while clips are loaded or dropped
+        self.lock = threading.RLock()
+        self.graph = graph
+        self.collector = collector
+        self.last_used = time.monotonic()
+        # Heavy tool calls and renders queued or running
+        self.busy = 0
+        self.cpu_seconds = 0.0
+        self._charges = deque()
+        self._lock = threading.Lock()
+
+    def charge(self, seconds: float):
+        """Adds CPU time spent on behalf of the session."""
+        with self._lock:
+            self.cpu_seconds += seconds
+            self._charges.append((time.monotonic(), seconds))
+
+    def cpu_used(self, window: float) -> float:
+        """CPU seconds charged in the last window seconds."""
+        deadline = time.monotonic() - window
+        with self._lock:
+            while self._charges and self._charges[0][0] < deadline:
+                self._charges.popleft()
+            return sum(seconds for _, seconds in self._charges)
+
+    @property
+    def empty(self) -> bool:
+        """No clips loaded or recorded: dropping the session loses nothing."""
+        return not self.clips and not getattr(self.graph, "nodes", None)
+
+    def begin(self):
+        """Marks the session busy, so it does not expire, until the matching end()."""
+        with self._lock:
+            self.busy += 1
+
+    def end(self):
+        with self._lock:
+            self.busy -= 1
+            self.last_used = time.monotonic()
+
+
+class SessionManager:
+    """
+    Sessions by ID, created on first use by factory(session_id). The default
+    session stands for calls made outside any session (e.g. a single stdio
+    client or a script) and never expires; other sessions unused for
+    idle_seconds and not busy are dropped and passed to on_expire. An
+    idle_seconds of 0 keeps them forever. At most max_sessions sessions
+    besides the default one exist at a time (0 removes the limit).
+
+    Session IDs are trusted: callers must only pass IDs the server issued
+    (see api.py), never IDs chosen by a client.
+    """
+
+    def __init__(self, default: Session, factory, idle_seconds: float = 0, on_expire=None, max_sessions: int = 0):
+        self.default = default
+        self.factory = factory
+        self.idle_seconds = idle_seconds
+        self.on_expire = on_expire
+        self.max_sessions = max_sessions
+        self._sessions = {default.session_id: default}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def get(self, session_id: str = None) -> Session:
+        """
+        The session session_id (the default one for None), created if needed.
+        Raises ValueError for malformed IDs and RuntimeError if a new session
+        would exceed max_sessions even after dropping idle ones.
+        """
+        if session_id is None:
+            session = self.default
+        else:
+            if not _SESSION_ID.fullmatch(session_id):
+                raise ValueError(f"Invalid session ID '{session_id[:128]}'.")
+            session = self._lookup(session_id)
+            if session is None:
+                self._sweep(force=True)
+                session = self._lookup(session_id)
+            if session is None:
+                raise RuntimeError(f"Maximum number of sessions ({self.max_sessions}) reached. Try again later.")
+        session.last_used = time.monotonic()
+        self._sweep()
+        return session
+
+    def _lookup(self, session_id: str):
+        """The session session_id, created unless that would exceed max_sessions (then None)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and (not self.max_sessions or len(self._sessions) - 1 < self.max_sessions):
+                session = self._sessions[session_id] = self.factory(session_id)
+            return session
+
+    def current(self) -> Session:
+        """The session of the running tool call or request."""
+        return self.get(_CURRENT_SESSION.get())
+
+    @contextmanager
+    def bind(self, session_id: str = None):
+        """Makes session_id the current session inside the block."""
+        self.get(session_id)
+        previous = _CURRENT_SESSION.get()
+        # Not reset with a token: generators streaming responses exit the block in another context
+        _CURRENT_SESSION.set(session_id)
+        try:
+            yield
+        finally:
+            _CURRENT_SESSION.set(previous)
+
+    def list(self) -> list[Session]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def all_clips(self) -> dict:
+        """The loaded clips of every session, by ID."""
+        clips = {}
+        for session in self.list():
+            clips.update(session.clips)
+        return clips
+
+    def _sweep(self, force: bool = False):
+        """Drops idle sessions; forced (at max_sessions), also those that are empty, however recent."""
+        if not force and (not self.idle_seconds or time.monotonic() - self._last_sweep < min(self.idle_seconds, 60)):
+            return
+        deadline = time.monotonic() - self.idle_seconds if self.idle_seconds else None
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            expired = [
+                session for session in self._sessions.values()
+                if session is not self.default and not session.busy
+                and ((deadline is not None and session.last_used < deadline) or (force and session.empty))
+            ]
+            for session in expired:
+                del self._sessions[session.session_id]
+        for session in expired:
+            if self.on_expire is not None:
+                self.on_expire(session)
+
+
+class FairScheduler:
+    """
+    Runs calls on a pool of `workers` threads, shared fairly between sessions.
+    A session's calls run one at a time, in order; when a thread frees up,
+    it takes the next call of the session that used the least CPU over the
+    last `window` seconds, so a session queuing many heavy calls does not
+    hold back the others. The thread CPU time of each call is charged to
+    its session.
+    """
+
+    def __init__(self, workers: int = 2, window: float = 3600):
+        self.workers = max(1, workers)
+        self.window = window
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="heavy")
+        self._queues = {}
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def submit(self, session: Session, func) -> Future:
+        """Queues func() for session, run in a copy of the caller's context. Returns its future."""
+        future = Future()
+        context = contextvars.copy_context()
+        session.begin()
+        with self._lock:
+            self._queues.setdefault(session, deque()).append((func, context, future, time.monotonic()))
+            self._dispatch()
+        return future
+
+    def queued(self, session: Session) -> int:
+        with self._lock:
+            return len(self._queues.get(session, ()))
+
+    def _dispatch(self):
+        while len(self._running) < self.workers:
+            waiting = [session for session, queue in self._queues.items() if queue and session not in self._running]
+            if not waiting:
+                return
+            # Least CPU used first; among equals, the longest waiting call
+            session = min(waiting, key=lambda s: (s.cpu_used(self.window), self._queues[s][0][3]))
+            call = self._queues[session].popleft()
+            if not self._queues[session]:
+                del self._queues[session]
+            self._running.add(session)
+            self._executor.submit(self._run, session, *call[:3])
+
+    def _run(self, session: Session, func, context, future: Future):
+        result = error = None
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+            start = time.thread_time()
+            try:
+                result = context.run(func)
+            except BaseException as e:
+                error = e
+            session.charge(time.thread_time() - start)
+        finally:
+            session.end()
+            with self._lock:
+                self._running.discard(session)
+                self._dispatch()
+        # Only once the session is charged and released, so callers see its state up to date
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
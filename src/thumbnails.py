@@ -0,0 +1,116 @@
+import os
+import subprocess as sp
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def filmstrip_times(duration, count: int) -> list[float]:
+    """Timestamps at the middle of count equal slices of the clip (t = 0 for still images)."""
+    if not duration:
+        return [0.0]
+    return [(i + 0.5) * duration / count for i in range(count)]
+
+
+def _extract_frame(source: str, t: float, height: int):
+    """Decodes the frame at t of a video file, seeking on the input side so only one GOP is decoded."""
+    import cv2
+    import numpy as np
+    from moviepy.config import FFMPEG_BINARY
+
+    cmd = [
+        FFMPEG_BINARY, "-loglevel", "error", "-ss", f"{t:.3f}", "-i", source,
+        "-frames:v", "1", "-vf", f"scale=-2:{height}", "-f", "image2pipe", "-c:v", "png", "-",
+    ]
+    result = sp.run(cmd, stdout=sp.PIPE, stderr=sp.DEVNULL)
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return cv2.imdecode(np.frombuffer(result.stdout, np.uint8), cv2.IMREAD_COLOR)
+
+
+class ThumbnailService:
+    """
+    Builds filmstrip sprites (N evenly spaced frames side by side, as JPEG) on
+    a thread pool and keeps them in a content-addressed RenderCache, so the
+    cache key doubles as a strong ETag. A thumbnail is a one-frame filmstrip.
+    """
+
+    def __init__(self, cache, max_workers: int = 4, quality: int = 80):
+        self.cache = cache
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def filmstrip(self, key, times: list[float], height: int, source: str = None, open_clip=None) -> bytes:
+        """
+        Returns the JPEG sprite for key, building it if needed. Frames are
+        extracted from the video file source with seek-based ffmpeg calls in
+        parallel, or else rendered from the clip yielded by open_clip()
+        (a context manager). Concurrent requests for the same key share one build.
+        """
+        if key is not None:
+            cached = self.cache.lookup(key, ".jpg")
+            if cached is not None:
+                with open(cached, "rb") as f:
+                    return f.read()
+
+        with self._lock:
+            future = self._inflight.get(key) if key is not None else None
+            owner = future is None
+            if owner:
+                future = Future()
+                if key is not None:
+                    self._inflight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            data = self._build(times, height, source, open_clip)
+            if key is not None:
+                self._store(key, data)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _build(self, times, height, source, open_clip) -> bytes:
+        import cv2
+        import numpy as np
+
+        if source is not None:
+            frames = list(self._executor.map(lambda t: _extract_frame(source, t, height), times))
+        else:
+            # Clip readers are not thread-safe: render the frames of one instance in order
+            def render():
+                with open_clip() as clip:
+                    return [cv2.cvtColor(clip.get_frame(t)[:, :, :3].astype("uint8"), cv2.COLOR_RGB2BGR) for t in times]
+            frames = self._executor.submit(render).result()
+
+        first = next((frame for frame in frames if frame is not None), None)
+        if first is None:
+            raise ValueError("No frames could be extracted.")
+        width = max(2, round(first.shape[1] * height / first.shape[0]))
+        tiles = [
+            cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA) if frame is not None
+            else np.zeros((height, width, 3), np.uint8)
+            for frame in frames
+        ]
+        ok, encoded = cv2.imencode(".jpg", np.hstack(tiles), [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("Could not encode the filmstrip.")
+        return encoded.tobytes()
+
+    def _store(self, key: str, data: bytes):
+        self.cache.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".", suffix=".jpg", dir=self.cache.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self.cache.store(key, tmp)
+        finally:
+            os.remove(tmp)
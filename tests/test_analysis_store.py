@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from analysis_store import AnalysisStore, content_digest
+
+
+class TestAnalysisStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = AnalysisStore(Path(self.tmpdir.name) / "analysis", max_bytes=10**6)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_computes_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"scenes": [[0.0, 1.5]], "x": np.arange(5, dtype=float)}
+
+        for _ in range(2):
+            result = self.store.get_or_compute("subject", "scenes", {"threshold": 10}, compute)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(result["scenes"], [[0.0, 1.5]])
+        np.testing.assert_array_equal(result["x"], np.arange(5))
+        self.assertEqual(self.store.stats()["hits"], 1)
+
+    def test_persists_across_instances(self):
+        self.store.put("k", "track", {"fps": 25, "y": np.array([1.0, np.nan])})
+        reopened = AnalysisStore(self.store.directory, max_bytes=10**6)
+        result = reopened.get("k")
+        self.assertEqual(result["fps"], 25)
+        np.testing.assert_array_equal(result["y"], [1.0, np.nan])
+
+    def test_parameters_are_part_of_the_key(self):
+        self.store.get_or_compute("subject", "scenes", {"threshold": 10}, lambda: {"n": 1})
+        result = self.store.get_or_compute("subject", "scenes", {"threshold": 20}, lambda: {"n": 2})
+        self.assertEqual(result, {"n": 2})
+        self.assertNotEqual(AnalysisStore.key("a", "scenes", {}), AnalysisStore.key("b", "scenes", {}))
+
+    def test_no_subject_always_computes(self):
+        calls = []
+        for _ in range(2):
+            self.store.get_or_compute(None, "scenes", {}, lambda: calls.append(1) or {})
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.store.stats()["entries"], 0)
+
+    def test_lru_eviction(self):
+        store = AnalysisStore(self.store.directory, max_bytes=3000)
+        array = np.zeros(100)  # 800 bytes + .npy header
+        store.put("a", "track", {"x": array})
+        store.put("b", "track", {"x": array})
+        store.get("a")
+        store.put("c", "track", {"x": array})
+        store.put("d", "track", {"x": array})
+
+        self.assertIsNotNone(store.get("a"))
+        self.assertIsNone(store.get("b"))
+        self.assertFalse(any(name.startswith("b.") for name in os.listdir(store.directory)))
+        self.assertLessEqual(store.stats()["bytes"], 3000)
+
+    def test_missing_array_is_a_miss(self):
+        self.store.put("k", "track", {"x": np.zeros(3)})
+        os.unlink(self.store.directory / "k.x.npy")
+        self.assertIsNone(self.store.get("k"))
+        self.assertEqual(self.store.stats()["entries"], 0)
+
+    def test_disabled(self):
+        store = AnalysisStore(self.store.directory, max_bytes=0)
+        store.put("k", "track", {"n": 1})
+        self.assertIsNone(store.get("k"))
+        self.assertFalse(store.directory.exists())
+
+
+class TestContentDigest(unittest.TestCase):
+    def test_follows_content_not_name(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = [os.path.join(tmpdir, name) for name in ("a.bin", "b.bin", "c.bin")]
+            for path, first in zip(paths, b"\0\0\1"):
+                with open(path, "wb") as f:
+                    f.write(bytes([first]) + b"\0" * 2999)
+                os.utime(path, ns=(10**18, 10**18))
+            a, b, c = (content_digest(path) for path in paths)
+
+            self.assertEqual(a, b)
+            # Same size and mtime, different content
+            self.assertNotEqual(a, c)
+
+if __name__ == '__main__':
+    unittest.main()
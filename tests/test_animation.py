@@ -0,0 +1,129 @@
+import unittest
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from moviepy import AudioClip, VideoClip, afx, vfx
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from custom_fx import WARP_CACHE, Kaleidoscope, QuadMirror
+from custom_fx.animation import AnimatedEffect, Animation
+
+FPS = 10
+
+
+def pattern_clip(w=64, h=48, duration=2):
+    yy, xx = np.mgrid[0:h, 0:w]
+    frame = np.dstack([xx * 3, yy * 4, (xx + yy) * 2]).astype(np.uint8)
+    return VideoClip(lambda t: frame, duration=duration).with_fps(FPS)
+
+
+class TestAnimation(unittest.TestCase):
+    def test_expression(self):
+        ts = np.linspace(0, 3, 31)
+        np.testing.assert_allclose(Animation.expression("100 + 50*sin(pi*t)").sample(ts), 100 + 50 * np.sin(np.pi * ts))
+        np.testing.assert_array_equal(Animation.expression("2 * 3").sample(ts), np.full_like(ts, 6))
+        self.assertEqual(Animation.expression("where(t < 1, 0, e)")(1.5), np.e)
+
+    def test_keyframes(self):
+        animation = Animation.keyframes([[0, 1], [2, 3], [2, 10], [4, 0]])
+        np.testing.assert_allclose(animation.sample([-1, 1, 3, 5]), [1, 2, 5, 0])
+
+    def test_invalid_keyframes(self):
+        for keyframes in ([], [1, 2], [[0, 1, 2]], [[1, 0], [0, 1]], [[0, "a"]], [[0, float("nan")]]):
+            with self.subTest(keyframes=keyframes):
+                with self.assertRaises(ValueError):
+                    Animation.keyframes(keyframes)
+
+    def test_prepared_frame_times_are_looked_up(self):
+        """Test that frame times index the precomputed table and other times are evaluated."""
+        animation = Animation.expression("t * 2")
+        animation.prepare(FPS, 2)
+        animation._sample = lambda ts: np.full(ts.shape, -1.0)
+
+        self.assertEqual(animation(0.3), 0.6)
+        self.assertEqual(animation(2.0), 4.0)
+        self.assertEqual(animation(0.35), -1.0)
+
+    def test_tables_of_other_clips_are_never_mixed(self):
+        """Test that preparing for another fps swaps fps and values together, keeping a longer table of the same fps."""
+        animation = Animation.expression("t * 2")
+        animation.prepare(FPS, 2)
+        table = animation._table
+        animation.prepare(FPS, 1)
+        self.assertIs(animation._table, table)
+        animation.prepare(4, 1)
+        self.assertEqual(animation._table[0], 4)
+        self.assertEqual(len(animation._table[1]), 5)
+        self.assertEqual(animation(0.25), 0.5)
+        self.assertEqual(animation(0.3), 0.6)
+
+
+class TestAnimatedEffect(unittest.TestCase):
+    def test_frames_use_the_value_at_their_time(self):
+        clip = pattern_clip()
+        animated = clip.with_effects([AnimatedEffect(vfx.MultiplyColor(Animation.keyframes([[0, 0], [1, 2]])))])
+        for t in (0, 0.3, 0.5, 0.55, 1.5):
+            with self.subTest(t=t):
+                expected = clip.with_effects([vfx.MultiplyColor(min(2.0 * t, 2.0))]).get_frame(t)
+                np.testing.assert_array_equal(animated.get_frame(t), expected)
+
+    def test_frames_are_computed_concurrently(self):
+        """Test that threads compute frames of one animated clip at the same time, each at its own time."""
+        frame = pattern_clip().get_frame(0)
+        armed, barrier = threading.Event(), threading.Barrier(2, timeout=5)
+
+        def frame_function(t):
+            # Both frames must be inside the parent at once, which a lock around rendering would prevent
+            if armed.is_set():
+                barrier.wait()
+            return frame
+
+        clip = VideoClip(frame_function, duration=2).with_fps(FPS)
+        animated = clip.with_effects([AnimatedEffect(vfx.MultiplyColor(Animation.keyframes([[0, 0], [1, 2]])))])
+        armed.set()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            frames = list(pool.map(animated.get_frame, [0.2, 0.7]))
+        for t, computed in zip([0.2, 0.7], frames):
+            expected = pattern_clip().with_effects([vfx.MultiplyColor(2.0 * t)]).get_frame(t)
+            np.testing.assert_array_equal(computed, expected)
+
+    def test_custom_effect(self):
+        clip = pattern_clip()
+        animated = clip.with_effects([AnimatedEffect(QuadMirror(Animation.expression("10 + 20*t"), 12))])
+        np.testing.assert_array_equal(animated.get_frame(0.5), clip.with_effects([QuadMirror(20, 12)]).get_frame(0.5))
+
+    def test_animated_maps_are_not_cached(self):
+        """Test that maps of an animated centre are built per frame, leaving the warp cache to static maps."""
+        clip = pattern_clip()
+        WARP_CACHE.clear()
+        for effect in (QuadMirror(Animation.expression("10 + 20*t"), 12), Kaleidoscope(6, Animation.expression("20 + 5*t"))):
+            with self.subTest(effect=type(effect).__name__):
+                animated = clip.with_effects([AnimatedEffect(effect)])
+                for t in (0, 0.5, 1):
+                    animated.get_frame(t)
+                self.assertEqual(WARP_CACHE.stats()["entries"], 0)
+                self.assertTrue(effect.cache_maps)
+        clip.with_effects([QuadMirror(20, 12)]).get_frame(0)
+        self.assertEqual(WARP_CACHE.stats()["entries"], 1)
+
+    def test_native_parameters_are_left_in_place(self):
+        """Test that parameters the effect calls itself stay functions of time."""
+        clip = pattern_clip()
+        scale = Animation.keyframes([[0, 1], [2, 0.5]])
+        resized = clip.with_effects([AnimatedEffect(vfx.Resize(scale), native=("new_size",))])
+        self.assertEqual(resized.get_frame(1).shape, (36, 48, 3))
+        self.assertIsNotNone(scale._table)
+
+    def test_audio_envelope(self):
+        tone = AudioClip(lambda t: np.column_stack([np.sin(440 * t), np.cos(440 * t)]), duration=1, fps=8000)
+        faded = tone.with_effects([AnimatedEffect(afx.MultiplyVolume(Animation.expression("1 - t")))])
+        ts = np.linspace(0, 0.99, 50)
+        np.testing.assert_allclose(faded.get_frame(ts), tone.get_frame(ts) * (1 - ts)[:, None])
+
+if __name__ == '__main__':
+    unittest.main()
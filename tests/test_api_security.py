@@ -24,7 +24,7 @@ sys.modules["numexpr"] = MagicMock()
 sys.modules["custom_fx"] = MagicMock()
 
 # Now import the app
-from src.api import app
+from src.api import app, SESSION_COOKIE
 
 class TestAPISecurity(unittest.TestCase):
     def setUp(self):
@@ -75,5 +75,21 @@ class TestAPISecurity(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertEqual(response.json(), {"detail": "Internal Server Error"})
 
+    def test_sessions_are_issued_by_the_server(self):
+        """Test that client-chosen session IDs are ignored and only cookies signed by the server are accepted."""
+        response = self.client.get("/api/clips?session=default", headers={"X-Session-ID": "default"})
+        session_id, _, signature = response.cookies.get(SESSION_COOKIE).partition(".")
+        self.assertNotEqual(session_id, "default")
+        self.assertTrue(signature)
+
+        # A valid cookie is kept
+        self.assertNotIn("set-cookie", self.client.get("/api/clips").headers)
+
+        for forged in ("default", f"default.{signature}", f"{session_id}.{'0' * 64}"):
+            client = TestClient(app, cookies={SESSION_COOKIE: forged})
+            issued = client.get("/api/clips").cookies.get(SESSION_COOKIE)
+            self.assertIsNotNone(issued)
+            self.assertNotIn(issued.partition(".")[0], ("default", session_id))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from custom_fx.auto_framing import AutoFraming, fill_gaps, smooth_track
+
+W, H = 320, 180
+PATCH = np.random.default_rng(0).integers(0, 256, (40, 40, 3), dtype=np.uint8)
+
+
+def subject_x(t):
+    """The subject moves right at 60 px/s."""
+    return 60 + 60 * t
+
+
+class MovingSubjectClip:
+    """A textured square on a grey background, sliding right."""
+
+    fps = 10
+    duration = 2.0
+
+    def __init__(self):
+        self.frames_read = 0
+
+    def get_frame(self, t):
+        frame = np.full((H, W, 3), 90, np.uint8)
+        x = int(round(subject_x(t))) - 20
+        frame[70:110, x:x + 40] = PATCH
+        return frame
+
+    def iter_frames(self, fps=None, dtype=None):
+        for i in range(int(self.duration * self.fps)):
+            self.frames_read += 1
+            yield self.get_frame(i / self.fps)
+
+    def transform(self, func):
+        return lambda t: func(self.get_frame, t)
+
+
+class TestTrajectory(unittest.TestCase):
+    def test_smoothing_does_not_lag(self):
+        """Test that the forward-backward EMA keeps a steady motion in place."""
+        ramp = np.arange(300, dtype=float)
+        smoothed = smooth_track(ramp, 0.9)
+        np.testing.assert_allclose(smoothed[100:200], ramp[100:200], atol=1e-3)
+
+    def test_fill_gaps(self):
+        np.testing.assert_array_equal(fill_gaps([np.nan, 2, np.nan, 4, np.nan], 0), [2, 2, 3, 4, 4])
+        np.testing.assert_array_equal(fill_gaps([np.nan, np.nan], 7), [7, 7])
+
+
+class TestAutoFraming(unittest.TestCase):
+    def test_tracks_subject_between_detections(self):
+        """Test that optical flow follows the subject after a single detection."""
+        clip = MovingSubjectClip()
+        effect = AutoFraming(target_aspect_ratio=1, smoothing=0, detect_every=100,
+                             focus_func=lambda frame, t: (subject_x(t), 90) if t == 0 else None)
+        track = effect.analyze(clip)
+
+        self.assertEqual(len(track), 20)
+        for i in (5, 10, 19):
+            x1, _, x2, _ = track.window(i / clip.fps)
+            self.assertAlmostEqual((x1 + x2) / 2, subject_x(i / clip.fps), delta=2)
+
+    def test_random_access_matches_sequential(self):
+        """Test that rendering is a stateless lookup, independent of frame order."""
+        clip = MovingSubjectClip()
+        effect = AutoFraming(target_aspect_ratio=9 / 16, detect_every=3,
+                             focus_func=lambda frame, t: (subject_x(t), 90))
+        render = effect.apply(clip)
+
+        times = [i / clip.fps for i in range(20)]
+        sequential = [render(t) for t in times]
+        self.assertEqual(clip.frames_read, 20)  # one analysis pass
+        for t in reversed(times):
+            np.testing.assert_array_equal(render(t), sequential[times.index(t)])
+        self.assertEqual(clip.frames_read, 20)
+        self.assertEqual(sequential[0].shape, (H, int(H * 9 / 16), 3))
+
+    def test_no_subject_keeps_centre(self):
+        clip = MovingSubjectClip()
+        track = AutoFraming(target_aspect_ratio=1, focus_func=lambda frame, t: None).analyze(clip)
+        self.assertEqual(track.window(1.0), ((W - H) // 2, 0, (W - H) // 2 + H, H))
+
+    def test_invalid_detect_every(self):
+        with self.assertRaises(ValueError):
+            AutoFraming(detect_every=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from moviepy import ColorClip, VideoClip
+from custom_fx.chroma_key import ChromaKey, key_lut, lut_index
+
+
+def reference_mask(frame, color, threshold, softness):
+    """The per-pixel Euclidean distance the table replaces."""
+    dist = np.sqrt(np.sum((frame.astype('float32') - color) ** 2, axis=-1))
+    return np.clip((dist - threshold) / softness, 0, 1)
+
+
+class TestKeyTable(unittest.TestCase):
+    def test_matches_euclidean_distance(self):
+        frame = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+        frame[:16] = [20, 230, 30]
+        alpha = ChromaKey(threshold=60, softness=30).alpha(frame)
+
+        self.assertEqual(alpha.dtype, np.uint8)
+        np.testing.assert_allclose(alpha / 255, reference_mask(frame, (0, 255, 0), 60, 30), atol=1 / 255)
+        self.assertFalse(alpha[:16].any())
+
+    def test_index_layout(self):
+        frame = np.array([[[1, 2, 3]]], np.uint8)
+        self.assertEqual(lut_index(frame)[0, 0], 1 + 2 * 256 + 3 * 65536)
+        self.assertEqual(key_lut((1, 2, 3), 10.0, 0.0)[3, 2, 1], 0)
+
+    def test_yuv_ignores_brightness(self):
+        """Test that a shadowed part of the screen is keyed in YUV but not in RGB."""
+        shades = np.array([[[0, 120, 0], [0, 255, 0], [120, 255, 120]]], np.uint8)
+        rgb = ChromaKey(threshold=80, softness=0).alpha(shades)[0]
+        yuv = ChromaKey(threshold=80, softness=0, space="yuv").alpha(shades)[0]
+        np.testing.assert_array_equal(rgb, [255, 0, 255])
+        np.testing.assert_array_equal(yuv[:2], [0, 0])
+
+    def test_spill_suppression(self):
+        frame = np.array([[[100, 180, 120], [200, 50, 60]]], np.uint8)
+        np.testing.assert_array_equal(ChromaKey(spill=1).suppress_spill(frame), [[[100, 120, 120], [200, 50, 60]]])
+        np.testing.assert_array_equal(ChromaKey(spill=0.5).suppress_spill(frame)[0, 0], [100, 150, 120])
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            ChromaKey(space="lab")
+        with self.assertRaises(ValueError):
+            ChromaKey(spill=2)
+
+
+class TestApply(unittest.TestCase):
+    def test_color_and_mask_share_one_decode(self):
+        frame = np.zeros((8, 8, 3), np.uint8)
+        frame[:, 4:] = [0, 255, 0]
+        decodes = []
+
+        def frame_function(t):
+            decodes.append(t)
+            return frame
+
+        keyed = ChromaKey().apply(VideoClip(frame_function, duration=1))
+        decodes.clear()
+        keyed.get_frame(0.5)
+        mask = keyed.mask.get_frame(0.5)
+
+        self.assertEqual(decodes, [0.5])
+        self.assertTrue(keyed.mask.is_mask)
+        np.testing.assert_array_equal(mask[:, :4], 1)
+        np.testing.assert_array_equal(mask[:, 4:], 0)
+
+    def test_mask_without_colour_frame(self):
+        keyed = ChromaKey().apply(ColorClip((4, 4), (0, 255, 0), duration=1))
+        np.testing.assert_array_equal(keyed.mask.get_frame(0.25), np.zeros((4, 4)))
+
+    def test_combines_existing_mask(self):
+        clip = ColorClip((4, 4), (255, 0, 0), duration=1).with_mask(ColorClip((4, 4), 0.5, is_mask=True, duration=1))
+        keyed = ChromaKey().apply(clip)
+        keyed.get_frame(0)
+        np.testing.assert_allclose(keyed.mask.get_frame(0), 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
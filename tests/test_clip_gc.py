@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import uuid
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from clip_gc import ClipCollector
+from clip_graph import ClipGraph, current_build
+
+
+class FakeClip:
+    def __init__(self, value):
+        self.value = value
+
+
+class GraphFixture:
+    """Minimal registry wired to a ClipGraph the same way server.py is."""
+
+    def __init__(self):
+        self.clips = {}
+        self.graph = ClipGraph()
+
+        @self.graph.operation
+        def source(value: int) -> str:
+            return self.register(FakeClip(value))
+
+        @self.graph.operation
+        def add(clip_id: str, amount: int = 1) -> str:
+            return self.register(FakeClip(self.get(clip_id).value + amount))
+
+        self.source, self.add = source, add
+
+    def register(self, clip):
+        build = current_build()
+        if build is not None:
+            return build.register(clip)
+        clip_id = str(uuid.uuid4())
+        self.clips[clip_id] = clip
+        self.graph.record(clip_id)
+        return clip_id
+
+    def get(self, clip_id):
+        build = current_build()
+        if build is not None:
+            return build.get(clip_id)
+        if clip_id not in self.clips:
+            self.clips[clip_id] = self.graph.build(clip_id, resolve=self.clips.get)
+        return self.clips[clip_id]
+
+
+class TestClipCollector(unittest.TestCase):
+    def setUp(self):
+        self.fx = GraphFixture()
+        self.collector = ClipCollector(self.fx.graph, recent=2)
+
+    def chain(self, length: int) -> list[str]:
+        ids = [self.fx.source(0)]
+        for _ in range(length - 1):
+            ids.append(self.fx.add(ids[-1]))
+        for cid in ids:
+            self.collector.touch(cid)
+        return ids
+
+    def test_roots_keep_the_clips_they_are_made_from(self):
+        first = self.chain(4)
+        second = self.chain(3)
+        self.collector.name(first[1], "base")
+
+        collected = self.collector.collect(self.fx.clips)
+        self.assertEqual(set(collected), {first[2], first[3]})
+        self.assertEqual(set(self.fx.clips), {first[0], first[1], *second})
+        status = self.collector.status(self.fx.clips)
+        self.assertEqual((status[first[0]], status[first[1]]), ("reachable", "root"))
+
+    def test_collecting_ancestors(self):
+        ids = self.chain(5)
+        self.assertEqual(self.collector.collect(self.fx.clips), [])
+        self.assertEqual(set(self.collector.collect(self.fx.clips, ancestors=True)), set(ids[:3]))
+
+    def test_collected_clips_are_rebuilt(self):
+        first = self.chain(3)
+        self.chain(2)
+        self.collector.collect(self.fx.clips)
+        self.assertNotIn(first[2], self.fx.clips)
+        self.assertEqual(self.fx.get(first[2]).value, 2)
+
+    def test_clips_that_cannot_be_rebuilt_are_kept(self):
+        unrecorded = self.fx.register(FakeClip(5))
+        self.chain(3)
+        self.assertNotIn(unrecorded, self.collector.collect(self.fx.clips))
+        self.assertIn(unrecorded, self.fx.clips)
+
+    def test_forgotten_clips_are_no_roots(self):
+        ids = self.chain(2)
+        self.collector.name(ids[0], "start")
+        self.collector.forget(ids[0])
+        self.collector.forget(ids[1])
+        self.assertEqual(self.collector.roots(), set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import uuid
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from clip_graph import ClipGraph, current_build, current_operation
+
+
+class FakeClip:
+    def __init__(self, value):
+        self.value = value
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class GraphFixture:
+    """Minimal registry wired to a ClipGraph the same way server.py is."""
+
+    def __init__(self):
+        self.clips = {}
+        self.graph = ClipGraph()
+        self.calls = 0
+        # current_operation() seen by add once its input is resolved
+        self.operations = []
+
+        @self.graph.operation
+        def source(value: int) -> str:
+            self.calls += 1
+            return self.register(FakeClip(value))
+
+        @self.graph.operation
+        def add(clip_id: str, amount: int = 1) -> str:
+            clip = self.get(clip_id)
+            self.operations.append(current_operation())
+            return self.register(FakeClip(clip.value + amount))
+
+        @self.graph.operation
+        def total(clip_ids: list[str]) -> str:
+            return self.register(FakeClip(sum(self.get(cid).value for cid in clip_ids)))
+
+        self.source, self.add, self.total = source, add, total
+
+    def register(self, clip):
+        build = current_build()
+        if build is not None:
+            return build.register(clip)
+        clip_id = str(uuid.uuid4())
+        self.clips[clip_id] = clip
+        self.graph.record(clip_id)
+        return clip_id
+
+    def get(self, clip_id):
+        build = current_build()
+        if build is not None:
+            return build.get(clip_id)
+        if clip_id not in self.clips:
+            self.clips[clip_id] = self.graph.build(clip_id, resolve=self.clips.get)
+        return self.clips[clip_id]
+
+
+class TestClipGraph(unittest.TestCase):
+    def setUp(self):
+        self.fx = GraphFixture()
+
+    def test_records_operations(self):
+        """Test that tool calls are recorded with bound parameters and inputs."""
+        src = self.fx.source(2)
+        out = self.fx.add(src)
+
+        node = self.fx.graph.nodes[out]
+        self.assertEqual(node.op, "add")
+        self.assertEqual(node.params, {"clip_id": src, "amount": 1})
+        self.assertEqual(node.inputs, [src])
+
+    def test_list_inputs(self):
+        a, b = self.fx.source(1), self.fx.source(2)
+        out = self.fx.total([a, b])
+        self.assertEqual(self.fx.graph.nodes[out].inputs, [a, b])
+
+    def test_opaque_registration(self):
+        """Test that clips registered outside an operation cannot be rebuilt."""
+        clip_id = self.fx.register(FakeClip(1))
+        self.assertIsNone(self.fx.graph.nodes[clip_id].op)
+        self.assertFalse(self.fx.graph.is_rebuildable(clip_id))
+
+    def test_json_round_trip_rebuilds_lazily(self):
+        """Test that an exported graph can be imported and rebuilt on first use."""
+        src = self.fx.source(2)
+        out = self.fx.add(self.fx.add(src, 3), 4)
+        data = json.loads(self.fx.graph.to_json(out))
+
+        other = GraphFixture()
+        ids = other.graph.load(data)
+
+        self.assertEqual(set(ids), {src, out, self.fx.graph.nodes[out].inputs[0]})
+        self.assertEqual(other.calls, 0)
+        self.assertEqual(other.get(out).value, 9)
+        self.assertEqual(other.calls, 1)
+        # Only the requested clip is kept resident
+        self.assertEqual(list(other.clips), [out])
+
+    def test_build_reuses_resident_inputs(self):
+        src = self.fx.source(5)
+        out = self.fx.add(src)
+        del self.fx.clips[out]
+
+        self.assertEqual(self.fx.get(out).value, 6)
+        self.assertEqual(self.fx.calls, 1)
+
+    def test_current_operation(self):
+        """Test that the running operation is known in direct calls and in replays of nested inputs."""
+        src = self.fx.source(5)
+        out = self.fx.add(self.fx.add(src))
+        self.assertIsNone(current_operation())
+
+        with self.fx.graph.detached(out) as clip:
+            self.assertEqual(clip.value, 7)
+        self.assertEqual(self.fx.operations, ["add"] * 4)
+
+    def test_detached_build_is_private_and_closed(self):
+        """Test that detached builds never reuse registered clips and close what they open."""
+        src = self.fx.source(5)
+        out = self.fx.add(src)
+
+        with self.fx.graph.detached(out) as clip:
+            self.assertIsNot(clip, self.fx.clips[out])
+            self.assertEqual(clip.value, 6)
+        self.assertTrue(clip.closed)
+        self.assertFalse(self.fx.clips[out].closed)
+
+    def test_remove_keeps_nodes_with_dependants(self):
+        """Test that deleting an input keeps its node until its descendants are gone."""
+        src = self.fx.source(1)
+        out = self.fx.add(src)
+
+        self.fx.graph.remove(src)
+        self.assertTrue(self.fx.graph.nodes[src].deleted)
+        self.assertTrue(self.fx.graph.is_rebuildable(out))
+
+        self.fx.graph.remove(out)
+        self.assertEqual(self.fx.graph.nodes, {})
+
+    def test_fingerprint_ignores_clip_ids(self):
+        """Test that re-creating the same composition gives the same fingerprint."""
+        first = self.fx.add(self.fx.source(1), 2)
+        second = self.fx.add(self.fx.source(1), 2)
+        other = self.fx.add(self.fx.source(1), 3)
+
+        self.assertEqual(self.fx.graph.fingerprint(first), self.fx.graph.fingerprint(second))
+        self.assertNotEqual(self.fx.graph.fingerprint(first), self.fx.graph.fingerprint(other))
+        self.assertIsNone(self.fx.graph.fingerprint(self.fx.register(FakeClip(1))))
+
+    def test_fingerprint_tracks_source_files(self):
+        """Test that modifying a source file changes the fingerprint."""
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"v1")
+        self.addCleanup(os.remove, f.name)
+
+        @self.fx.graph.operation
+        def load(filename: str) -> str:
+            return self.fx.register(FakeClip(0))
+
+        clip_id = load(f.name)
+        before = self.fx.graph.fingerprint(clip_id)
+        os.utime(f.name, ns=(0, 0))
+        self.assertNotEqual(before, self.fx.graph.fingerprint(clip_id))
+
+    def test_load_rejects_unknown_operations(self):
+        data = {"version": 1, "nodes": {"a": {"op": "os_system", "params": {}, "inputs": []}}}
+        with self.assertRaisesRegex(ValueError, "unknown operation"):
+            self.fx.graph.load(data)
+
+    def test_load_rejects_missing_inputs(self):
+        data = {"version": 1, "nodes": {"a": {"op": "add", "params": {"clip_id": "b"}, "inputs": ["b"]}}}
+        with self.assertRaisesRegex(ValueError, "missing clip b"):
+            self.fx.graph.load(data)
+
+    def test_load_rejects_cycles(self):
+        data = {"version": 1, "nodes": {
+            "a": {"op": "add", "params": {"clip_id": "b"}, "inputs": []},
+            "b": {"op": "total", "params": {"clip_ids": ["c", "a"]}, "inputs": []},
+            "c": {"op": "source", "params": {"value": 1}, "inputs": []},
+        }}
+        with self.assertRaisesRegex(ValueError, "depends on itself"):
+            self.fx.graph.load(data)
+        self.assertEqual(self.fx.graph.nodes, {})
+
+    def test_load_derives_inputs_from_params(self):
+        """Test that serialized inputs disagreeing with the parameters are replaced by the parameters' clip IDs."""
+        source = self.fx.source(2)
+        data = {"version": 1, "nodes": {"a": {"op": "add", "params": {"clip_id": source}, "inputs": ["unrelated"]}}}
+        self.fx.graph.load(data)
+        self.assertEqual(self.fx.graph.nodes["a"].inputs, [source])
+        self.assertEqual(self.fx.graph.dependants(source), ["a"])
+        self.assertEqual(self.fx.get("a").value, 3)
+
+        data = {"version": 1, "nodes": {"b": {"op": "add", "params": {"clip_id": 5}}}}
+        with self.assertRaisesRegex(ValueError, "malformed input clip IDs"):
+            self.fx.graph.load(data)
+
+    def test_unknown_clip(self):
+        with self.assertRaisesRegex(ValueError, "Clip with ID missing not found."):
+            self.fx.graph.build("missing")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -76,5 +76,24 @@ class TestClipLimit(unittest.TestCase):
             self.assertIn(clip_id, server.CLIPS)
             self.assertEqual(server.CLIPS[clip_id], new_clip)
 
+    def test_rebuilt_clips_count_against_the_limit(self):
+        """Test that rebuilding a clip from the clip graph is refused like registering one at MAX_CLIPS."""
+        from clip_graph import ClipNode
+
+        limit = 2
+        server.CLIP_GRAPH.nodes["imported"] = ClipNode("imported", "color_clip", {"size": [16, 16]})
+        self.addCleanup(server.CLIP_GRAPH.nodes.pop, "imported")
+        with patch.object(server, 'MAX_CLIPS', limit), \
+                patch.object(server.CLIP_GRAPH, 'build', return_value=MagicMock()):
+            for i in range(limit):
+                server.CLIPS[str(i)] = MagicMock()
+            with self.assertRaisesRegex(RuntimeError, rf"Maximum number of clips \({limit}\) reached"):
+                server.get_clip("imported")
+            self.assertNotIn("imported", server.CLIPS)
+
+            del server.CLIPS["0"]
+            server.get_clip("imported")
+            self.assertIn("imported", server.CLIPS)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+import shutil
+import subprocess as sp
+import sys
+import tempfile
+import threading
+
+import numpy as np
+from moviepy import ColorClip, CompositeVideoClip, ImageClip, VideoFileClip
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from clip_memory import ClipMemory, clip_resources
+
+
+class TestClipResources(unittest.TestCase):
+    def test_shared_images_are_counted_once(self):
+        image = ImageClip(np.zeros((100, 200, 3), dtype=np.uint8), duration=1)
+        composite = CompositeVideoClip([image, image.with_position((10, 10)), ColorClip((20, 10), (255, 0, 0), duration=1)])
+        memory = ClipMemory()
+        usage = memory.usage({"image": image, "composite": composite})
+
+        # The pixel array is the image's and the composite's: it is reported as shared
+        self.assertEqual(usage["clips"]["image"], {"bytes": 0, "fds": 0, "open_readers": 0})
+        self.assertEqual(usage["shared"], {"bytes": 60000, "fds": 0, "open_readers": 0})
+        # Both layers share one pixel array; the composite also holds the layers' masks
+        arrays = clip_resources(composite)[1].values()
+        self.assertEqual(sum(a.shape == (100, 200, 3) for a in arrays), 1)
+        self.assertEqual(usage["clips"]["composite"]["bytes"], sum(a.nbytes for a in arrays) - 60000)
+        self.assertEqual(usage["bytes"], usage["clips"]["composite"]["bytes"] + 60000)
+
+    def test_budget_refuses_clips(self):
+        memory = ClipMemory(max_bytes=100000)
+        clips = {"a": ImageClip(np.zeros((100, 200, 3), dtype=np.uint8), duration=1)}
+        memory.admit(ImageClip(np.zeros((100, 100, 3), dtype=np.uint8), duration=1), clips)
+        with self.assertRaisesRegex(RuntimeError, r"budget \(100000 bytes\) exceeded"):
+            memory.admit(ImageClip(np.zeros((100, 200, 3), dtype=np.uint8), duration=1), clips)
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+class TestReaders(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "tone.mp4")
+        sp.run([
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc2=s=160x90:r=10:d=3",
+            "-f", "lavfi", "-i", "sine=frequency=440:duration=3",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", cls.path,
+        ], check=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def setUp(self):
+        self.clip = VideoFileClip(self.path)
+        self.addCleanup(self.clip.close)
+
+    def test_usage(self):
+        usage = ClipMemory().usage({"video": self.clip})
+        self.assertEqual(usage["clips"]["video"]["open_readers"], 2)
+        self.assertEqual(usage["clips"]["video"]["fds"], 4)
+        self.assertGreater(usage["clips"]["video"]["bytes"], 160 * 90 * 3)
+        self.assertEqual(usage["bytes"], usage["clips"]["video"]["bytes"])
+        self.assertEqual(usage["open_readers"], 2)
+
+    def test_shared_readers_are_not_counted_per_clip(self):
+        """Test that readers held by a clip and its copies are reported once, as shared."""
+        alone = ClipMemory().usage({"video": self.clip})
+        usage = ClipMemory().usage({"video": self.clip, "copy": self.clip.subclipped(1)})
+        for clip_id in ("video", "copy"):
+            self.assertEqual(usage["clips"][clip_id], {"bytes": 0, "fds": 0, "open_readers": 0})
+        self.assertEqual(usage["shared"]["open_readers"], 2)
+        self.assertEqual(usage["shared"]["fds"], 4)
+        self.assertEqual((usage["bytes"], usage["open_readers"]), (usage["shared"]["bytes"], 2))
+        self.assertEqual(alone["shared"], {"bytes": 0, "fds": 0, "open_readers": 0})
+
+    def test_idle_readers_reopen_on_next_read(self):
+        """Test that closed readers free their buffers and give the same frames and samples once reopened."""
+        memory = ClipMemory(idle_seconds=30)
+        memory.track(self.clip)
+        ts = np.linspace(1.5, 1.6, 200)
+        frame, samples = self.clip.get_frame(1.5), self.clip.audio.get_frame(ts)
+
+        for guard in memory._guards:
+            guard.last_used -= 60
+        self.assertEqual(memory.release_idle(), 2)
+        usage = memory.usage({"video": self.clip})["clips"]["video"]
+        self.assertEqual(usage, {"bytes": 0, "fds": 0, "open_readers": 0})
+
+        np.testing.assert_array_equal(self.clip.audio.get_frame(ts), samples)
+        np.testing.assert_array_equal(self.clip.get_frame(1.5), frame)
+        self.assertEqual(memory.reopened, 2)
+        self.assertEqual(memory.release_idle(), 0)
+
+    def test_budget_closes_least_recently_read_readers(self):
+        memory = ClipMemory(max_bytes=1)
+        memory.admit(self.clip, {}, strict=False)
+        self.assertEqual(memory.usage({"video": self.clip})["open_readers"], 0)
+        self.assertEqual(memory.released, 2)
+
+    def test_partial_budget_closes_only_its_clips_readers(self):
+        """Test that a budget given for some clips (a session's) leaves the readers of other clips open."""
+        memory = ClipMemory()
+        other = VideoFileClip(self.path)
+        self.addCleanup(other.close)
+        memory.track(other)
+        with self.assertRaisesRegex(RuntimeError, r"budget \(1 bytes\) exceeded"):
+            memory.admit(ImageClip(np.zeros((10, 10, 3), dtype=np.uint8), duration=1), {"video": self.clip}, max_bytes=1)
+        self.assertEqual(memory.usage({"video": self.clip})["open_readers"], 0)
+        self.assertEqual(memory.usage({"other": other})["open_readers"], 2)
+
+    def test_readers_being_read_stay_open(self):
+        memory = ClipMemory(idle_seconds=30)
+        guard, other = memory.guard(self.clip.reader), memory.guard(self.clip.audio.reader)
+        guard.last_used = other.last_used = guard.last_used - 60
+        reading, done = threading.Event(), threading.Event()
+
+        def read():
+            with guard.lock:
+                reading.set()
+                done.wait()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        reading.wait()
+        self.assertEqual(memory.release_idle(), 1)
+        done.set()
+        thread.join()
+        self.assertTrue(guard.is_open)
+        self.assertFalse(other.is_open)
+
+if __name__ == '__main__':
+    unittest.main()
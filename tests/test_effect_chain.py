@@ -0,0 +1,96 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+from moviepy import VideoClip, vfx
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from custom_fx import CloneGrid, Kaleidoscope, QuadMirror, RGBSync
+from custom_fx.effect_chain import FusedEffect, apply_fused, compile_effects
+
+
+def pattern_clip(w=96, h=64):
+    yy, xx = np.mgrid[0:h, 0:w]
+    frame = np.dstack([xx * 2, yy * 3, (xx * 7 + yy * 5) % 256]).astype(np.uint8)
+    return VideoClip(lambda t: frame, duration=1)
+
+
+class TestFusedEffect(unittest.TestCase):
+    def assertFusedMatches(self, make_effects, tolerance=0):
+        clip = pattern_clip()
+        expected = clip.with_effects(make_effects()).get_frame(0).astype(int)
+        result = clip.with_effects([FusedEffect(make_effects())]).get_frame(0).astype(int)
+        self.assertEqual(result.shape, expected.shape)
+        self.assertLessEqual(np.abs(result - expected).max(), tolerance)
+
+    def test_whole_pixel_chain_is_exact(self):
+        """Test that flips, crops, mirrors and colour effects fuse to the same pixels."""
+        self.assertFusedMatches(lambda: [
+            vfx.MirrorY(), vfx.Crop(x1=5, y1=3, width=80, height=50), QuadMirror(30, 20),
+            vfx.MirrorX(), vfx.InvertColors(), vfx.GammaCorrection(0.7), vfx.LumContrast(10, 0.3),
+        ])
+
+    def test_clone_grid(self):
+        """Test that clones are downscaled and tiled as CloneGrid does."""
+        self.assertFusedMatches(lambda: [vfx.MirrorX(), CloneGrid(8), vfx.Crop(x1=3, x2=90), vfx.MultiplyColor(1.5)])
+
+    def test_interpolating_chain(self):
+        """Test a chain composing a sub-pixel map with a fold."""
+        self.assertFusedMatches(lambda: [QuadMirror(), Kaleidoscope(6), vfx.MirrorX(), vfx.InvertColors()], tolerance=2)
+
+    def test_black_and_white(self):
+        """Test that channel mixes are exact up to the rounding of the weighted sum."""
+        self.assertFusedMatches(lambda: [
+            vfx.InvertColors(), vfx.BlackAndWhite(), vfx.MultiplyColor(1.3), vfx.BlackAndWhite(RGB="CRT_phosphor"),
+        ], tolerance=3)
+
+    def test_masked_clips_are_processed_effect_by_effect(self):
+        """Test that flips and crops still apply to the mask."""
+        mask_frame = np.zeros((64, 96))
+        mask_frame[:, :50] = 1
+        mask = VideoClip(lambda t: mask_frame, duration=1, is_mask=True)
+        clip = pattern_clip().with_mask(mask)
+        fused = clip.with_effects([FusedEffect([vfx.MirrorX(), vfx.Crop(x1=10)])])
+
+        self.assertEqual(fused.mask.size, (86, 64))
+        self.assertFalse(fused.mask.get_frame(0)[:, :36].any())
+
+    def test_rejects_other_effects(self):
+        with self.assertRaises(ValueError):
+            FusedEffect([vfx.MirrorX(), RGBSync()])
+
+
+class TestEffectChain(unittest.TestCase):
+    def test_runs_are_applied_to_their_source(self):
+        """Test that each fusible effect joins the run of the clip it is applied to."""
+        source = pattern_clip()
+        clip = apply_fused(apply_fused(apply_fused(source, vfx.MirrorX()), vfx.InvertColors()), QuadMirror())
+
+        _, chain_source, effects = clip.fused_chain
+        self.assertIs(chain_source, source)
+        self.assertEqual([type(e).__name__ for e in effects], ["MirrorX", "InvertColors", "QuadMirror"])
+        expected = source.with_effects([vfx.MirrorX(), vfx.InvertColors(), QuadMirror()]).get_frame(0)
+        np.testing.assert_array_equal(clip.get_frame(0), expected)
+
+    def test_copies_and_other_effects_start_a_new_run(self):
+        fused = apply_fused(pattern_clip(), vfx.MirrorX())
+        moved = fused.with_position((10, 0))
+        self.assertIs(apply_fused(moved, vfx.MirrorY()).fused_chain[1], moved)
+
+        synced = apply_fused(fused, RGBSync(r_offset=(2, 0)))
+        self.assertFalse(hasattr(synced, "fused_chain") and synced.fused_chain[0]() is synced)
+        self.assertIs(apply_fused(synced, vfx.MirrorY()).fused_chain[1], synced)
+
+    def test_compile_effects(self):
+        sync = RGBSync()
+        compiled = compile_effects([vfx.MirrorX(), vfx.InvertColors(), sync, Kaleidoscope(), vfx.BlackAndWhite()])
+
+        self.assertEqual([type(e).__name__ for e in compiled], ["FusedEffect", "RGBSync", "FusedEffect"])
+        self.assertIs(compiled[1], sync)
+        self.assertEqual(len(compiled[0].effects), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import os
+import sys
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from frame_cache import FrameCache
+
+
+class CountingClip:
+    """Clip stand-in whose frames are 100-byte arrays filled with int(t)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.frame_function = self.compute
+
+    def compute(self, t):
+        self.calls += 1
+        return np.full(100, int(np.max(t)), dtype=np.uint8)
+
+    def get_frame(self, t):
+        return self.frame_function(t)
+
+
+class TestFrameCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = FrameCache(max_bytes=1000)
+        self.clip = self.cache.attach(CountingClip(), "node")
+
+    def test_hit_avoids_recomputing(self):
+        first = self.clip.get_frame(1.0)
+        second = self.clip.get_frame(1.0)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.clip.calls, 1)
+        self.assertFalse(first.flags.writeable)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bytes"]), (1, 1, 100))
+
+    def test_time_is_quantized(self):
+        self.clip.get_frame(1.0)
+        self.clip.get_frame(1.0 + 1e-6)
+        self.assertEqual(self.clip.calls, 1)
+
+    def test_nodes_do_not_share_frames(self):
+        other = self.cache.attach(CountingClip(), "other")
+        self.clip.get_frame(1.0)
+        other.get_frame(1.0)
+        self.assertEqual((self.clip.calls, other.calls), (1, 1))
+
+    def test_derived_copies_share_cache(self):
+        """Test that copies keeping the parent's frame_function reuse its frames."""
+        copy = CountingClip()
+        copy.frame_function = self.clip.frame_function
+        self.clip.get_frame(2.0)
+        copy.get_frame(2.0)
+        self.assertEqual(self.clip.calls, 1)
+
+    def test_copies_are_not_attached_twice(self):
+        """Test that attaching a copy of an attached clip keeps its frames under the original node."""
+        copy = CountingClip()
+        copy.frame_function = self.clip.frame_function
+        self.assertIs(self.cache.attach(copy, "copy").frame_function, self.clip.frame_function)
+        self.clip.get_frame(2.0)
+        copy.get_frame(2.0)
+        stats = self.cache.stats()
+        self.assertEqual((stats["frames"], stats["hits"], stats["misses"]), (1, 1, 1))
+
+    def test_producer_arrays_stay_writable(self):
+        """Test that the cache hands out read-only views without freezing the producer's array."""
+        frame = np.zeros(100, dtype=np.uint8)
+        clip = CountingClip()
+        clip.frame_function = lambda t: frame
+        self.cache.attach(clip, "image")
+
+        cached = clip.get_frame(1.0)
+        self.assertFalse(cached.flags.writeable)
+        self.assertTrue(frame.flags.writeable)
+        frame += 1
+
+    def test_lru_eviction(self):
+        """Test that the budget holds and the least recently used frame goes first."""
+        for t in range(10):
+            self.clip.get_frame(float(t))
+        self.clip.get_frame(0.0)
+        self.clip.get_frame(10.0)
+
+        self.assertEqual(self.cache.stats()["bytes"], 1000)
+        calls = self.clip.calls
+        self.clip.get_frame(0.0)
+        self.assertEqual(self.clip.calls, calls)
+        self.clip.get_frame(1.0)
+        self.assertEqual(self.clip.calls, calls + 1)
+
+    def test_disabled_by_default(self):
+        cache = FrameCache()
+        clip = cache.attach(CountingClip(), "node")
+        clip.get_frame(1.0)
+        clip.get_frame(1.0)
+        self.assertEqual(clip.calls, 2)
+        self.assertEqual(cache.stats()["misses"], 0)
+
+    def test_array_times_bypass_cache(self):
+        """Test that audio-style lookups with arrays of times are not cached."""
+        self.clip.get_frame(np.array([0.0, 0.5]))
+        self.assertEqual(self.cache.stats()["frames"], 0)
+
+    def test_configure_shrinks_cache(self):
+        for t in range(5):
+            self.clip.get_frame(float(t))
+        self.cache.configure(200)
+        self.assertEqual(self.cache.stats()["frames"], 2)
+        self.cache.configure(0)
+        self.assertEqual(self.cache.stats()["frames"], 0)
+        with self.assertRaises(ValueError):
+            self.cache.configure(-1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import subprocess as sp
+import sys
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add src to sys.path
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, SRC)
+
+from lazy import LazyAttribute, lazy_import
+
+PROBE = """
+import os
+os.environ["LAZY_PROBE_RUNS"] = str(int(os.environ.get("LAZY_PROBE_RUNS", "0")) + 1)
+
+class Thing:
+    pass
+
+def make(value):
+    return [value]
+"""
+
+
+def imported_modules(code: str) -> set:
+    """The modules a fresh interpreter has imported after running code."""
+    code += "\nimport sys\nprint(' '.join(sys.modules))"
+    env = dict(os.environ, PYTHONPATH=SRC, LITELLM_LOCAL_MODEL_COST_MAP="True")
+    result = sp.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+class TestLazyImport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "lazy_probe.py"), "w") as f:
+            f.write(PROBE)
+        sys.path.insert(0, self.tmp.name)
+        os.environ.pop("LAZY_PROBE_RUNS", None)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp.name)
+        sys.modules.pop("lazy_probe", None)
+        self.tmp.cleanup()
+
+    def test_module_runs_on_first_use(self):
+        probe = lazy_import("lazy_probe")
+        self.assertNotIn("LAZY_PROBE_RUNS", os.environ)
+        self.assertEqual(probe.make(1), [1])
+        self.assertEqual(os.environ["LAZY_PROBE_RUNS"], "1")
+        self.assertIs(lazy_import("lazy_probe"), sys.modules["lazy_probe"])
+
+    def test_replaced_modules_are_returned(self):
+        mock = MagicMock()
+        with patch.dict(sys.modules, {"lazy_probe": mock}):
+            self.assertIs(lazy_import("lazy_probe"), mock)
+
+    def test_missing_module(self):
+        with self.assertRaises(ModuleNotFoundError):
+            lazy_import("lazy_probe_missing")
+
+    def test_lazy_attribute(self):
+        """Test that calls, attributes and isinstance checks go to the real object."""
+        probe = lazy_import("lazy_probe")
+        thing, make = LazyAttribute(probe, "Thing"), LazyAttribute(probe, "make")
+        self.assertNotIn("LAZY_PROBE_RUNS", os.environ)
+
+        self.assertEqual(make(2), [2])
+        self.assertIsInstance(thing(), thing)
+        self.assertNotIsInstance(3, thing)
+        self.assertEqual(thing.__name__, "Thing")
+
+
+class TestStartupImports(unittest.TestCase):
+    def test_effects_load_on_first_use(self):
+        modules = imported_modules("import custom_fx\nfrom custom_fx import WARP_CACHE")
+        self.assertFalse({"cv2", "numpy", "moviepy", "custom_fx.quad_mirror"} & modules)
+
+        modules = imported_modules("import custom_fx\ncustom_fx.QuadMirror")
+        self.assertIn("custom_fx.quad_mirror", modules)
+        self.assertNotIn("custom_fx.matrix", modules)
+
+    def test_server_starts_without_media_libraries(self):
+        modules = imported_modules("import server")
+        self.assertFalse({"moviepy", "numpy", "cv2", "PIL", "numexpr", "litellm"} & modules)
+
+if __name__ == '__main__':
+    unittest.main()
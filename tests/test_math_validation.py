@@ -198,24 +198,23 @@ class TestVfxHeadBlur(unittest.TestCase):
         self.mock_get_clip = self.get_clip_patcher.start()
         self.mock_register_clip = self.register_clip_patcher.start()
 
-        self.numexpr_patcher = patch('server.numexpr')
-        self.mock_numexpr = self.numexpr_patcher.start()
+        self.expression_patcher = patch.object(sys.modules['custom_fx'].Animation, 'expression')
+        self.mock_expression = self.expression_patcher.start()
 
     def tearDown(self):
         self.get_clip_patcher.stop()
         self.register_clip_patcher.stop()
-        self.numexpr_patcher.stop()
+        self.expression_patcher.stop()
 
     def test_valid_input(self):
         """Test vfx_head_blur with valid math expressions."""
-        self.mock_numexpr.evaluate.return_value = 10.0
-
         result = vfx_head_blur(self.clip_id, "100 + t", "50 * t", 10.0)
 
         self.assertEqual(result, "new_clip_id")
         self.mock_clip.with_effects.assert_called_once()
-        self.mock_numexpr.evaluate.assert_any_call("100 + t", local_dict={"t": 0})
-        self.mock_numexpr.evaluate.assert_any_call("50 * t", local_dict={"t": 0})
+        self.mock_expression.assert_any_call("100 + t")
+        self.mock_expression.assert_any_call("50 * t")
+        self.mock_expression.return_value.assert_any_call(0)
 
     def test_invalid_syntax_fx(self):
         """Test vfx_head_blur with invalid syntax in fx_code."""
@@ -229,9 +228,9 @@ class TestVfxHeadBlur(unittest.TestCase):
             vfx_head_blur(self.clip_id, "eval('1')", "50 * t", 10.0)
         self.assertIn("Security check failed", str(cm.exception))
 
-    def test_numexpr_evaluation_error(self):
-        """Test handling of runtime errors from numexpr during initial check."""
-        self.mock_numexpr.evaluate.side_effect = Exception("Runtime error")
+    def test_evaluation_error(self):
+        """Test handling of runtime errors from the compiled expression during initial check."""
+        self.mock_expression.return_value.side_effect = Exception("Runtime error")
 
         with self.assertRaises(ValueError) as cm:
             vfx_head_blur(self.clip_id, "1 / 0", "50 * t", 10.0)
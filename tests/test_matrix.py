@@ -0,0 +1,55 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from moviepy import VideoClip
+from custom_fx.matrix import Matrix, glyph_atlas
+
+
+def clip_of(frame, duration=2):
+    return VideoClip(lambda t: frame, duration=duration)
+
+
+class TestMatrix(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.random.default_rng(0).integers(0, 256, (90, 170, 3), dtype=np.uint8)
+        self.frame.flags.writeable = False  # as served by the frame cache
+
+    def test_atlas_is_shared(self):
+        a, b = Matrix(font_size=12), Matrix(font_size=12)
+        clip = clip_of(self.frame)
+        a.apply(clip), b.apply(clip)
+        self.assertIs(a._atlas, b._atlas)
+        self.assertIs(a._atlas, glyph_atlas("0123456789ABCDEF", 12))
+        self.assertEqual(a._atlas.shape, (16, int(12 * 1.3), 12))
+
+    def test_no_rain_only_dims(self):
+        out = Matrix(density=0).apply(clip_of(self.frame)).get_frame(0.5)
+        np.testing.assert_array_equal(out, (self.frame.astype(np.uint16) * 205 >> 8).astype(np.uint8))
+
+    def test_rain_is_additive_and_saturates(self):
+        """Test that rain only brightens the dimmed frame, in the rain colour, without wrapping."""
+        white = np.full((90, 170, 3), 255, np.uint8)
+        out = Matrix(density=1, color="green").apply(clip_of(white)).get_frame(1.0)
+        dimmed = np.full_like(white, 255 * 205 >> 8)
+
+        np.testing.assert_array_equal(out[..., [0, 2]], dimmed[..., [0, 2]])
+        self.assertTrue((out[..., 1] >= dimmed[..., 1]).all())
+        self.assertEqual(out[..., 1].max(), 255)
+
+    def test_frames_are_fresh_and_deterministic(self):
+        effect = Matrix(density=0.5).apply(clip_of(self.frame))
+        first = effect.get_frame(0.7)
+        effect.get_frame(1.3)
+        np.testing.assert_array_equal(first, effect.get_frame(0.7))
+        self.assertIsNot(first, effect.get_frame(0.7))
+        self.assertEqual(first.shape, self.frame.shape)
+        self.assertEqual(first.dtype, np.uint8)
+
+if __name__ == '__main__':
+    unittest.main()
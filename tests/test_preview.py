@@ -0,0 +1,45 @@
+import unittest
+import os
+import sys
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from preview import build_playlist, preview_size, segment_bounds, segment_count
+
+
+class TestPreview(unittest.TestCase):
+    def test_preview_size_downscales_to_even_dimensions(self):
+        self.assertEqual(preview_size((1920, 1080), 360), (640, 360))
+        self.assertEqual(preview_size((1080, 1920), 360), (202, 360))
+
+    def test_preview_size_never_upscales(self):
+        self.assertEqual(preview_size((320, 240), 360), (320, 240))
+
+    def test_segments_cover_duration(self):
+        """Test that segments are contiguous and the last one is shortened."""
+        self.assertEqual(segment_count(5.0, 2.0), 3)
+        self.assertEqual(segment_bounds(5.0, 2.0, 0), (0.0, 2.0))
+        self.assertEqual(segment_bounds(5.0, 2.0, 2), (4.0, 5.0))
+        self.assertEqual(segment_count(4.0, 2.0), 2)
+
+    def test_segment_out_of_range(self):
+        with self.assertRaises(ValueError):
+            segment_bounds(5.0, 2.0, 3)
+        with self.assertRaises(ValueError):
+            segment_bounds(5.0, 2.0, -1)
+
+    def test_playlist(self):
+        """Test that the playlist is a complete VOD playlist listing every segment."""
+        playlist = build_playlist(5.0, 2.0, lambda index: f"{index}.ts")
+        lines = playlist.splitlines()
+
+        self.assertEqual(lines[0], "#EXTM3U")
+        self.assertIn("#EXT-X-PLAYLIST-TYPE:VOD", lines)
+        self.assertIn("#EXT-X-TARGETDURATION:2", lines)
+        self.assertEqual([line for line in lines if line.endswith(".ts")], ["0.ts", "1.ts", "2.ts"])
+        self.assertIn("#EXTINF:1.000,", lines)
+        self.assertEqual(lines[-1], "#EXT-X-ENDLIST")
+
+if __name__ == '__main__':
+    unittest.main()
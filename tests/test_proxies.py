@@ -0,0 +1,124 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+sys.modules['moviepy'] = MagicMock()
+sys.modules['moviepy.config'] = MagicMock(FFMPEG_BINARY="ffmpeg")
+
+from proxies import ProxyManager
+
+
+def fake_ffmpeg(cmd, **kwargs):
+    """Writes the output file like ffmpeg would."""
+    with open(cmd[-1], "wb") as f:
+        f.write(b"proxy")
+    return MagicMock(returncode=0)
+
+
+def wait_for(proxy, timeout=5.0):
+    deadline = time.time() + timeout
+    while proxy.status == "pending" and time.time() < deadline:
+        time.sleep(0.01)
+    return proxy
+
+
+class TestProxyManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "source.mp4")
+        with open(self.source, "wb") as f:
+            f.write(b"original")
+        self.ready = []
+        self.manager = ProxyManager(os.path.join(self.tmpdir.name, "proxies"), height=540, on_ready=self.ready.append)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @patch('proxies.sp.run', side_effect=fake_ffmpeg)
+    def test_generates_all_intra_proxy(self, mock_run):
+        """Test that a large source gets a downscaled all-intra proxy in the background."""
+        proxy = wait_for(self.manager.request(self.source, (3840, 2160)))
+
+        self.assertEqual(proxy.status, "ready")
+        self.assertTrue(proxy.path.exists())
+        self.assertEqual(self.manager.lookup(self.source), proxy)
+        self.assertEqual(self.ready, [self.source])
+        cmd = mock_run.call_args[0][0]
+        self.assertIn("scale=-2:540", cmd)
+        self.assertEqual(cmd[cmd.index("-g") + 1], "1")
+
+    @patch('proxies.sp.run', side_effect=fake_ffmpeg)
+    def test_small_sources_are_not_proxied(self, mock_run):
+        self.assertIsNone(self.manager.request(self.source, (960, 540)))
+        mock_run.assert_not_called()
+
+    @patch('proxies.sp.run', side_effect=fake_ffmpeg)
+    def test_request_is_idempotent(self, mock_run):
+        first = wait_for(self.manager.request(self.source, (1920, 1080)))
+        self.assertIs(self.manager.request(self.source, (1920, 1080)), first)
+        self.assertEqual(mock_run.call_count, 1)
+
+    @patch('proxies.sp.run', side_effect=fake_ffmpeg)
+    def test_proxies_survive_restart(self, mock_run):
+        """Test that proxies on disk are found by a new manager with the original size."""
+        wait_for(self.manager.request(self.source, (1920, 1080)))
+
+        manager = ProxyManager(self.manager.directory, height=540)
+        proxy = manager.lookup(self.source)
+        self.assertIsNotNone(proxy)
+        self.assertEqual(proxy.size, (1920, 1080))
+
+    @patch('proxies.sp.run', side_effect=fake_ffmpeg)
+    def test_modified_source_invalidates_proxy(self, mock_run):
+        wait_for(self.manager.request(self.source, (1920, 1080)))
+        os.utime(self.source, ns=(0, 0))
+        self.assertIsNone(self.manager.lookup(self.source))
+
+    @patch('proxies.sp.run')
+    def test_failed_generation(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=1, stderr=b"boom")
+
+        proxy = wait_for(self.manager.request(self.source, (1920, 1080)))
+
+        self.assertEqual(proxy.status, "failed")
+        self.assertIn("boom", proxy.error)
+        self.assertIsNone(self.manager.lookup(self.source))
+        self.assertEqual(self.ready, [])
+
+    @patch('proxies.sp.run', side_effect=fake_ffmpeg)
+    def test_lru_eviction(self, mock_run):
+        """Test that the least recently used proxies are evicted over budget and their sources fall back."""
+        sources = []
+        for name in ("a.mp4", "b.mp4", "c.mp4"):
+            sources.append(os.path.join(self.tmpdir.name, name))
+            with open(sources[-1], "wb") as f:
+                f.write(b"original")
+        a, b, c = sources
+        wait_for(self.manager.request(a, (1920, 1080)))
+        proxy_bytes = sum(e.stat().st_size for e in os.scandir(self.manager.directory))
+        self.manager.max_bytes = 2 * proxy_bytes
+        wait_for(self.manager.request(b, (1920, 1080)))
+        self.assertIsNotNone(self.manager.lookup(a))
+
+        wait_for(self.manager.request(c, (1920, 1080)))
+
+        self.assertIsNone(self.manager.lookup(b))
+        self.assertIsNotNone(self.manager.lookup(a))
+        self.assertIsNotNone(self.manager.lookup(c))
+        self.assertEqual(len(os.listdir(self.manager.directory)), 4)
+        # Requested again, an evicted proxy is generated again
+        self.assertEqual(wait_for(self.manager.request(b, (1920, 1080))).status, "ready")
+
+    def test_disabled(self):
+        manager = ProxyManager(self.manager.directory, height=0)
+        self.assertIsNone(manager.request(self.source, (3840, 2160)))
+        self.assertIsNone(manager.lookup(self.source))
+
+if __name__ == '__main__':
+    unittest.main()
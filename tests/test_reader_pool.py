@@ -0,0 +1,94 @@
+import unittest
+import os
+import shutil
+import subprocess as sp
+import sys
+import tempfile
+
+import numpy as np
+from moviepy import AudioFileClip, VideoFileClip
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from clip_memory import ClipMemory
+from reader_pool import ReaderPool, SharedReader
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+class TestReaderPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "tone.mp4")
+        sp.run([
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc2=s=160x90:r=10:d=4",
+            "-f", "lavfi", "-i", "sine=frequency=440:duration=4",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", cls.path,
+        ], check=True)
+        reference = VideoFileClip(cls.path)
+        cls.frames = [reference.get_frame(i / 10) for i in range(40)]
+        cls.samples = reference.audio.to_soundarray()
+        reference.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def open(self, pool, **kwargs):
+        clip = pool.share(VideoFileClip(self.path, **kwargs))
+        self.addCleanup(clip.close)
+        return clip
+
+    def test_clips_of_a_source_share_readers(self):
+        pool = ReaderPool(ClipMemory(), max_processes=8)
+        first, second = self.open(pool), self.open(pool)
+        self.assertIsInstance(first.reader, SharedReader)
+        self.assertEqual(pool.stats()["processes"], 2)
+        self.assertEqual([source["clips"] for source in pool.stats()["sources"]], [2, 2])
+
+        smaller = self.open(pool, target_resolution=(None, 45))
+        self.assertEqual(smaller.get_frame(0).shape, (45, 80, 3))
+        self.assertEqual(len(pool.stats()["sources"]), 3)
+
+    def test_interleaved_streams_keep_warm_readers(self):
+        """Test that two parts of a source read in turn get a reader each, with the frames of a private reader."""
+        pool = ReaderPool(ClipMemory(), max_processes=8)
+        clip = self.open(pool)
+        later = clip.subclipped(2)
+        for i in range(20):
+            np.testing.assert_array_equal(clip.get_frame(i / 10), self.frames[i])
+            np.testing.assert_array_equal(later.get_frame(i / 10), self.frames[20 + i])
+        stats = pool.stats()
+        self.assertEqual(stats["spawned"], 1)
+        self.assertEqual(stats["restarts"], 0)
+        self.assertGreaterEqual(stats["warm_reads"], 38)
+
+    def test_process_limit(self):
+        pool = ReaderPool(ClipMemory(), max_processes=1)
+        clip = self.open(pool)
+        self.assertEqual(pool.stats()["processes"], 1)
+        later = clip.subclipped(2)
+        for i in range(5):
+            np.testing.assert_array_equal(clip.get_frame(i / 10), self.frames[i])
+            np.testing.assert_array_equal(later.get_frame(i / 10), self.frames[20 + i])
+            self.assertLessEqual(pool.stats()["processes"], 1)
+        np.testing.assert_allclose(clip.audio.to_soundarray(), self.samples)
+
+    def test_closed_clips_release_their_readers(self):
+        """Test that closing a clip closes its source's readers, and that clips it was copied from rejoin the pool."""
+        pool = ReaderPool(ClipMemory())
+        audio = pool.share(AudioFileClip(self.path))
+        readers = audio.reader.readers
+        audio.copy().close()
+        self.assertEqual(pool.stats()["sources"], [])
+        self.assertTrue(all(reader.proc is None for reader in readers))
+
+        np.testing.assert_allclose(audio.to_soundarray(), self.samples)
+        self.assertEqual(pool.stats()["sources"][0]["clips"], 1)
+        audio.close()
+        self.assertEqual(pool.stats()["processes"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from render_cache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.tmpdir.name, "cache"), max_bytes=1000)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def render(self, name, content=b"x" * 100):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_key_depends_on_settings(self):
+        a = RenderCache.key("abc", "video", ".mp4", {"preset": "fast"})
+        self.assertEqual(a, RenderCache.key("abc", "video", ".MP4", {"preset": "fast"}))
+        self.assertNotEqual(a, RenderCache.key("abc", "video", ".mp4", {"preset": "slow"}))
+        self.assertNotEqual(a, RenderCache.key("abc", "gif", ".mp4", {"preset": "fast"}))
+
+    def test_miss_then_hit(self):
+        """Test that a stored render is served to a new output path."""
+        target = os.path.join(self.tmpdir.name, "copy.mp4")
+        self.assertFalse(self.cache.fetch("k", target))
+
+        self.cache.store("k", self.render("out.mp4", b"video"))
+        self.assertTrue(self.cache.fetch("k", target))
+
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), b"video")
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted over budget."""
+        for i in range(3):
+            self.cache.store(f"k{i}", self.render(f"out{i}.mp4", b"x" * 300))
+            os.utime(self.cache._entry(f"k{i}", ".mp4"), ns=(i * 10**9, i * 10**9))
+        # Touch k0 so that k1 becomes the oldest entry
+        self.cache.fetch("k0", os.path.join(self.tmpdir.name, "copy.mp4"))
+
+        self.cache.store("k3", self.render("out3.mp4", b"x" * 300))
+
+        self.assertLessEqual(self.cache.stats()["bytes"], 1000)
+        self.assertTrue(self.cache._entry("k0", ".mp4").exists())
+        self.assertFalse(self.cache._entry("k1", ".mp4").exists())
+        self.assertTrue(self.cache._entry("k3", ".mp4").exists())
+
+    def test_disabled(self):
+        cache = RenderCache(os.path.join(self.tmpdir.name, "off"), max_bytes=0)
+        cache.store("k", self.render("out.mp4"))
+        self.assertFalse(cache.fetch("k", os.path.join(self.tmpdir.name, "copy.mp4")))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from render_jobs import RenderJobManager
+
+
+def wait_for(job, timeout=5.0):
+    """Waits until a job has left the queued/running states."""
+    deadline = time.time() + timeout
+    while job.status in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def fake_render(n_frames, started=None, release=None):
+    """Returns a render function that drives the logger like MoviePy's writers do."""
+    def render(logger, path):
+        if started is not None:
+            started.set()
+        with open(path, "wb") as f:
+            for _ in logger.iter_bar(frame_index=range(n_frames)):
+                if release is not None:
+                    release.wait(1)
+                f.write(b"frame")
+    return render
+
+
+class TestRenderJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = RenderJobManager(max_workers=1)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.out = os.path.join(self.tmpdir.name, "out.mp4")
+
+    def write_output(self, content):
+        with open(self.out, "wb") as f:
+            f.write(content)
+
+    def assert_output(self, content):
+        """Asserts the output's content, and that no partial output was left next to it."""
+        with open(self.out, "rb") as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["out.mp4"])
+
+    def test_submit_returns_immediately_and_completes(self):
+        """Test that submit returns a queued/running job that completes in the background."""
+        release = threading.Event()
+        job = self.manager.submit("video", "clip_1", self.out, fake_render(10, release=release))
+
+        self.assertIn(job.status, ("queued", "running"))
+        release.set()
+        wait_for(job)
+
+        status = job.to_dict()
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(status["progress"], 100.0)
+        self.assertEqual(status["output_path"], self.out)
+        self.assert_output(b"frame" * 10)
+        self.assertIsNone(status["eta_seconds"])
+
+    def test_progress_and_eta_reported(self):
+        """Test that progress is derived from the writer's progress bar."""
+        started = threading.Event()
+        release = threading.Event()
+        job = self.manager.submit("video", "clip_1", self.out, fake_render(4, started, release))
+        started.wait(1)
+
+        deadline = time.time() + 2
+        while job.progress == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(job.progress, 0)
+        self.assertEqual(job.status, "running")
+        self.assertIsNotNone(job.to_dict()["eta_seconds"])
+
+        release.set()
+        wait_for(job)
+
+    def test_ignores_other_bars(self):
+        """Test that only the configured bar drives progress (audio chunks precede video frames)."""
+        release = threading.Event()
+
+        def render(logger, path):
+            for _ in logger.iter_bar(chunk=range(3)):
+                pass
+            release.wait(1)
+            open(path, "wb").close()
+
+        job = self.manager.submit("video", "clip_1", self.out, render)
+        time.sleep(0.1)
+        self.assertEqual(job.progress, 0)
+        release.set()
+        wait_for(job)
+
+    def test_cancel_running_job(self):
+        """Test that a running job stops at the next progress update and removes its partial output only."""
+        self.write_output(b"previous")
+        started = threading.Event()
+        job = self.manager.submit("video", "clip_1", self.out, fake_render(1000, started, threading.Event()))
+        started.wait(1)
+
+        self.manager.cancel(job.job_id)
+        wait_for(job)
+
+        self.assertEqual(job.status, "cancelled")
+        self.assert_output(b"previous")
+
+    def test_completed_job_replaces_output(self):
+        """Test that an existing output is only replaced once the render is complete."""
+        self.write_output(b"previous")
+        started = threading.Event()
+        release = threading.Event()
+        job = self.manager.submit("video", "clip_1", self.out, fake_render(2, started, release))
+        started.wait(1)
+        with open(self.out, "rb") as f:
+            self.assertEqual(f.read(), b"previous")
+
+        release.set()
+        wait_for(job)
+
+        self.assertEqual(job.status, "completed")
+        self.assert_output(b"frame" * 2)
+
+    def test_cancel_queued_job(self):
+        """Test that a queued job never starts once cancelled."""
+        release = threading.Event()
+        first = self.manager.submit("video", "clip_1", self.out, fake_render(5, release=release))
+        ran = threading.Event()
+        second = self.manager.submit("video", "clip_2", self.out, lambda logger, path: ran.set())
+
+        self.manager.cancel(second.job_id)
+        release.set()
+        wait_for(first)
+        wait_for(second)
+
+        self.assertEqual(second.status, "cancelled")
+        self.assertFalse(ran.is_set())
+
+    def test_failed_job_reports_error(self):
+        """Test that exceptions raised by the writer mark the job as failed."""
+        def render(logger, path):
+            with open(path, "wb") as f:
+                f.write(b"partial")
+            raise RuntimeError("ffmpeg exploded")
+
+        self.write_output(b"previous")
+        job = wait_for(self.manager.submit("video", "clip_1", self.out, render))
+
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "ffmpeg exploded")
+        self.assert_output(b"previous")
+
+    def test_get_unknown_job(self):
+        """Test that unknown job IDs raise ValueError."""
+        with self.assertRaisesRegex(ValueError, "Render job with ID missing not found."):
+            self.manager.get("missing")
+
+    def test_list_jobs(self):
+        """Test that submitted jobs are listed."""
+        job = wait_for(self.manager.submit("audio", "clip_1", self.out, fake_render(1)))
+        self.assertIn(job, self.manager.list())
+
+    def test_jobs_are_scoped_to_sessions(self):
+        """Test that a session only sees, counts and cancels its own jobs."""
+        release = threading.Event()
+        job = self.manager.submit("video", "clip_1", self.out, fake_render(10, release=release), session="a")
+        self.addCleanup(wait_for, job)
+        self.addCleanup(release.set)
+        self.assertEqual(self.manager.list("a"), [job])
+        self.assertEqual(self.manager.list("b"), [])
+        self.assertEqual((self.manager.active("a"), self.manager.active("b")), (1, 0))
+        self.assertIs(self.manager.get(job.job_id, "a"), job)
+        with self.assertRaisesRegex(ValueError, "not found"):
+            self.manager.cancel(job.job_id, "b")
+        self.assertFalse(job.cancel_requested.is_set())
+
+    def test_finished_jobs_are_evicted(self):
+        """Test that finished jobs are dropped after the TTL and beyond max_finished, but never active ones."""
+        manager = RenderJobManager(max_workers=1, ttl=60, max_finished=3)
+        release = threading.Event()
+        running = manager.submit("video", "clip_1", self.out, fake_render(10, release=release))
+        self.addCleanup(wait_for, running)
+        self.addCleanup(release.set)
+        old, a, b = (manager.add_cached("video", f"clip_{i}", self.out) for i in range(3))
+        old.finished_at -= 120
+
+        self.assertEqual(manager.list(), [running, a, b])
+        c, d = (manager.add_cached("video", f"clip_{i}", self.out) for i in range(3, 5))
+        self.assertEqual(manager.list(), [running, b, c, d])
+        with self.assertRaisesRegex(ValueError, "not found"):
+            manager.get(a.job_id)
+
+if __name__ == '__main__':
+    unittest.main()
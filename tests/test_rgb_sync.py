@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from moviepy import VideoClip
+from custom_fx.rgb_sync import RGBSync, roll_into
+
+
+class CountingClip:
+    """Frames whose pixels encode the frame index, counting decodes."""
+
+    def __init__(self, fps=10, duration=2):
+        self.fps = fps
+        self.duration = duration
+        self.decodes = []
+        rng = np.random.default_rng(0)
+        self.base = rng.integers(0, 200, (12, 20, 3), dtype=np.uint8)
+
+    def frame_function(self, t):
+        self.decodes.append(t)
+        return self.base + np.uint8(round(t * self.fps))
+
+    def clip(self):
+        clip = VideoClip(self.frame_function, duration=self.duration)
+        clip.fps = self.fps
+        self.decodes.clear()
+        return clip
+
+
+def reference(frames, offsets):
+    return np.stack([np.roll(frames[i][:, :, i], offsets[i], axis=(1, 0)) for i in range(3)], axis=-1)
+
+
+class TestRollInto(unittest.TestCase):
+    def test_matches_np_roll(self):
+        src = np.arange(5 * 7).reshape(5, 7)
+        for dx, dy in [(0, 0), (3, 0), (0, -2), (-9, 4), (7, 5), (15, -11)]:
+            dst = np.full_like(src, -1)
+            roll_into(dst, src, dx, dy)
+            np.testing.assert_array_equal(dst, np.roll(src, (dy, dx), axis=(0, 1)), (dx, dy))
+
+
+class TestRGBSync(unittest.TestCase):
+    def test_spatial_offsets(self):
+        source = CountingClip()
+        offsets = [(10, 0), (0, 0), (-10, 3)]
+        effect = RGBSync(*offsets).apply(source.clip())
+        source.decodes.clear()
+        out = effect.get_frame(0.5)
+
+        frame = source.frame_function(0.5)
+        np.testing.assert_array_equal(out, reference([frame] * 3, offsets))
+        self.assertEqual(source.decodes[:-1], [0.5])
+
+    def test_time_offsets_match_direct_decoding(self):
+        source = CountingClip()
+        effect = RGBSync(r_offset=(2, 0), g_time_offset=0.2, b_time_offset=-0.1).apply(source.clip())
+        for t in (1.5, 0.3, 0.0, 1.95):
+            frames = [source.frame_function(max(0, min(2, t + dt))) for dt in (0, 0.2, -0.1)]
+            np.testing.assert_array_equal(effect.get_frame(t), reference(frames, [(2, 0), (0, 0), (0, 0)]))
+
+    def test_sequential_render_decodes_each_frame_once(self):
+        source = CountingClip()
+        effect = RGBSync(g_time_offset=0.2, b_time_offset=-0.1).apply(source.clip())
+        source.decodes.clear()
+        times = [i / source.fps for i in range(source.duration * source.fps)]
+        for t in times:
+            effect.get_frame(t)
+
+        decoded = [round(t * 1000) for t in source.decodes]
+        self.assertEqual(len(decoded), len(set(decoded)))
+        self.assertLessEqual(len(decoded), len(times) + 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -54,7 +54,7 @@ mock_numpy.cross.return_value.__getitem__.return_value = 1.0
 mock_numpy.float32 = float
 mock_numpy.any.return_value = mock_array()
 
-mock_cv2.getPerspectiveTransform.return_value = MagicMock()
+mock_cv2.getPerspectiveTransform.return_value = mock_array()
 mock_cv2.warpPerspective.return_value = mock_array()
 
 class MockEffect:
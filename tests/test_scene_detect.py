@@ -0,0 +1,115 @@
+import unittest
+import os
+import shutil
+import subprocess as sp
+import sys
+import tempfile
+
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import scene_detect
+from scene_detect import HISTOGRAM_BINS, detect_scenes, file_features, find_cuts, frame_features
+
+
+class FakeClip:
+    """Three flat scenes: dark for 1s, bright for 1s, mid grey for 1s."""
+
+    fps = 10
+    duration = 3.0
+
+    def iter_frames(self, fps=None, dtype=None):
+        for i in range(int(self.duration * self.fps)):
+            level = (20, 220, 120)[i // self.fps]
+            # A little motion so the average change between frames is not zero
+            yield np.full((90, 160, 3), level + i % 3, np.uint8)
+
+
+class TestFeatures(unittest.TestCase):
+    def test_luminance_is_frame_sum(self):
+        frames = np.random.randint(0, 256, (5, 4, 6, 3), dtype=np.uint8)
+        np.testing.assert_array_equal(frame_features(frames), frames.reshape(5, -1).sum(axis=1))
+
+    def test_histograms_match_per_frame_histograms(self):
+        """Test that the batched bincount gives each frame its own normalised histogram."""
+        frames = np.random.randint(0, 256, (4, 8, 8, 3), dtype=np.uint8)
+        histograms = frame_features(frames, "histogram")
+
+        self.assertEqual(histograms.shape, (4, HISTOGRAM_BINS))
+        for frame, histogram in zip(frames, histograms):
+            grey = frame.mean(axis=2)
+            expected, _ = np.histogram(grey, bins=HISTOGRAM_BINS, range=(0, 256))
+            np.testing.assert_allclose(histogram, expected / grey.size)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            frame_features(np.zeros((1, 2, 2, 3), np.uint8), "edges")
+
+
+class TestFindCuts(unittest.TestCase):
+    def test_matches_moviepy_rule(self):
+        """Test that cuts are changes above threshold times the average change."""
+        luminosities = [10, 11, 10, 11, 100, 101, 100, 30, 31]
+        scenes, confidences = find_cuts(np.array(luminosities, float), 2, 4.5, threshold=2)
+
+        self.assertEqual(scenes, [(0, 2.0), (2.0, 3.5), (3.5, 4.5)])
+        self.assertEqual(len(confidences), 2)
+        self.assertTrue(all(0 < c < 1 for c in confidences))
+        self.assertGreater(confidences[0], confidences[1])
+
+    def test_single_frame(self):
+        self.assertEqual(find_cuts(np.array([5.0]), 25, 0.04), ([(0, 0.04)], []))
+
+    def test_static_clip_has_one_scene(self):
+        self.assertEqual(find_cuts(np.full(10, 7.0), 25, 0.4)[0], [(0, 0.4)])
+
+
+class TestDetectScenes(unittest.TestCase):
+    def test_clip(self):
+        for method in ("luminance", "histogram"):
+            scenes, _ = detect_scenes(FakeClip(), threshold=5, method=method)
+            self.assertEqual(scenes, [(0, 1.0), (1.0, 2.0), (2.0, 3.0)], method)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            detect_scenes(FakeClip(), method="edges")
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+class TestFileFeatures(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "cuts.mp4")
+        sp.run([
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc2=s=160x90:r=10:d=2",
+            "-f", "lavfi", "-i", "color=c=darkblue:s=160x90:r=10:d=2",
+            "-filter_complex", "[0][1]concat=n=2:v=1[v]", "-map", "[v]",
+            "-c:v", "libx264", "-g", "7", "-pix_fmt", "yuv420p", cls.path,
+        ], check=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_cut_in_file(self):
+        features = file_features(self.path, 10, 40)
+        scenes, confidences = find_cuts(features, 10, 4.0)
+        self.assertEqual(scenes, [(0, 2.0), (2.0, 4.0)])
+        self.assertEqual(len(confidences), 1)
+
+    def test_time_ranges_match_single_decoder(self):
+        """Test that splitting the file across decoders gives bit-identical features."""
+        min_range = scene_detect.MIN_RANGE_SECONDS
+        scene_detect.MIN_RANGE_SECONDS = 1
+        try:
+            split = file_features(self.path, 10, 40, "histogram", workers=3)
+        finally:
+            scene_detect.MIN_RANGE_SECONDS = min_range
+        np.testing.assert_array_equal(split, file_features(self.path, 10, 40, "histogram"))
+
+if __name__ == '__main__':
+    unittest.main()
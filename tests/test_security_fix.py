@@ -32,6 +32,8 @@ class MockFastMCP:
         return func
     def prompt(self, func):
         return func
+    def add_middleware(self, middleware):
+        pass
     def run(self, transport):
         pass
 
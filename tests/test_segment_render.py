@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+sys.modules['moviepy'] = MagicMock()
+sys.modules['moviepy.config'] = MagicMock(FFMPEG_BINARY="ffmpeg")
+
+from segment_render import split_frames, concat_segments
+from render_worker import frame_times
+
+class TestSplitFrames(unittest.TestCase):
+    def test_even_split(self):
+        self.assertEqual(split_frames(100, 4), [(0, 25), (25, 50), (50, 75), (75, 100)])
+
+    def test_uneven_split_covers_all_frames(self):
+        """Test that segments are contiguous and cover every frame exactly once."""
+        ranges = split_frames(101, 16)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], 101)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+        lengths = [b - a for a, b in ranges]
+        self.assertLessEqual(max(lengths) - min(lengths), 1)
+
+    def test_more_segments_than_frames(self):
+        """Test that no empty segments are produced."""
+        self.assertEqual(split_frames(3, 8), [(0, 1), (1, 2), (2, 3)])
+
+    def test_single_segment(self):
+        self.assertEqual(split_frames(50, 1), [(0, 50)])
+
+
+class TestFrameTimes(unittest.TestCase):
+    def test_non_integral_duration(self):
+        """Test that the frames are those clip.iter_frames yields when duration * fps is not integral."""
+        times = frame_times(1.05, 24)
+        self.assertEqual(len(times), 25)
+        self.assertEqual(list(times), [i / 24 for i in range(25)])
+
+    def test_integral_duration(self):
+        self.assertEqual(len(frame_times(2, 30)), 60)
+
+
+class TestConcatSegments(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.segments = [os.path.join(self.tmpdir.name, f"segment_{i:04d}.mp4") for i in range(3)]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @patch('segment_render.sp.run')
+    def test_concat_without_reencoding(self, mock_run):
+        """Test that segments are listed in order and joined with stream copy."""
+        mock_run.return_value = MagicMock(returncode=0)
+
+        concat_segments(self.segments, "/tmp/out.mp4")
+
+        cmd = mock_run.call_args[0][0]
+        self.assertIn("concat", cmd)
+        self.assertEqual(cmd[-3:], ["-c", "copy", "/tmp/out.mp4"])
+        with open(os.path.join(self.tmpdir.name, "segments.txt")) as f:
+            listed = [line.strip() for line in f]
+        self.assertEqual(listed, [f"file '{path}'" for path in self.segments])
+
+    @patch('segment_render.sp.run')
+    def test_concat_with_audio(self, mock_run):
+        """Test that the separately encoded audio track is muxed in."""
+        mock_run.return_value = MagicMock(returncode=0)
+
+        concat_segments(self.segments, "/tmp/out.mp4", audiofile="/tmp/audio.mp4")
+
+        cmd = mock_run.call_args[0][0]
+        self.assertIn("/tmp/audio.mp4", cmd)
+        self.assertIn("1:a", cmd)
+
+    @patch('segment_render.sp.run')
+    def test_concat_failure(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=1, stderr=b"boom")
+
+        with self.assertRaisesRegex(IOError, "boom"):
+            concat_segments(self.segments, "/tmp/out.mp4")
+
+if __name__ == '__main__':
+    unittest.main()
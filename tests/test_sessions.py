@@ -0,0 +1,137 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from sessions import DEFAULT_SESSION, FairScheduler, Session, SessionManager
+
+
+def new_session(session_id):
+    return Session(session_id, graph=None, collector=None)
+
+
+class TestSessionManager(unittest.TestCase):
+    def setUp(self):
+        self.expired = []
+        self.manager = SessionManager(new_session(DEFAULT_SESSION), new_session, on_expire=self.expired.append)
+
+    def test_sessions_have_their_own_clips(self):
+        self.manager.get("a").clips["clip"] = object()
+        self.assertEqual(self.manager.get("b").clips, {})
+        self.assertIs(self.manager.get("a"), self.manager.get("a"))
+        self.assertIs(self.manager.get(None), self.manager.default)
+        with self.assertRaisesRegex(ValueError, "Invalid session ID"):
+            self.manager.get("../a")
+
+    def test_bind(self):
+        self.assertIs(self.manager.current(), self.manager.default)
+        with self.manager.bind("a"):
+            self.assertEqual(self.manager.current().session_id, "a")
+            with self.manager.bind("b"):
+                self.assertEqual(self.manager.current().session_id, "b")
+            self.assertEqual(self.manager.current().session_id, "a")
+        self.assertIs(self.manager.current(), self.manager.default)
+
+    def test_idle_sessions_expire(self):
+        self.manager.idle_seconds = 10
+        idle, busy = self.manager.get("idle"), self.manager.get("busy")
+        busy.begin()
+        for session in (idle, busy, self.manager.default):
+            session.last_used -= 60
+        self.manager._last_sweep -= 60
+
+        self.manager.get("active")
+        self.assertEqual(self.expired, [idle])
+        self.assertEqual(
+            {session.session_id for session in self.manager.list()}, {DEFAULT_SESSION, "busy", "active"}
+        )
+        self.assertIsNot(self.manager.get("idle"), idle)
+
+    def test_session_limit(self):
+        """Test that sessions beyond max_sessions are refused, after dropping empty ones."""
+        self.manager.max_sessions = 2
+        self.manager.get("a").clips["clip"] = object()
+        self.manager.get("b")
+        # "b" is empty: it makes room for "c"
+        self.assertEqual(self.manager.get("c").session_id, "c")
+        self.assertEqual([session.session_id for session in self.expired], ["b"])
+        self.manager.get("c").clips["clip"] = object()
+        with self.assertRaisesRegex(RuntimeError, r"Maximum number of sessions \(2\)"):
+            self.manager.get("d")
+        self.assertIs(self.manager.get(None), self.manager.default)
+
+    def test_cpu_window(self):
+        session = new_session("a")
+        session.charge(2.0)
+        session._charges[0] = (time.monotonic() - 100, 2.0)
+        session.charge(0.5)
+        self.assertEqual(session.cpu_used(window=10), 0.5)
+        self.assertEqual(session.cpu_seconds, 2.5)
+
+
+class TestFairScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = FairScheduler(workers=1)
+        self.manager = SessionManager(new_session(DEFAULT_SESSION), new_session)
+
+    def test_least_cpu_used_runs_first(self):
+        """Test that a freed worker takes the call of the session that used the least CPU, not the oldest call."""
+        heavy, light = self.manager.get("heavy"), self.manager.get("light")
+        heavy.charge(100)
+        release, order = threading.Event(), []
+        blocker = self.scheduler.submit(heavy, release.wait)
+        futures = [
+            self.scheduler.submit(heavy, lambda: order.append("heavy")),
+            self.scheduler.submit(light, lambda: order.append("light")),
+        ]
+        release.set()
+        for future in [blocker, *futures]:
+            future.result(timeout=5)
+        self.assertEqual(order, ["light", "heavy"])
+
+    def test_calls_of_a_session_run_one_at_a_time(self):
+        scheduler = FairScheduler(workers=4)
+        session = self.manager.get("a")
+        running, peak = [], []
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.pop()
+
+        for future in [scheduler.submit(session, call) for _ in range(5)]:
+            future.result(timeout=5)
+        self.assertEqual(max(peak), 1)
+        self.assertEqual(session.busy, 0)
+
+    def test_calls_run_in_the_callers_session_and_are_charged(self):
+        session = self.manager.get("a")
+
+        def spin():
+            deadline = time.thread_time() + 0.05
+            while time.thread_time() < deadline:
+                pass
+            return self.manager.current().session_id
+
+        with self.manager.bind("a"):
+            future = self.scheduler.submit(session, spin)
+        self.assertEqual(future.result(timeout=5), "a")
+        self.assertGreaterEqual(session.cpu_used(window=60), 0.05)
+
+    def test_errors_reach_the_caller(self):
+        def fail():
+            raise ValueError("bad clip")
+
+        with self.assertRaisesRegex(ValueError, "bad clip"):
+            self.scheduler.submit(self.manager.get("a"), fail).result(timeout=5)
+
+if __name__ == '__main__':
+    unittest.main()
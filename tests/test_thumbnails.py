@@ -0,0 +1,125 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from render_cache import RenderCache
+from thumbnails import ThumbnailService, filmstrip_times
+
+
+class FakeClip:
+    """Frames whose brightness encodes t, so tiles can be told apart."""
+
+    def __init__(self):
+        self.times = []
+
+    def get_frame(self, t):
+        self.times.append(t)
+        return np.full((72, 128, 3), int(t * 10) % 256, np.uint8)
+
+
+class TestFilmstripTimes(unittest.TestCase):
+    def test_evenly_spaced(self):
+        self.assertEqual(filmstrip_times(10.0, 4), [1.25, 3.75, 6.25, 8.75])
+        self.assertEqual(filmstrip_times(10.0, 1), [5.0])
+
+    def test_still_image(self):
+        self.assertEqual(filmstrip_times(None, 5), [0.0])
+
+
+class TestThumbnailService(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.service = ThumbnailService(RenderCache(self.tmpdir.name, 10 * 1024**2), max_workers=2)
+        self.clip = FakeClip()
+        self.opened = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @contextmanager
+    def open_clip(self):
+        self.opened += 1
+        yield self.clip
+
+    def decode(self, data):
+        import cv2
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    def test_sprite_from_clip(self):
+        """Test that the sprite has one tile per timestamp, scaled to the requested height."""
+        data = self.service.filmstrip(None, [1.0, 2.0, 3.0], 36, open_clip=self.open_clip)
+
+        sprite = self.decode(data)
+        self.assertEqual(sprite.shape, (36, 3 * 64, 3))
+        self.assertEqual(self.clip.times, [1.0, 2.0, 3.0])
+        self.assertAlmostEqual(int(sprite[18, 64 + 32, 0]), 20, delta=3)
+
+    def test_sprites_are_cached_by_key(self):
+        first = self.service.filmstrip("k1", [1.0, 2.0], 36, open_clip=self.open_clip)
+        second = self.service.filmstrip("k1", [1.0, 2.0], 36, open_clip=self.open_clip)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.opened, 1)
+        self.assertIsNotNone(self.service.cache.lookup("k1", ".jpg"))
+
+    def test_concurrent_requests_share_one_build(self):
+        release = threading.Event()
+
+        @contextmanager
+        def slow_clip():
+            self.opened += 1
+            release.wait(5)
+            yield self.clip
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.service.filmstrip("k2", [1.0], 36, open_clip=slow_clip)))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.opened, 1)
+
+    @patch('thumbnails.sp.run')
+    def test_frames_are_seeked_in_source_file(self, mock_run):
+        """Test that file-backed frames use one input-seeking ffmpeg call per timestamp."""
+        import cv2
+        _, png = cv2.imencode(".png", np.zeros((72, 128, 3), np.uint8))
+        mock_run.return_value = MagicMock(returncode=0, stdout=png.tobytes())
+        sys.modules.setdefault('moviepy.config', MagicMock(FFMPEG_BINARY="ffmpeg"))
+
+        data = self.service.filmstrip(None, [0.5, 1.5], 36, source="source.mp4")
+
+        self.assertEqual(self.decode(data).shape, (36, 128, 3))
+        self.assertEqual(mock_run.call_count, 2)
+        for call in mock_run.call_args_list:
+            cmd = call[0][0]
+            self.assertLess(cmd.index("-ss"), cmd.index("-i"))
+        self.assertEqual(self.opened, 0)
+
+    @patch('thumbnails.sp.run')
+    def test_no_frames(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=1, stdout=b"")
+        sys.modules.setdefault('moviepy.config', MagicMock(FFMPEG_BINARY="ffmpeg"))
+
+        with self.assertRaises(ValueError):
+            self.service.filmstrip("k3", [0.5], 36, source="missing.mp4")
+        self.assertIsNone(self.service.cache.lookup("k3", ".jpg"))
+
+if __name__ == '__main__':
+    unittest.main()
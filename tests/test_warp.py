@@ -0,0 +1,138 @@
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock
+
+import cv2
+import numpy as np
+
+# Add src to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from custom_fx.warp import WarpCache, WarpMap, pixel_grid
+from custom_fx.kaleidoscope import Kaleidoscope
+from custom_fx.kaleidoscope_cube import KaleidoscopeCube
+from custom_fx.rotating_cube import RotatingCube
+
+
+def transform_only_clip():
+    clip = MagicMock()
+    clip.transform = lambda func: func
+    return clip
+
+
+class TestWarpMap(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+
+    def test_integral_map_is_exact(self):
+        """Test that whole-pixel maps give the same pixels as an index gather."""
+        x, y = pixel_grid(6, 4)
+        warp = WarpMap(5 - x, y)
+
+        self.assertTrue(warp.integral)
+        np.testing.assert_array_equal(warp.apply(self.frame), self.frame[:, ::-1])
+
+    def test_bilinear_sampling(self):
+        """Test that sub-pixel coordinates interpolate between neighbours."""
+        frame = np.zeros((1, 2, 3), np.uint8)
+        frame[0, 1] = 200
+        warp = WarpMap(np.full((1, 1), 0.5), np.zeros((1, 1)))
+
+        self.assertFalse(warp.integral)
+        np.testing.assert_array_equal(warp.apply(frame)[0, 0], [100, 100, 100])
+
+    def test_outside_is_black(self):
+        warp = WarpMap(np.full((2, 2), -1), np.full((2, 2), -1))
+        np.testing.assert_array_equal(warp.apply(self.frame + 1), np.zeros((2, 2, 3), np.uint8))
+
+    def test_unsupported_dtype_uses_nearest_pixel(self):
+        frame = np.arange(6, dtype=np.int64).reshape(2, 3)
+        warp = WarpMap(np.array([[2.2, 0.0]]), np.array([[1.0, 0.4]]))
+        np.testing.assert_array_equal(warp.apply(frame), [[5, 0]])
+
+
+class TestWarpCache(unittest.TestCase):
+    def make(self, value=0.0):
+        return WarpMap(np.full((10, 10), value), np.zeros((10, 10)))  # 800 bytes
+
+    def test_builds_once(self):
+        cache = WarpCache(max_bytes=10_000)
+        calls = []
+        for _ in range(3):
+            cache.get("k", lambda: calls.append(1) or self.make())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    def test_lru_eviction_by_bytes(self):
+        cache = WarpCache(max_bytes=2000)
+        cache.get("a", self.make)
+        cache.get("b", self.make)
+        cache.get("a", self.make)  # a is now the most recently used
+        cache.get("c", self.make)
+
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertLessEqual(stats["bytes"], 2000)
+        misses = stats["misses"]
+        cache.get("a", self.make)
+        self.assertEqual(cache.stats()["misses"], misses)
+        cache.get("b", self.make)
+        self.assertEqual(cache.stats()["misses"], misses + 1)
+
+    def test_oversized_maps_are_not_cached(self):
+        cache = WarpCache(max_bytes=100)
+        warp = cache.get("a", self.make)
+        self.assertIsInstance(warp, WarpMap)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+class TestRotatingCubeMap(unittest.TestCase):
+    def test_faces_are_masked_by_geometry(self):
+        """Test that black source pixels render black instead of showing the faces behind them."""
+        effect = RotatingCube(mirror=False, motion_radius=0)
+        process_frame = effect.apply(transform_only_clip())
+        white = np.full((90, 160, 3), 255, np.uint8)
+        black = np.zeros_like(white)
+        t = 1.3
+
+        covered = process_frame(lambda _: white, t)[:, :, 0] > 0
+        expected = np.zeros((90, 160), np.uint8)
+        for quad in effect._project_faces(160, 90, t):
+            cv2.fillConvexPoly(expected, np.round(quad).astype(np.int32), 1)
+
+        # Coverage follows the projected faces, up to antialiased edge pixels
+        self.assertLess(np.mean(covered != expected.astype(bool)), 0.03)
+        self.assertFalse(process_frame(lambda _: black, t).any())
+
+    def test_frames_do_not_share_buffers(self):
+        """Test that a returned frame is not overwritten by the next one."""
+        process_frame = RotatingCube().apply(transform_only_clip())
+        first_frame = np.random.randint(0, 256, (45, 80, 3), np.uint8)
+        first = process_frame(lambda _: first_frame, 0.5)
+        expected = first.copy()
+        process_frame(lambda _: np.zeros_like(first_frame), 0.5)
+
+        np.testing.assert_array_equal(first, expected)
+        self.assertTrue(first.any())
+
+class TestKaleidoscopeCube(unittest.TestCase):
+    def test_fused_matches_chained_effects(self):
+        """Test that the single-resample path renders what Kaleidoscope then RotatingCube render."""
+        yy, xx = np.mgrid[0:72, 0:96]
+        frame = np.dstack([xx * 2, yy * 3, (xx + yy) % 256]).astype(np.uint8)
+        chained_cube = RotatingCube(speed_x=40).apply(transform_only_clip())
+        chained_kaleidoscope = Kaleidoscope(n_slices=6).apply(transform_only_clip())
+        fused = KaleidoscopeCube({"n_slices": 6}, {"speed_x": 40}).apply(transform_only_clip())
+
+        for t in (0.3, 1.7):
+            expected = chained_cube(lambda _: chained_kaleidoscope(lambda _: frame, t), t).astype(int)
+            result = fused(lambda _: frame, t).astype(int)
+            # Same coverage, and colours within interpolation rounding
+            np.testing.assert_array_equal(result.any(axis=2), expected.any(axis=2))
+            self.assertLess(np.abs(result - expected).mean(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
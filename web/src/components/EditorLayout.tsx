@@ -15,6 +15,7 @@ import { ChatPanel } from "@/components/panels/ChatPanel"
 
 export function EditorLayout() {
   const [isPlaying, setIsPlaying] = React.useState(false)
+  const [selectedClipId, setSelectedClipId] = React.useState<string | null>(null)
 
   return (
     <div className="h-screen w-screen flex flex-col bg-background text-foreground overflow-hidden font-sans selection:bg-primary/30">
@@ -53,14 +54,14 @@ export function EditorLayout() {
                 <ResizablePanelGroup direction="horizontal" className="h-full">
                     {/* Library */}
                     <ResizablePanel defaultSize={20} minSize={15} maxSize={30} className="bg-zinc-900/50">
-                        <LibraryPanel />
+                        <LibraryPanel selectedClipId={selectedClipId} onSelectClip={(clipId) => { setSelectedClipId(clipId); setIsPlaying(false) }} />
                     </ResizablePanel>
 
                     <ResizableHandle className="bg-zinc-800 w-[1px] hover:w-1 transition-all hover:bg-primary" />
 
                     {/* Player */}
                     <ResizablePanel defaultSize={55} minSize={30} className="bg-black">
-                        <PlayerPanel isPlaying={isPlaying} onTogglePlay={() => setIsPlaying(!isPlaying)} />
+                        <PlayerPanel clipId={selectedClipId} isPlaying={isPlaying} onTogglePlay={() => setIsPlaying(!isPlaying)} />
                     </ResizablePanel>
 
                     <ResizableHandle className="bg-zinc-800 w-[1px] hover:w-1 transition-all hover:bg-primary" />
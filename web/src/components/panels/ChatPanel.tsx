@@ -71,6 +71,7 @@ export function ChatPanel({ className }: ChatPanelProps) {
         const res = await fetch("http://localhost:8000/api/chat", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
+            credentials: "include",
             body: JSON.stringify({
                 messages: newMessages,
                 api_keys: apiKeys
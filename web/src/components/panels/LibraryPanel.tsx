@@ -9,16 +9,21 @@ import { Clip } from "@/lib/types"
 
 interface LibraryPanelProps {
   className?: string
+  selectedClipId?: string | null
+  onSelectClip?: (clipId: string) => void
 }
 
-export function LibraryPanel({ className }: LibraryPanelProps) {
+export function LibraryPanel({ className, selectedClipId, onSelectClip }: LibraryPanelProps) {
   const [clips, setClips] = React.useState<Clip[]>([])
   const [loading, setLoading] = React.useState(false)
 
   const fetchClips = async () => {
     setLoading(true)
     try {
-        const res = await fetch("http://localhost:8000/api/clips")
+        const res = await fetch("http://localhost:8000/api/clips", {
+            // The session cookie keeps the clips of this browser apart from other users'
+            credentials: "include",
+        })
         if (res.ok) {
             const data = await res.json()
             setClips(data)
@@ -67,7 +72,11 @@ export function LibraryPanel({ className }: LibraryPanelProps) {
              </div>
           )}
           {clips.map((clip) => (
-            <Card key={clip.id} className="group cursor-pointer overflow-hidden border-none bg-card hover:ring-1 hover:ring-primary transition-all">
+            <Card
+              key={clip.id}
+              onClick={() => onSelectClip?.(clip.id)}
+              className={`group cursor-pointer overflow-hidden border-none bg-card hover:ring-1 hover:ring-primary transition-all ${clip.id === selectedClipId ? 'ring-1 ring-primary' : ''}`}
+            >
               <div className="aspect-video bg-muted relative flex items-center justify-center">
                   {clip.thumbnail ? (
                       <img src={clip.thumbnail} alt={clip.name} className="w-full h-full object-cover" />
@@ -4,11 +4,57 @@ import { Button } from "@/components/ui/button"
 
 interface PlayerPanelProps {
   className?: string
+  clipId?: string | null
   isPlaying: boolean
   onTogglePlay: () => void
 }
 
-export function PlayerPanel({ className, isPlaying, onTogglePlay }: PlayerPanelProps) {
+export function PlayerPanel({ className, clipId, isPlaying, onTogglePlay }: PlayerPanelProps) {
+  const videoRef = React.useRef<HTMLVideoElement>(null)
+  // HLS preview rendered on demand by the API at reduced resolution and fps
+  const previewUrl = clipId ? `http://localhost:8000/api/preview/${clipId}/index.m3u8` : null
+
+  React.useEffect(() => {
+    const video = videoRef.current
+    if (!video || !previewUrl) return
+    // Safari plays HLS natively; other browsers get the segments through hls.js and Media Source Extensions
+    if (video.canPlayType("application/vnd.apple.mpegurl")) {
+      video.src = previewUrl
+      return () => {
+        video.removeAttribute("src")
+        video.load()
+      }
+    }
+    let hls: import("hls.js").default | null = null
+    let cancelled = false
+    import("hls.js").then(({ default: Hls }) => {
+      if (cancelled) return
+      if (!Hls.isSupported()) {
+        console.error("This browser cannot play HLS previews")
+        return
+      }
+      // Send the session cookie with playlist and segment requests
+      hls = new Hls({ xhrSetup: (xhr) => { xhr.withCredentials = true } })
+      hls.loadSource(previewUrl)
+      hls.attachMedia(video)
+    })
+    return () => {
+      cancelled = true
+      hls?.destroy()
+    }
+  }, [previewUrl])
+
+  React.useEffect(() => {
+    const video = videoRef.current
+    if (!video) return
+    if (isPlaying) {
+      // hls.js attaches its source asynchronously: autoPlay starts the video then
+      if (video.src) video.play().catch((e) => console.error("Failed to play preview", e))
+    } else {
+      video.pause()
+    }
+  }, [isPlaying, clipId])
+
   return (
     <div className={`flex h-full w-full flex-col bg-black/95 relative ${className}`}>
       {/* Top Bar (Overlay) */}
@@ -27,8 +73,17 @@ export function PlayerPanel({ className, isPlaying, onTogglePlay }: PlayerPanelP
       {/* Main Screen */}
       <div className="flex-1 flex items-center justify-center p-8">
         <div className="aspect-video w-full max-w-4xl bg-zinc-900 rounded-lg border border-zinc-800 shadow-2xl flex items-center justify-center relative overflow-hidden group">
-            {/* Placeholder Content */}
-            <div className="text-zinc-700 font-light text-2xl select-none">Preview Player</div>
+            {clipId ? (
+                <video
+                    ref={videoRef}
+                    key={clipId}
+                    className="w-full h-full object-contain"
+                    autoPlay={isPlaying}
+                    playsInline
+                />
+            ) : (
+                <div className="text-zinc-700 font-light text-2xl select-none">Preview Player</div>
+            )}
 
             {/* Play Overlay (Optional) */}
             {!isPlaying && (
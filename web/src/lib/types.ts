@@ -2,6 +2,7 @@ export interface Clip {
   id: string
   name: string
   duration: string
-  thumbnail: string
+  thumbnail: string | null
+  filmstrip: string | null
   type: string
 }